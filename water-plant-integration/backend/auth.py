@@ -35,16 +35,34 @@ def _parse_token(token: str) -> CurrentUser:
     )
 
 
+def _token(authorization: Optional[str], x_api_key: Optional[str]) -> Optional[str]:
+    if authorization and authorization.startswith("Bearer "):
+        return authorization[7:].strip()
+    if x_api_key:
+        return x_api_key.strip()
+    return None
+
+
+def get_optional_user(
+    authorization: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
+) -> Optional[CurrentUser]:
+    """Dependency: like get_current_user, but None instead of 401 (for checks that run before auth)."""
+    token = _token(authorization, x_api_key)
+    if not token:
+        return None
+    try:
+        return _parse_token(token)
+    except ValueError:
+        return None
+
+
 def get_current_user(
     authorization: Optional[str] = Header(None),
     x_api_key: Optional[str] = Header(None, alias="X-API-Key"),
 ) -> CurrentUser:
     """Dependency: parse token from Authorization Bearer or X-API-Key header. Returns CurrentUser or 401."""
-    token = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization[7:].strip()
-    elif x_api_key:
-        token = x_api_key.strip()
+    token = _token(authorization, x_api_key)
     if not token:
         raise HTTPException(status_code=401, detail="Missing Authorization or X-API-Key")
     try:
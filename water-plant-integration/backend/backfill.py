@@ -0,0 +1,391 @@
+"""
+Historian backfill: load CSV exports into readings, scada_readings and scada_rollups for one plant.
+
+File format: a header row naming at least tag, timestamp and value (optional quality, unit), then one
+reading per line. Timestamps are ISO 8601 (naive = UTC) or epoch seconds. Quoted fields must not contain
+line breaks. Tags go through the ingestion tag normalizer (readings.tag); scada_readings keeps the raw
+name, as a live poll does. Rows with a bad tag, timestamp or value are skipped and counted. Historical
+rows leave current_readings (the live latest value) and the alert engine alone.
+
+The file is never read whole. It is cut into chunks of about BACKFILL_CHUNK_MB by byte offset (aligned to
+the next line break), so planning is a few seeks. Each chunk is loaded by one worker process, which reads
+its byte range, parses and normalizes it, and inserts it in batches of INGEST_CHUNK_SIZE rows. The
+chunk's rows and its backfill_chunks checkpoint commit in one transaction. A resumed job re-plans the same
+chunks (same chunk size) and skips the checkpointed ones, so each chunk is loaded exactly once.
+
+    python backfill.py export.csv --plant plant_a [--workers 4] [--chunk-mb 4]
+    python backfill.py export.csv --plant plant_a --resume 12
+
+POST /api/backfill (Admin) does the same for files under BACKFILL_DIR, in the background.
+
+Config (env):
+- BACKFILL_DIR: directory the API may read from (default ./backfill).
+- BACKFILL_WORKERS: worker processes (default: CPU count, at most 8). SQLite serializes writers, so
+  extra workers mainly overlap parsing with the single writer.
+- BACKFILL_CHUNK_MB: chunk size in MB (default 4).
+"""
+
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, init_db
+from ingestion.service import _chunk_size, _insert_chunked
+from ingestion.tag_normalizer import get_normalizer
+from models_platform import BackfillChunk, BackfillJob, Reading, ScadaReading
+from pipeline.rollups import update_rollups
+
+REQUIRED_COLUMNS = ("tag", "timestamp", "value")
+OPTIONAL_COLUMNS = ("quality", "unit")
+COLUMN_ALIASES = {"tag_name": "tag", "tagname": "tag", "time": "timestamp", "ts": "timestamp"}
+MAX_WORKERS = 8
+PROGRESS_INTERVAL_SECONDS = 1.0
+WORKER_BUSY_TIMEOUT_MS = 120_000  # SQLite: workers wait their turn for the write lock
+
+_running: set[int] = set()
+_running_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def default_workers() -> int:
+    return _env_int("BACKFILL_WORKERS", min(os.cpu_count() or 1, MAX_WORKERS))
+
+
+def default_chunk_bytes() -> int:
+    return _env_int("BACKFILL_CHUNK_MB", 4) * 1024 * 1024
+
+
+def backfill_dir() -> Path:
+    return Path(os.environ.get("BACKFILL_DIR", "").strip() or "./backfill").resolve()
+
+
+def resolve_backfill_path(name: str) -> Path:
+    """name relative to BACKFILL_DIR. ValueError if it points outside it, FileNotFoundError if missing."""
+    base = backfill_dir()
+    path = (base / name).resolve()
+    if not path.is_relative_to(base):
+        raise ValueError("path must be inside BACKFILL_DIR")
+    if not path.is_file():
+        raise FileNotFoundError(f"{name} not found in BACKFILL_DIR")
+    return path
+
+
+# ----- file layout -----
+def read_header(path: str) -> tuple[dict[str, int], int]:
+    """Column name -> index (REQUIRED_COLUMNS + present OPTIONAL_COLUMNS), and the byte offset after the header."""
+    with open(path, "rb") as f:
+        line = f.readline()
+        offset = f.tell()
+    names = next(csv.reader([line.decode("utf-8-sig", errors="replace")]), [])
+    columns: dict[str, int] = {}
+    for i, name in enumerate(names):
+        key = name.strip().lower()
+        key = COLUMN_ALIASES.get(key, key)
+        if key in REQUIRED_COLUMNS + OPTIONAL_COLUMNS and key not in columns:
+            columns[key] = i
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+    return columns, offset
+
+
+def plan_chunks(path: str, start: int, end: int, chunk_bytes: int) -> list[tuple[int, int]]:
+    """[(start, end)) byte ranges of about chunk_bytes, each ending after a line break (or at EOF)."""
+    chunks = []
+    with open(path, "rb") as f:
+        pos = start
+        while pos < end:
+            target = pos + chunk_bytes
+            if target >= end:
+                stop = end
+            else:
+                f.seek(target)
+                f.readline()
+                stop = min(f.tell(), end)
+            chunks.append((pos, stop))
+            pos = stop
+    return chunks
+
+
+def parse_timestamp(text: str) -> datetime:
+    """ISO 8601 (naive = UTC, aware converted to naive UTC) or epoch seconds."""
+    text = text.strip()
+    try:
+        ts = datetime.fromisoformat(text)
+    except ValueError:
+        return datetime.fromtimestamp(float(text), timezone.utc).replace(tzinfo=None)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+# ----- one chunk -----
+def _parse_chunk(data: bytes, columns: dict[str, int]) -> tuple[list[tuple], int]:
+    """Rows (raw_tag, ts, value, quality, unit) and the number of rows skipped."""
+    i_tag, i_ts, i_value = columns["tag"], columns["timestamp"], columns["value"]
+    i_quality, i_unit = columns.get("quality"), columns.get("unit")
+    rows, skipped = [], 0
+    for row in csv.reader(data.decode("utf-8", errors="replace").splitlines()):
+        if not row:
+            continue
+        try:
+            raw = row[i_tag].strip()
+            if not raw:
+                raise ValueError("empty tag")
+            ts = parse_timestamp(row[i_ts])
+            value = float(row[i_value])
+        except (ValueError, IndexError, OverflowError, OSError):
+            skipped += 1
+            continue
+        quality = row[i_quality].strip() or None if i_quality is not None and i_quality < len(row) else None
+        unit = row[i_unit].strip() or None if i_unit is not None and i_unit < len(row) else None
+        rows.append((raw, ts, value, quality, unit))
+    return rows, skipped
+
+
+def load_chunk(
+    db: Session,
+    job_id: int,
+    plant_id: Optional[str],
+    path: str,
+    chunk_no: int,
+    start: int,
+    end: int,
+    columns: dict[str, int],
+) -> Optional[tuple[int, int]]:
+    """Load one byte range and checkpoint it (one transaction). (loaded, skipped), or None if already loaded."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    rows, skipped = _parse_chunk(data, columns)
+    try:
+        # Checkpoint first: a chunk another run already loaded fails here, before any row is written.
+        db.add(BackfillChunk(
+            job_id=job_id, chunk_no=chunk_no, start_offset=start, end_offset=end,
+            rows_loaded=len(rows), rows_skipped=skipped,
+        ))
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return None
+    raws = list(dict.fromkeys(r[0] for r in rows))
+    tags = dict(zip(raws, get_normalizer().normalize_many(raws)))
+    size = _chunk_size()
+    try:
+        for b in range(0, len(rows), size):
+            batch = rows[b:b + size]
+            scada_rows = [
+                {"plant_id": plant_id, "timestamp": ts, "tag_name": raw, "value": value, "unit": unit,
+                 "quality": quality, "created_at": ts}
+                for raw, ts, value, quality, unit in batch
+            ]
+            _insert_chunked(db, ScadaReading.__table__, scada_rows, size)
+            _insert_chunked(db, Reading.__table__, [
+                {"plant_id": plant_id, "source": "scada", "tag": tags[raw], "value": value, "unit": unit,
+                 "raw_tag": raw, "created_at": ts}
+                for raw, ts, value, quality, unit in batch
+            ], size)
+        # Rollups once per chunk, not per batch: far fewer bucket upserts for the same rows.
+        update_rollups(db, plant_id, [{"tag_name": tags[raw], "timestamp": ts, "value": value} for raw, ts, value, _, _ in rows], size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows), skipped
+
+
+def _worker_init() -> None:
+    """Worker process: its own engine (fresh import under spawn); wait longer for the SQLite write lock."""
+    current = _env_int("SQLITE_BUSY_TIMEOUT_MS", 0)
+    os.environ["SQLITE_BUSY_TIMEOUT_MS"] = str(max(current, WORKER_BUSY_TIMEOUT_MS))
+
+
+def _load_chunk_task(job_id: int, plant_id: Optional[str], path: str, chunk_no: int, start: int, end: int,
+                     columns: dict[str, int]) -> tuple[int, Optional[tuple[int, int]]]:
+    db = SessionLocal()
+    try:
+        return chunk_no, load_chunk(db, job_id, plant_id, path, chunk_no, start, end, columns)
+    finally:
+        db.close()
+
+
+# ----- jobs -----
+def create_job(db: Session, path: str, plant_id: Optional[str], chunk_bytes: Optional[int] = None) -> BackfillJob:
+    """Validate the header and register the job (commits). Call run_job to load it."""
+    path = str(Path(path).resolve())
+    read_header(path)
+    job = BackfillJob(
+        plant_id=plant_id, path=path, file_size=os.path.getsize(path),
+        chunk_bytes=chunk_bytes or default_chunk_bytes(), status="pending",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_job(job_id: int) -> bool:
+    """In-process guard so one job is not run twice at once (API). False if it is already running here."""
+    with _running_lock:
+        if job_id in _running:
+            return False
+        _running.add(job_id)
+        return True
+
+
+def checkpointed_chunks(db: Session, job_id: int) -> set[int]:
+    return set(db.scalars(select(BackfillChunk.chunk_no).where(BackfillChunk.job_id == job_id)))
+
+
+def _refresh_totals(db: Session, job: BackfillJob) -> None:
+    done, loaded, skipped = db.execute(
+        select(func.count(), func.coalesce(func.sum(BackfillChunk.rows_loaded), 0),
+               func.coalesce(func.sum(BackfillChunk.rows_skipped), 0))
+        .where(BackfillChunk.job_id == job.id)
+    ).one()
+    job.chunks_done, job.rows_loaded, job.rows_skipped = done, loaded, skipped
+
+
+def run_job(job_id: int, workers: Optional[int] = None) -> dict[str, Any]:
+    """Load every chunk not yet checkpointed. Records status, totals and throughput on the job row."""
+    workers = workers or default_workers()
+    db = SessionLocal()
+    try:
+        job = db.get(BackfillJob, job_id)
+        if job is None:
+            raise ValueError(f"backfill job {job_id} not found")
+        started = time.perf_counter()
+        loaded_now = 0
+        try:
+            if not os.path.isfile(job.path) or os.path.getsize(job.path) != job.file_size:
+                raise ValueError("file is missing or changed since the job was created")
+            columns, header_end = read_header(job.path)
+            chunks = plan_chunks(job.path, header_end, job.file_size, job.chunk_bytes)
+            done = checkpointed_chunks(db, job.id)
+            todo = [(i, s, e) for i, (s, e) in enumerate(chunks) if i not in done]
+            job.status, job.chunks_total, job.last_error = "running", len(chunks), None
+            job.started_at, job.finished_at = datetime.utcnow(), None
+            db.commit()
+            args = (job.id, job.plant_id, job.path)
+            last_progress = time.monotonic()
+
+            def progress(result: Optional[tuple[int, int]]) -> None:
+                nonlocal loaded_now, last_progress
+                if result is not None:
+                    loaded_now += result[0]
+                if time.monotonic() - last_progress >= PROGRESS_INTERVAL_SECONDS:
+                    last_progress = time.monotonic()
+                    try:
+                        _refresh_totals(db, job)
+                        db.commit()
+                    except OperationalError:  # SQLite write lock held by a worker: report next time
+                        db.rollback()
+
+            if workers <= 1 or len(todo) <= 1:
+                for chunk_no, s, e in todo:
+                    progress(load_chunk(db, *args, chunk_no, s, e, columns))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, len(todo)), mp_context=get_context("spawn"), initializer=_worker_init,
+                ) as pool:
+                    pending = {pool.submit(_load_chunk_task, *args, chunk_no, s, e, columns) for chunk_no, s, e in todo}
+                    try:
+                        while pending:
+                            finished, pending = wait(pending, timeout=PROGRESS_INTERVAL_SECONDS, return_when=FIRST_EXCEPTION)
+                            for fut in finished:
+                                progress(fut.result()[1])  # re-raises a worker's error
+                            if not finished:
+                                progress(None)
+                    except BaseException:
+                        pool.shutdown(wait=True, cancel_futures=True)  # chunks not started stay for --resume
+                        raise
+            job.status = "completed"
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.last_error = f"{type(e).__name__}: {e}"[:2000]
+        elapsed = time.perf_counter() - started
+        _refresh_totals(db, job)
+        job.rows_per_sec = round(loaded_now / elapsed, 1) if elapsed > 0 else None
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        return job_summary(job, elapsed_seconds=elapsed, rows_loaded_now=loaded_now)
+    finally:
+        with _running_lock:
+            _running.discard(job_id)
+        db.close()
+
+
+def job_summary(job: BackfillJob, **extra: Any) -> dict[str, Any]:
+    out = {
+        "job_id": job.id, "plant_id": job.plant_id, "path": job.path, "status": job.status,
+        "chunks_done": job.chunks_done, "chunks_total": job.chunks_total,
+        "rows_loaded": job.rows_loaded, "rows_skipped": job.rows_skipped,
+        "rows_per_sec": job.rows_per_sec, "last_error": job.last_error,
+    }
+    out.update(extra)
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load a historian CSV export (tag, timestamp, value[, quality][, unit]).")
+    parser.add_argument("file")
+    parser.add_argument("--plant", default=None, help="plant_id for the rows")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="continue an unfinished job")
+    parser.add_argument("--workers", type=int, default=None, help=f"worker processes (default {default_workers()})")
+    parser.add_argument("--chunk-mb", type=float, default=None, help="chunk size in MB (new jobs only)")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.resume:
+            job = db.get(BackfillJob, args.resume)
+            if job is None:
+                parser.error(f"job {args.resume} not found")
+            if job.status == "completed":
+                parser.error(f"job {args.resume} already completed")
+            job_id = job.id
+        else:
+            chunk_bytes = int(args.chunk_mb * 1024 * 1024) if args.chunk_mb else None
+            try:
+                job_id = create_job(db, args.file, args.plant, chunk_bytes).id
+            except (OSError, ValueError) as e:
+                parser.error(str(e))
+    finally:
+        db.close()
+    print(f"backfill job {job_id}")
+    claim_job(job_id)
+    summary = run_job(job_id, workers=args.workers)
+    print(
+        f"{summary['status']}: {summary['rows_loaded_now']} rows in {summary['elapsed_seconds']:.1f} s "
+        f"({summary['rows_per_sec'] or 0:,.0f} rows/s, {(summary['rows_per_sec'] or 0) * 60:,.0f} rows/min); "
+        f"total {summary['rows_loaded']} loaded, {summary['rows_skipped']} skipped, "
+        f"{summary['chunks_done']}/{summary['chunks_total']} chunks"
+    )
+    if summary["last_error"]:
+        print(f"error: {summary['last_error']} (resume with --resume {job_id})")
+    return 0 if summary["status"] == "completed" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Pipeline benchmark: seed synthetic plants (benchmarks/synthetic.py) at several scales and time the hot paths.
+
+    python benchmarks/bench_pipeline.py [--scales small,medium] [--repeat 10] [--out bench.json]
+    python benchmarks/bench_pipeline.py --baseline old.json          # run, then compare with old.json
+    python benchmarks/bench_pipeline.py --compare old.json new.json  # compare two saved runs
+
+Run from backend/. Each scale gets a fresh SQLite file (same pragmas as the app) in a temp dir. Steps:
+ingest_scada_latest, evaluate_alerts (after a fresh poll), list_entries, the compliance export (one day
+of history) and latest readings, per plant and for admin (all plants). Results are written as JSON.
+Compare flags a step as a regression when its median is more than --threshold slower (default 20%)
+and by more than --min-ms (default 0.5 ms); exit code 1 if any step regressed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from benchmarks import synthetic  # noqa: E402
+from database import make_engine  # noqa: E402
+from elog.models import Base  # noqa: E402
+from elog.repository import list_entries  # noqa: E402
+from elog.search import ensure_search_index  # noqa: E402
+from ingestion.service import bulk_store_readings, ingest_scada_latest, latest_readings  # noqa: E402
+from pipeline import alerts as alert_pipeline  # noqa: E402
+from pipeline.alert_index import open_alert_index  # noqa: E402
+from pipeline.rules import rule_engine  # noqa: E402
+from routes_spec import ComplianceExportBody, _export_rows  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_MS = 0.5
+
+
+def _timed(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> dict[str, Any]:
+    """Run fn repeat times (setup, untimed, before each). Best/median/p95 in ms plus fn's last result size."""
+    times, result = [], None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    out = {
+        "repeat": repeat,
+        "best_ms": round(times[0], 3),
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 3),
+    }
+    if isinstance(result, (list, tuple)):
+        out["rows"] = len(result[0]) if isinstance(result, tuple) else len(result)
+    elif isinstance(result, int):
+        out["rows"] = result
+    return out
+
+
+def _use_scale(scale: synthetic.Scale) -> None:
+    """Point the process-wide config and caches at this scale's synthetic tags and fresh DB."""
+    os.environ["ALERT_THRESHOLDS"] = json.dumps(synthetic.alert_thresholds(scale))
+    os.environ["OPC_UA_ENDPOINT"] = "opc.tcp://bench.invalid:4840"  # config-driven mode; fetch_data does not connect
+    os.environ["OPC_UA_TAG_LIST"] = ",".join(synthetic.raw_tag_names(scale))
+    rule_engine.reload()  # also resets evaluate_alerts' per-plant read positions
+
+
+def run_scale(scale: synthetic.Scale, repeat: int, seed: int, workdir: str) -> dict[str, Any]:
+    _use_scale(scale)
+    engine = make_engine(f"sqlite:///{os.path.join(workdir, scale.name + '.db')}")
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    t0 = time.perf_counter()
+    counts = synthetic.seed(db, scale, seed=seed)
+    seed_s = time.perf_counter() - t0
+    db.execute(text("ANALYZE"))
+    open_alert_index.rebuild(db)
+
+    plant = synthetic.plant_ids(scale)[0]
+    day = ComplianceExportBody(from_time=synthetic.START, to_time=synthetic.START + timedelta(days=1))
+    ticks = iter(range(1, 1_000_000))
+
+    def fresh_poll() -> None:
+        bulk_store_readings(db, plant, synthetic.poll_batch(scale, 0, next(ticks), seed=seed))
+
+    steps: list[tuple[str, Callable[[], Any], Optional[Callable[[], Any]]]] = [
+        ("ingest_scada_latest", lambda: ingest_scada_latest(db, plant), None),
+        ("evaluate_alerts", lambda: alert_pipeline.evaluate_alerts(db, plant), fresh_poll),
+        ("list_entries (plant)", lambda: list_entries(db, plant_id=plant), None),
+        ("list_entries (admin)", lambda: list_entries(db), None),
+        ("compliance export (plant, 1 day)", lambda: sum(1 for _ in _export_rows(db, plant, day)), None),
+        ("compliance export (admin, 1 day)", lambda: sum(1 for _ in _export_rows(db, None, day)), None),
+        ("latest_readings (plant)", lambda: latest_readings(db, plant), None),
+        ("latest_readings (admin)", lambda: latest_readings(db, None), None),
+    ]
+    results = {}
+    for name, fn, setup in steps:
+        results[name] = _timed(fn, repeat, setup)
+        db.rollback()
+        print(f"  {name:<34} median {results[name]['median_ms']:9.2f} ms   p95 {results[name]['p95_ms']:9.2f} ms")
+    db.close()
+    engine.dispose()
+    return {
+        "plants": scale.plants, "tags": scale.tags, "days": scale.days,
+        "interval_minutes": scale.interval_minutes, "rows": counts, "seed_seconds": round(seed_s, 2),
+        "steps": results,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(old: dict[str, Any], new: dict[str, Any], threshold: float, min_ms: float) -> list[str]:
+    """Print a step-by-step comparison of median times. Returns the regressed "scale / step" names."""
+    regressions = []
+    for scale, new_scale in new["scales"].items():
+        old_scale = old.get("scales", {}).get(scale)
+        if old_scale is None:
+            print(f"{scale}: not in baseline")
+            continue
+        print(f"{scale}:")
+        for step, cur in new_scale["steps"].items():
+            base = old_scale["steps"].get(step)
+            if base is None:
+                print(f"  {step:<34} new")
+                continue
+            before, after = base["median_ms"], cur["median_ms"]
+            ratio = after / before if before > 0 else float("inf")
+            mark = ""
+            if after > before * (1 + threshold) and after - before > min_ms:
+                mark = "  REGRESSION"
+                regressions.append(f"{scale} / {step}")
+            elif before > after * (1 + threshold) and before - after > min_ms:
+                mark = "  faster"
+            print(f"  {step:<34} {before:9.2f} -> {after:9.2f} ms  ({ratio:5.2f}x){mark}")
+    return regressions
+
+
+def _load(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", default="small,medium", help=f"comma-separated, from: {', '.join(synthetic.SCALES)}")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_pipeline.json")
+    parser.add_argument("--baseline", help="compare this run with a saved JSON run")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="only compare two saved runs")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative slowdown that counts (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=DEFAULT_MIN_MS, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(_load(args.compare[0]), _load(args.compare[1]), args.threshold, args.min_ms)
+        print(f"{len(regressions)} regressions")
+        return 1 if regressions else 0
+
+    names = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [n for n in names if n not in synthetic.SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+    run: dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir:
+        for name in names:
+            scale = synthetic.SCALES[name]
+            print(f"{name}: {scale.plants} plants x {scale.tags} tags x {scale.days} days ({scale.history_rows} history rows)")
+            run["scales"][name] = run_scale(scale, args.repeat, args.seed, workdir)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.baseline:
+        regressions = compare(_load(args.baseline), run, args.threshold, args.min_ms)
+        print(f"{len(regressions)} regressions")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
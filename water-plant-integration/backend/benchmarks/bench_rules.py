@@ -0,0 +1,72 @@
+"""
+Rule engine benchmark: compile N per-tag thresholds and evaluate one poll batch of N readings.
+
+    python benchmarks/bench_rules.py [--tags 50000] [--repeat 20]
+
+Run from backend/. Prints best and median wall time per step.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from pipeline.rules import CompiledRules  # noqa: E402
+
+
+def _timed(fn, repeat: int) -> tuple[float, float]:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return min(times), statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tags", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    tags = [f"tag_{i:06d}" for i in range(args.tags)]
+    rules = {}
+    for i, tag in enumerate(tags):
+        rule = {"issue_type": "threshold", "hysteresis": 0.5}
+        if i % 3 != 1:
+            rule["max"] = 90.0
+        if i % 3 != 0:
+            rule["min"] = 10.0
+        rules[tag] = rule
+    values = rng.uniform(0, 100, args.tags)
+    values[rng.random(args.tags) < 0.01] = np.nan  # bad-quality readings
+    values = values.tolist()
+    shuffled = list(tags)
+    rng.shuffle(shuffled)
+
+    compiled = CompiledRules(rules)
+
+    def evaluate_cold() -> None:
+        compiled._last_tags = None  # force tag -> rule alignment
+        compiled.evaluate(shuffled, values)
+
+    steps = [
+        ("compile", lambda: CompiledRules(rules)),
+        ("evaluate (new tag order)", evaluate_cold),
+        ("evaluate (repeat poll)", lambda: compiled.evaluate(shuffled, values)),
+    ]
+    result = compiled.evaluate(shuffled, values)
+    print(f"{args.tags} tags, {int((result.high | result.low).sum())} breaches, {int(result.cleared.sum())} in band")
+    for name, fn in steps:
+        best, median = _timed(fn, args.repeat)
+        print(f"{name:<28} best {best:8.2f} ms   median {median:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Deterministic synthetic plant data for benchmarks: N plants x M tags x T days of history.
+
+seed() fills readings, scada_readings, current_readings, alerts and log_entries through batched Core
+inserts. The same Scale and seed always produce the same rows, so runs on different commits measure the
+same data. poll_batch() produces the next live poll for a plant (rows for bulk_store_readings).
+
+Values follow a daily sine around each tag's base plus noise; about 1% of samples fall outside the
+synthetic thresholds (alert_thresholds()), so the alert pipeline has breaches to handle.
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from elog.models import LogEntry
+from models_platform import Alert, CurrentReading, Reading, ScadaReading
+
+START = datetime(2026, 1, 1)
+ENTRY_TYPES = ("general", "readings_approved", "wo_created", "alert_log_only")
+ALERT_STATUSES = ("dismissed", "wo_created", "logged_only")
+ALERTS_PER_PLANT_DAY = 20
+ENTRIES_PER_PLANT_DAY = 30
+LOW, HIGH = 10.0, 90.0
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    plants: int
+    tags: int
+    days: int
+    interval_minutes: int = 60  # history sample period per tag
+
+    @property
+    def samples_per_tag(self) -> int:
+        return self.days * 24 * 60 // self.interval_minutes
+
+    @property
+    def history_rows(self) -> int:
+        """Rows per history table (readings, scada_readings)."""
+        return self.plants * self.tags * self.samples_per_tag
+
+
+SCALES = {
+    "small": Scale("small", plants=2, tags=50, days=1),
+    "medium": Scale("medium", plants=4, tags=200, days=3),
+    "large": Scale("large", plants=8, tags=500, days=7),
+}
+
+
+def plant_ids(scale: Scale) -> list[str]:
+    return [f"plant_{p:02d}" for p in range(scale.plants)]
+
+
+def tag_names(scale: Scale) -> list[str]:
+    """Normalized tag names (what readings.tag and the rules use)."""
+    return [f"tag_{t:04d}" for t in range(scale.tags)]
+
+
+def raw_tag_names(scale: Scale) -> list[str]:
+    """Raw SCADA names; the default tag normalization maps them to tag_names()."""
+    return [f"TAG_{t:04d}" for t in range(scale.tags)]
+
+
+def alert_thresholds(scale: Scale) -> dict[str, Any]:
+    """ALERT_THRESHOLDS config covering every synthetic tag."""
+    return {"*": {tag: {"min": LOW, "max": HIGH, "hysteresis": 2.0, "issue_type": "threshold"} for tag in tag_names(scale)}}
+
+
+def _value(rng: random.Random, base: float, minutes: int) -> float:
+    v = base + 25.0 * math.sin(2 * math.pi * minutes / 1440.0) + rng.gauss(0, 4.0)
+    if rng.random() < 0.01:
+        v = HIGH + rng.uniform(1, 10) if rng.random() < 0.5 else LOW - rng.uniform(1, 10)
+    return round(v, 3)
+
+
+def _bases(scale: Scale, seed: int) -> list[float]:
+    rng = random.Random(seed)
+    return [rng.uniform(40.0, 60.0) for _ in range(scale.tags)]
+
+
+def _history(scale: Scale, plant_id: str, plant_no: int, seed: int) -> Iterator[tuple[str, str, float, datetime]]:
+    """(raw_tag, tag, value, ts) for one plant, in time order."""
+    rng = random.Random(seed * 1_000_003 + plant_no)
+    bases = _bases(scale, seed + plant_no)
+    tags, raws = tag_names(scale), raw_tag_names(scale)
+    for s in range(scale.samples_per_tag):
+        minutes = s * scale.interval_minutes
+        ts = START + timedelta(minutes=minutes)
+        for t in range(scale.tags):
+            yield raws[t], tags[t], _value(rng, bases[t], minutes), ts
+
+
+def _flush(db: Session, table, rows: list[dict[str, Any]]) -> int:
+    if rows:
+        db.execute(insert(table), rows)
+    n = len(rows)
+    rows.clear()
+    return n
+
+
+def seed(db: Session, scale: Scale, *, seed: int = 0, chunk_size: int = 5000) -> dict[str, int]:
+    """Insert the scale's history for every plant. Commits. Returns row counts per table."""
+    counts = {"readings": 0, "scada_readings": 0, "current_readings": 0, "alerts": 0, "log_entries": 0}
+    end = START + timedelta(days=scale.days)
+    for plant_no, plant_id in enumerate(plant_ids(scale)):
+        readings, scada, latest = [], [], {}
+        for raw, tag, value, ts in _history(scale, plant_id, plant_no, seed):
+            readings.append({"plant_id": plant_id, "source": "scada", "tag": tag, "value": value, "unit": "", "raw_tag": raw, "created_at": ts})
+            scada.append({"plant_id": plant_id, "timestamp": ts, "tag_name": raw, "value": value, "unit": "", "quality": "good", "created_at": ts})
+            latest[tag] = (value, ts)
+            if len(readings) >= chunk_size:
+                counts["readings"] += _flush(db, Reading.__table__, readings)
+                counts["scada_readings"] += _flush(db, ScadaReading.__table__, scada)
+        counts["readings"] += _flush(db, Reading.__table__, readings)
+        counts["scada_readings"] += _flush(db, ScadaReading.__table__, scada)
+        counts["current_readings"] += _flush(db, CurrentReading.__table__, [
+            {"plant_id": plant_id, "source": "scada", "tag": tag, "value": v, "unit": "", "updated_at": ts}
+            for tag, (v, ts) in latest.items()
+        ])
+
+        rng = random.Random(seed * 7919 + plant_no)
+        tags = tag_names(scale)
+        alerts, entries = [], []
+        for i in range(ALERTS_PER_PLANT_DAY * scale.days):
+            ts = START + timedelta(seconds=rng.uniform(0, (end - START).total_seconds()))
+            tag = tags[i % len(tags)]
+            alerts.append({
+                "plant_id": plant_id, "asset_name": tag, "issue_type": "threshold", "severity": "warning",
+                "message": f"{tag} out of range", "status": ALERT_STATUSES[i % len(ALERT_STATUSES)], "tag": tag,
+                "created_at": ts, "last_seen_at": ts, "resolved_at": ts + timedelta(minutes=30),
+            })
+        for i in range(ENTRIES_PER_PLANT_DAY * scale.days):
+            ts = START + timedelta(seconds=rng.uniform(0, (end - START).total_seconds()))
+            tag = rng.choice(tags)
+            entries.append({
+                "plant_id": plant_id, "operator_id": f"op{i % 6}", "operator_name": f"Operator {i % 6}",
+                "entry_type": ENTRY_TYPES[i % len(ENTRY_TYPES)], "body": f"Checked {tag} during rounds, reading {i}",
+                "created_at": ts, "metadata": {"tag": tag},
+            })
+        counts["alerts"] += _flush(db, Alert.__table__, alerts)
+        counts["log_entries"] += _flush(db, LogEntry.__table__, entries)
+        db.commit()
+    return counts
+
+
+def poll_batch(scale: Scale, plant_no: int, tick: int, *, seed: int = 0) -> list[dict[str, Any]]:
+    """One live poll for a plant (bulk_store_readings rows). Different per tick, same for the same tick."""
+    rng = random.Random((seed * 1_000_003 + plant_no) * 100_003 + tick)
+    bases = _bases(scale, seed + plant_no)
+    now = datetime.utcnow()
+    minutes = (scale.samples_per_tag + tick) * scale.interval_minutes
+    return [
+        {"tag": tag, "raw_tag": raw, "value": _value(rng, bases[t], minutes), "unit": "", "timestamp": now}
+        for t, (tag, raw) in enumerate(zip(tag_names(scale), raw_tag_names(scale)))
+    ]
@@ -0,0 +1,179 @@
+"""
+Query-plan regression check. Seeds an in-memory SQLite DB, runs the real read paths behind each route,
+captures every SELECT they issue and runs EXPLAIN QUERY PLAN on it. Fails (exit 1) if any plan does a
+full table scan or sorts with a temp B-tree.
+
+Run from backend/:  python check_query_plans.py
+"""
+
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker, Session
+
+from auth import CurrentUser
+from elog.models import Base, LogEntry
+from elog.search import ensure_search_index
+from models_platform import Alert, CurrentReading, Reading, ScadaReading, WorkOrderRecord
+
+PLANTS = ["plant_a", "plant_b", "plant_c"]
+TAGS = [f"tag_{i:03d}" for i in range(40)]
+HISTORY = 50  # readings per tag per plant
+
+OPERATOR = CurrentUser(operator_id="op1", operator_name="op1", plant_id="plant_a", role="operator")
+ADMIN = CurrentUser(operator_id="admin1", operator_name="admin1", plant_id="plant_a", role="admin")
+
+
+def _seed(db: Session) -> None:
+    """Enough rows per table that SQLite's planner prefers indexes once ANALYZE has run."""
+    start = datetime(2026, 1, 1)
+    readings, scada, current, alerts, wos, entries = [], [], [], [], [], []
+    for p in PLANTS:
+        for t_i, tag in enumerate(TAGS):
+            for h in range(HISTORY):
+                ts = start + timedelta(minutes=h * 5 + t_i)
+                readings.append({"plant_id": p, "source": "scada", "tag": tag, "value": float(h), "unit": "", "raw_tag": tag, "created_at": ts})
+                scada.append({"plant_id": p, "timestamp": ts, "tag_name": tag, "value": float(h), "created_at": ts})
+            current.append({"plant_id": p, "source": "scada", "tag": tag, "value": 1.0, "updated_at": start})
+        for i in range(300):
+            ts = start + timedelta(hours=i)
+            alerts.append({
+                "plant_id": p, "asset_name": "Pump 3", "issue_type": "vibration", "severity": "warning",
+                "status": ("open", "dismissed", "wo_created", "logged_only")[i % 4], "created_at": ts,
+            })
+            wos.append({"plant_id": p, "external_wo_id": f"WO-{p}-{i}", "created_at": ts})
+            entries.append({
+                "plant_id": p, "operator_id": f"op{i % 5}", "entry_type": ("general", "readings_approved", "wo_created")[i % 3],
+                "body": f"Entry {i}", "created_at": ts,
+            })
+    for model, rows in (
+        (Reading, readings), (ScadaReading, scada), (CurrentReading, current),
+        (Alert, alerts), (WorkOrderRecord, wos), (LogEntry, entries),
+    ):
+        db.execute(insert(model.__table__), rows)
+    db.commit()
+    db.execute(text("ANALYZE"))
+
+
+def _checks() -> list[tuple[str, Callable[[Session], Any]]]:
+    """(name, call) pairs. Each call goes through the same function the route uses."""
+    from backfill import _refresh_totals, checkpointed_chunks
+    from elog.repository import list_entries
+    from elog.search import search_entries
+    from pagination import decode_cursor, encode_cursor
+    from response_cache import UNCACHED
+    from ingestion.service import latest_readings
+    from pipeline.alerts import evaluate_alerts
+    from pipeline.rollups import query_rollups
+    from retention import ARCHIVES, archive_table, query_history
+    from routes_platform import get_shift_summary, list_alerts, list_work_orders
+    from routes_spec import ComplianceExportBody, _export_rows
+    from work_order_outbox import dispatch_due
+
+    export_range = ComplianceExportBody(from_time=datetime(2026, 1, 1), to_time=datetime(2026, 1, 2))
+    page = encode_cursor(datetime(2026, 1, 5), 100)
+
+    return [
+        ("readings/latest (plant)", lambda db: latest_readings(db, "plant_a")),
+        ("readings/latest (admin)", lambda db: latest_readings(db, None)),
+        ("evaluate_alerts", lambda db: evaluate_alerts(db, "plant_a")),
+        ("evaluate_alerts (all plants)", lambda db: evaluate_alerts(db, None)),
+        ("trends/rollups", lambda db: query_rollups(db, "plant_a", "tag_001", datetime(2026, 1, 1), datetime(2026, 1, 2))),
+        ("compliance export (plant, range)", lambda db: list(_export_rows(db, "plant_a", export_range))),
+        ("compliance export (admin, range)", lambda db: list(_export_rows(db, None, export_range))),
+        ("alerts (plant)", lambda db: list_alerts(status=None, limit=50, offset=0, cursor=None, include_total=None, cache=UNCACHED, db=db, current_user=OPERATOR)),
+        ("alerts (plant, status)", lambda db: list_alerts(status="open", limit=50, offset=0, cursor=None, include_total=None, cache=UNCACHED, db=db, current_user=OPERATOR)),
+        ("alerts (admin)", lambda db: list_alerts(status=None, limit=50, offset=0, cursor=None, include_total=None, cache=UNCACHED, db=db, current_user=ADMIN)),
+        ("alerts (admin, status)", lambda db: list_alerts(status="open", limit=50, offset=0, cursor=None, include_total=None, cache=UNCACHED, db=db, current_user=ADMIN)),
+        ("alerts (plant, cursor)", lambda db: list_alerts(
+            status=None, limit=50, offset=0, cursor=page, include_total=None, cache=UNCACHED, db=db, current_user=OPERATOR)),
+        ("alerts (admin, status, cursor)", lambda db: list_alerts(
+            status="open", limit=50, offset=0, cursor=page, include_total=None, cache=UNCACHED, db=db, current_user=ADMIN)),
+        ("work-orders (plant)", lambda db: list_work_orders(limit=50, offset=0, cursor=None, include_total=None, cache=UNCACHED, db=db, current_user=OPERATOR)),
+        ("work-orders (admin)", lambda db: list_work_orders(limit=50, offset=0, cursor=None, include_total=None, cache=UNCACHED, db=db, current_user=ADMIN)),
+        ("work-orders (plant, cursor)", lambda db: list_work_orders(
+            limit=50, offset=0, cursor=page, include_total=None, cache=UNCACHED, db=db, current_user=OPERATOR)),
+        ("work-order outbox dispatch", lambda db: dispatch_due(db)),
+        ("elog entries (plant)", lambda db: list_entries(db, plant_id="plant_a")),
+        ("elog entries (plant, type)", lambda db: list_entries(db, plant_id="plant_a", entry_type="general")),
+        ("elog entries (admin)", lambda db: list_entries(db)),
+        ("elog entries (admin, type)", lambda db: list_entries(db, entry_type="general")),
+        ("elog search (plant)", lambda db: search_entries(db, "entry 42", plant_id="plant_a")),
+        ("elog search (admin, type)", lambda db: search_entries(db, "entry", entry_type="general")),
+        ("elog entries (plant, cursor)", lambda db: list_entries(
+            db, plant_id="plant_a", cursor=decode_cursor(page), include_total=False)),
+        ("shift summary (plant)", lambda db: get_shift_summary(db=db, current_user=OPERATOR)),
+        ("shift summary (admin)", lambda db: get_shift_summary(db=db, current_user=ADMIN)),
+        ("history scada_readings", lambda db: query_history(
+            db, "scada_readings", "plant_a", "tag_001", datetime(2026, 1, 1), datetime(2026, 1, 2))),
+        ("history readings", lambda db: query_history(
+            db, "readings", "plant_a", "tag_001", datetime(2026, 1, 1), datetime(2026, 1, 2), source="scada")),
+        # Cutoff before the seed data: only the oldest-row lookup runs, nothing is archived.
+        ("retention scada_readings", lambda db: archive_table(db, ARCHIVES["scada_readings"], datetime(2025, 1, 1))),
+        ("retention readings", lambda db: archive_table(db, ARCHIVES["readings"], datetime(2025, 1, 1))),
+        ("backfill resume", lambda db: checkpointed_chunks(db, 1)),
+        ("backfill progress", lambda db: _refresh_totals(db, SimpleNamespace(id=1))),
+    ]
+
+
+def _bad_plan_lines(plan: list[str]) -> list[str]:
+    """Plan lines that mean a full scan of a table or a sort the index should have provided."""
+    bad = []
+    for line in plan:
+        if "USE TEMP B-TREE" in line:
+            bad.append(line)
+        elif (
+            line.startswith("SCAN ") and " USING " not in line
+            and not line.startswith("SCAN CONSTANT ROW") and " VIRTUAL TABLE INDEX " not in line  # FTS5 MATCH
+        ):
+            bad.append(line)
+    return bad
+
+
+def run() -> list[tuple[str, str, list[str]]]:
+    """Run every check. Returns failures as (check name, sql, bad plan lines)."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    _seed(db)
+    ensure_search_index(engine)  # also backfills the seeded entries
+
+    captured: list[tuple[str, Any]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    failures = []
+    for name, call in _checks():
+        captured.clear()
+        event.listen(engine, "before_cursor_execute", _capture)
+        try:
+            call(db)
+        finally:
+            event.remove(engine, "before_cursor_execute", _capture)
+        db.rollback()
+        for statement, parameters in captured:
+            raw = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+            plan = [row[3] for row in raw]
+            bad = _bad_plan_lines(plan)
+            if bad:
+                failures.append((name, statement, bad))
+        db.rollback()
+    db.close()
+    return failures
+
+
+def main() -> int:
+    failures = run()
+    for name, statement, bad in failures:
+        print(f"FAIL {name}: {'; '.join(bad)}\n    {' '.join(statement.split())}")
+    print(f"{len(_checks())} checks, {len(failures)} bad plans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
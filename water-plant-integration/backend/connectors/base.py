@@ -4,10 +4,17 @@ Connector base interface. All vendor-specific connectors must implement:
 - fetch_data()
 - normalize()
 - push_data() [where applicable]
+
+Calls to the methods in INSTRUMENTED_CALLS are timed per connector (metrics.connector_call_duration); a call
+that raises or returns a (False, ...) tuple also counts as an error.
 """
 
+import functools
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+from metrics import record_connector_call
 
 # Normalized shapes used across connectors
 ScadaReadingRow = dict[str, Any]  # timestamp, tag_name, value, unit, quality, alarm_state
@@ -15,9 +22,35 @@ AlarmEventRow = dict[str, Any]   # timestamp, tag_name, alarm_state, message, et
 WorkOrderPayload = dict[str, Any]  # asset_id, asset_name, description, priority, source_alarm_id, created_by_system
 
 
+def _instrumented(connector: str, method: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = isinstance(result, tuple) and bool(result) and result[0] is False
+            return result
+        finally:
+            record_connector_call(connector, method, time.perf_counter() - started, failed)
+
+    return wrapper
+
+
 class BaseConnector(ABC):
     """Base for all connectors. Vendor logic lives in subclasses."""
 
+    # Methods that talk to the external system; subclasses add their own (e.g. CMMS create_work_order_once).
+    INSTRUMENTED_CALLS: tuple[str, ...] = ("test_connection", "fetch_data", "push_data")
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        name = cls.__name__.removesuffix("Connector").lower() or cls.__name__
+        for method in cls.INSTRUMENTED_CALLS:
+            fn = cls.__dict__.get(method)
+            if callable(fn) and not getattr(fn, "__isabstractmethod__", False):
+                setattr(cls, method, _instrumented(name, method, fn))
+
     @abstractmethod
     def test_connection(self) -> tuple[bool, Optional[str]]:
         """Returns (success, error_message)."""
@@ -24,8 +24,12 @@ def _stub_create(
     created_by_system: bool,
     scada_snapshot: Optional[dict[str, Any]],
     plant_id: Optional[str],
+    idempotency_key: Optional[str] = None,
 ) -> tuple[bool, Optional[str], Optional[str]]:
-    """Single attempt: call CMMS (stub or real API). Returns (success, wo_id, error)."""
+    """
+    Single attempt: call CMMS (stub or real API). Returns (success, wo_id, error).
+    idempotency_key is for a real CMMS API (send it as Idempotency-Key); the stub ignores it.
+    """
     # For testing: set CMMS_FORCE_FAILURE=1 to simulate failure and verify retry + log
     if os.environ.get("CMMS_FORCE_FAILURE", "").strip() == "1":
         return False, None, "forced failure (CMMS_FORCE_FAILURE=1)"
@@ -91,6 +95,8 @@ def _create_with_retry(
 class CmmsConnector(BaseConnector):
     """REST-based CMMS connector. Implements work order creation, retry + failure logging."""
 
+    INSTRUMENTED_CALLS = BaseConnector.INSTRUMENTED_CALLS + ("create_work_order_once",)
+
     def test_connection(self) -> tuple[bool, Optional[str]]:
         """Test CMMS API reachable. Stub: True. Real: GET health or auth check."""
         return True, None
@@ -115,6 +121,33 @@ class CmmsConnector(BaseConnector):
             return False, err
         return True, None
 
+    def create_work_order_once(
+        self,
+        asset_name: str,
+        description: str,
+        priority: str = "high",
+        assignee_id: Optional[str] = None,
+        asset_id: Optional[str] = None,
+        source_alarm_id: Optional[int] = None,
+        created_by_system: bool = True,
+        scada_snapshot: Optional[dict[str, Any]] = None,
+        plant_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> tuple[bool, Optional[str], Optional[str]]:
+        """Single attempt, no sleeping. Retries/backoff are the caller's job (see work_order_outbox)."""
+        return _stub_create(
+            asset_name=asset_name,
+            description=description,
+            priority=priority,
+            assignee_id=assignee_id,
+            asset_id=asset_id,
+            source_alarm_id=source_alarm_id,
+            created_by_system=created_by_system,
+            scada_snapshot=scada_snapshot,
+            plant_id=plant_id,
+            idempotency_key=idempotency_key,
+        )
+
     def create_work_order(
         self,
         asset_name: str,
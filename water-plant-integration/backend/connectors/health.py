@@ -0,0 +1,117 @@
+"""
+Connector health monitor. Probes every connector's test_connection() concurrently on an interval
+(background task from main.lifespan) and caches the results, so /api/dashboard/systems never waits
+on a slow or unreachable endpoint.
+
+Config (env): CONNECTOR_HEALTH_INTERVAL_SECONDS (default 30).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Optional
+
+from .base import BaseConnector
+from .cmms import cmms_connector
+from .lims import lims_connector
+from .scada import scada_connector
+from .wims import wims_connector
+
+DEFAULT_INTERVAL_SECONDS = 30.0
+
+
+def _interval() -> float:
+    try:
+        value = float(os.environ.get("CONNECTOR_HEALTH_INTERVAL_SECONDS", "").strip() or DEFAULT_INTERVAL_SECONDS)
+    except ValueError:
+        return DEFAULT_INTERVAL_SECONDS
+    return value if value > 0 else DEFAULT_INTERVAL_SECONDS
+
+
+class ConnectorHealthMonitor:
+    """Cached (name -> status) of connector probes. Probes run in parallel threads, never in the request."""
+
+    def __init__(self, connectors: list[tuple[str, BaseConnector]], interval: float) -> None:
+        self.connectors = connectors
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=len(connectors), thread_name_prefix="connector-health")
+        self._lock = threading.Lock()
+        self._status: dict[str, dict[str, Any]] = {
+            name: {
+                "name": name,
+                "connected": False,
+                "last_checked": None,
+                "last_success": None,
+                "latency_ms": None,
+                "error": "not checked yet",
+            }
+            for name, _ in connectors
+        }
+        self._probed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _probe(self, name: str, conn: BaseConnector) -> None:
+        started = time.perf_counter()
+        try:
+            ok, err = conn.test_connection()
+        except Exception as e:  # a broken connector must not take the monitor down
+            ok, err = False, str(e)
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        now = datetime.utcnow()
+        with self._lock:
+            s = self._status[name]
+            s.update(connected=ok, last_checked=now, latency_ms=latency_ms, error=err)
+            if ok:
+                s["last_success"] = now
+
+    def probe_all(self) -> None:
+        """Probe every connector concurrently; returns when all have answered (or timed out themselves)."""
+        futures = [self._executor.submit(self._probe, name, conn) for name, conn in self.connectors]
+        for f in futures:
+            f.result()
+        self._probed = True
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """
+        Cached statuses in connector order. Never probes while the background task runs (statuses read
+        "not checked yet" until its first pass); without it, probes once, concurrently.
+        """
+        running = self._task is not None and not self._task.done()
+        if not self._probed and not running:
+            self.probe_all()
+        with self._lock:
+            return [dict(self._status[name]) for name, _ in self.connectors]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.probe_all)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # keep serving the last cached statuses
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="connector-health")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+connector_health = ConnectorHealthMonitor(
+    [
+        ("SCADA", scada_connector),
+        ("LIMS", lims_connector),
+        ("WIMS", wims_connector),
+        ("CMMS", cmms_connector),
+    ],
+    interval=_interval(),
+)
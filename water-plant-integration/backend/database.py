@@ -1,20 +1,110 @@
-"""Database session and setup. SQLite for dev; swap to Postgres for production."""
+"""
+Database session and setup. SQLite for dev; set DATABASE_URL (e.g. postgresql+psycopg://...) for production.
 
-from sqlalchemy import create_engine
+Config (env):
+- DATABASE_URL: SQLAlchemy URL (default sqlite:///./elog.db).
+- DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_SECONDS, DB_POOL_PRE_PING: connection pool (server databases).
+- SQLITE_MMAP_SIZE, SQLITE_BUSY_TIMEOUT_MS: SQLite pragmas applied on every connection (with WAL, synchronous=NORMAL).
+- SQL_SLOW_QUERY_MS, SQL_N_PLUS_ONE_THRESHOLD, SQL_LOG_REQUEST_QUERIES: opt-in query diagnostics (query_log.py).
+"""
+
+import os
+
+from sqlalchemy import create_engine, event, inspect, Table
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from elog.models import Base
-import models_platform  # noqa: F401 - register ScadaReading, AlarmEvent, Reading, Alert, WorkOrderRecord, AuditLog
+from elog.search import ensure_search_index
+import query_log
+import models_platform  # noqa: F401 - register ScadaReading, ScadaRollup, AlarmEvent, Reading, CurrentReading, Alert, WorkOrderRecord, WorkOrderOutbox, AuditLog, ShiftCounter, BackfillJob, BackfillChunk
 
 # SQLite for zero-config dev. For production use Postgres and set DATABASE_URL.
 SQLITE_URL = "sqlite:///./elog.db"
-engine = create_engine(SQLITE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = os.environ.get("DATABASE_URL", "").strip() or SQLITE_URL
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
+
+
+def _sqlite_pragmas(dbapi_conn, connection_record) -> None:
+    """WAL lets poll writers and dashboard readers run concurrently; NORMAL sync is safe under WAL."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA mmap_size={_env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}")
+    cur.execute(f"PRAGMA busy_timeout={_env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+    cur.close()
+
+
+def make_engine(url: str = DATABASE_URL) -> Engine:
+    """Engine for url. SQLite: pragmas on connect. Others: pool size/overflow/recycle/pre-ping from env."""
+    if url.startswith("sqlite"):
+        eng = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(eng, "connect", _sqlite_pragmas)
+        return eng
+    return create_engine(
+        url,
+        pool_size=_env_int("DB_POOL_SIZE", 10),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 20),
+        pool_recycle=_env_int("DB_POOL_RECYCLE_SECONDS", 1800),
+        pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+    )
+
+
+engine = make_engine()
+query_log.install(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _add_missing_columns() -> None:
+    """create_all never alters existing tables: add new columns that are nullable or have a server default."""
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing or (not col.nullable and col.server_default is None):
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(dialect=engine.dialect)}"
+                if col.server_default is not None:
+                    ddl += f" DEFAULT {col.server_default.arg}"
+                conn.exec_driver_sql(ddl)
+
+
 def init_db() -> None:
-    """Create all tables."""
+    """Create all tables, plus columns and indexes added to existing tables since they were created."""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    ensure_search_index(engine)
+
+
+def dialect_insert(db: Session, table: Table):
+    """INSERT construct with on_conflict_do_update (SQLite/Postgres). None on other dialects: caller falls back."""
+    name = db.get_bind().dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(table)
 
 
 def get_session() -> Session:
@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, String, Text, JSON
+from sqlalchemy import DateTime, Index, String, Text, JSON
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -15,6 +15,12 @@ class LogEntry(Base):
     """Single electronic log entry (operator, timestamp, type, body, metadata)."""
 
     __tablename__ = "log_entries"
+    __table_args__ = (
+        Index("ix_log_entries_plant_created", "plant_id", "created_at"),
+        Index("ix_log_entries_plant_type_created", "plant_id", "entry_type", "created_at"),
+        Index("ix_log_entries_type_created", "entry_type", "created_at"),
+        Index("ix_log_entries_created", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     plant_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
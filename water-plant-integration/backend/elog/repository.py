@@ -3,10 +3,13 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import select, func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from pagination import after_cursor
+
 from .models import LogEntry
+from .search import index_entry
 from .schemas import LogEntryCreate
 
 
@@ -21,6 +24,12 @@ def create_entry(db: Session, payload: LogEntryCreate) -> LogEntry:
         metadata_=payload.metadata,
     )
     db.add(entry)
+    db.flush()
+    index_entry(db, entry)
+    if payload.entry_type == "readings_approved":
+        from shift_counters import bump  # lazy: database imports elog at startup
+
+        bump(db, payload.plant_id, syncs=1)
     db.commit()
     db.refresh(entry)
     return entry
@@ -41,28 +50,33 @@ def list_entries(
     to_time: Optional[datetime] = None,
     limit: int = 50,
     offset: int = 0,
-) -> tuple[list[LogEntry], int]:
-    """List log entries with optional filters. Returns (entries, total_count)."""
-    q = select(LogEntry)
-    count_q = select(func.count()).select_from(LogEntry)
-
+    cursor: Optional[tuple[datetime, int]] = None,
+    include_total: bool = True,
+) -> tuple[list[LogEntry], Optional[int]]:
+    """
+    List log entries with optional filters, newest first. Returns (entries, total_count).
+    cursor (created_at, id) of the last entry seen: keyset page instead of offset.
+    include_total=False skips the COUNT (total is None).
+    """
+    filters = []
     if plant_id is not None:
-        q = q.where(LogEntry.plant_id == plant_id)
-        count_q = count_q.where(LogEntry.plant_id == plant_id)
+        filters.append(LogEntry.plant_id == plant_id)
     if operator_id is not None:
-        q = q.where(LogEntry.operator_id == operator_id)
-        count_q = count_q.where(LogEntry.operator_id == operator_id)
+        filters.append(LogEntry.operator_id == operator_id)
     if entry_type is not None:
-        q = q.where(LogEntry.entry_type == entry_type)
-        count_q = count_q.where(LogEntry.entry_type == entry_type)
+        filters.append(LogEntry.entry_type == entry_type)
     if from_time is not None:
-        q = q.where(LogEntry.created_at >= from_time)
-        count_q = count_q.where(LogEntry.created_at >= from_time)
+        filters.append(LogEntry.created_at >= from_time)
     if to_time is not None:
-        q = q.where(LogEntry.created_at <= to_time)
-        count_q = count_q.where(LogEntry.created_at <= to_time)
+        filters.append(LogEntry.created_at <= to_time)
 
-    total = db.scalar(count_q) or 0
-    q = q.order_by(LogEntry.created_at.desc()).limit(limit).offset(offset)
-    entries = list(db.scalars(q).all())
+    total = None
+    if include_total:
+        total = db.scalar(select(func.count()).select_from(LogEntry).where(*filters)) or 0
+    q = select(LogEntry).where(*filters).order_by(LogEntry.created_at.desc(), LogEntry.id.desc())
+    if cursor is not None:
+        q = q.where(after_cursor(LogEntry.created_at, LogEntry.id, cursor))
+    elif offset:
+        q = q.offset(offset)
+    entries = list(db.scalars(q.limit(limit)).all())
     return entries, total
@@ -8,10 +8,13 @@ from sqlalchemy.orm import Session
 
 from .connector import ENTRY_TYPES
 from .repository import create_entry, get_entry, list_entries
-from .schemas import LogEntryCreate, LogEntryListResponse, LogEntryResponse
+from .schemas import LogEntryCreate, LogEntryListResponse, LogEntryResponse, LogEntrySearchHit, LogEntrySearchResponse
+from .search import search_entries
 
 from database import get_session
 from auth import get_current_user, CurrentUser
+from pagination import decode_cursor, next_cursor, want_total
+from response_cache import ConditionalGet, conditional_get
 
 router = APIRouter(prefix="/elog", tags=["E-Log"])
 
@@ -57,11 +60,20 @@ def list_log_entries(
     to_time: Optional[datetime] = Query(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, max_length=256),
+    include_total: Optional[bool] = Query(None),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
 ):
-    """List log entries with optional filters (plant from auth, operator, type, time range)."""
+    """
+    List log entries with optional filters (plant from auth, operator, type, time range).
+    Pass next_cursor back as cursor for the next page; total is counted on the first page unless include_total is set.
+    """
     plant_id = None if current_user.role == "admin" else current_user.plant_id
+    try:
+        decoded = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     entries, total = list_entries(
         db,
         plant_id=plant_id,
@@ -69,18 +81,49 @@ def list_log_entries(
         entry_type=entry_type,
         from_time=from_time,
         to_time=to_time,
-        limit=limit,
+        limit=limit + 1,
         offset=offset,
+        cursor=decoded,
+        include_total=want_total(include_total, cursor),
     )
     return LogEntryListResponse(
-        entries=[_entry_to_response(e) for e in entries],
+        entries=[_entry_to_response(e) for e in entries[:limit]],
         total=total,
         limit=limit,
         offset=offset,
+        next_cursor=next_cursor(entries, limit),
+    )
+
+
+@router.get("/search", response_model=LogEntrySearchResponse)
+def search_log_entries(
+    q: str = Query(..., min_length=1, max_length=256),
+    entry_type: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    db: Session = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Full-text search over entry body and key metadata (asset, WO number), best match first. Plant from auth."""
+    plant_id = None if current_user.role == "admin" else current_user.plant_id
+    hits = search_entries(db, q, plant_id=plant_id, entry_type=entry_type, limit=limit + 1, offset=offset)
+    return LogEntrySearchResponse(
+        results=[
+            LogEntrySearchHit(entry=_entry_to_response(e), score=score, snippet=snippet)
+            for e, score, snippet in hits[:limit]
+        ],
+        limit=limit,
+        offset=offset,
+        next_offset=offset + limit if len(hits) > limit else None,
     )
 
 
 @router.get("/entry-types")
-def get_entry_types(current_user: CurrentUser = Depends(get_current_user)):
-    """Return standard entry types (for UI dropdowns or validation)."""
-    return {"entry_types": list(ENTRY_TYPES.keys()), "labels": ENTRY_TYPES}
+def get_entry_types(
+    cache: ConditionalGet = Depends(conditional_get("static")),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Return standard entry types (for UI dropdowns or validation). Fixed per process, so clients get 304s."""
+    if (hit := cache.cached()) is not None:
+        return hit
+    return cache.respond({"entry_types": list(ENTRY_TYPES.keys()), "labels": ENTRY_TYPES})
@@ -49,10 +49,28 @@ class LogEntryResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class LogEntrySearchHit(BaseModel):
+    """One search result: the entry, its relevance score (higher = better) and a highlighted snippet."""
+
+    entry: LogEntryResponse
+    score: float
+    snippet: Optional[str] = None
+
+
+class LogEntrySearchResponse(BaseModel):
+    """Ranked search page. Pass next_offset back as offset for the next page (None = last page)."""
+
+    results: list[LogEntrySearchHit]
+    limit: int
+    offset: int
+    next_offset: Optional[int] = None
+
+
 class LogEntryListResponse(BaseModel):
     """Paginated list of log entries."""
 
     entries: list[LogEntryResponse]
-    total: int
+    total: Optional[int] = None  # omitted on cursor pages unless include_total=true
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
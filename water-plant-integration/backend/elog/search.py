@@ -0,0 +1,208 @@
+"""
+E-Log full-text search over LogEntry.body plus selected metadata keys (SEARCH_METADATA_KEYS).
+
+- SQLite: FTS5 table log_entries_fts (rowid = entry id), ranked by bm25.
+- Postgres: log_entries_search (entry_id, tsvector) with a GIN index, ranked by ts_rank.
+- Anything else (or SQLite built without FTS5): unranked LIKE match on body, newest first.
+
+The index is created (and backfilled from existing entries) by ensure_search_index() from init_db, and
+kept in sync by index_entry() in create_entry, in the same transaction as the entry itself.
+"""
+
+import re
+import weakref
+from typing import Any, Optional
+
+from sqlalchemy import Engine, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .models import LogEntry
+
+# Metadata values indexed next to the body (what operators search for besides free text).
+SEARCH_METADATA_KEYS = ("asset_name", "wo_number", "alert_summary", "description", "tag")
+BACKFILL_BATCH = 1000
+SNIPPET_MARK = "**"
+
+# engine -> "fts5" | "tsvector" | "like"
+_backends: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+
+
+def search_text(body: str, metadata: Optional[dict[str, Any]]) -> str:
+    """Text indexed for one entry: body, then the selected metadata values."""
+    parts = [body or ""]
+    for key in SEARCH_METADATA_KEYS:
+        value = (metadata or {}).get(key)
+        if value not in (None, ""):
+            parts.append(str(value))
+    return "\n".join(parts)
+
+
+def _engine(db_or_engine: Any) -> Engine:
+    bind = db_or_engine.get_bind() if isinstance(db_or_engine, Session) else db_or_engine
+    return getattr(bind, "engine", bind)
+
+
+def _backend(db: Session) -> str:
+    engine = _engine(db)
+    backend = _backends.get(engine)
+    if backend is None:
+        backend = _detect(engine)
+        _backends[engine] = backend
+    return backend
+
+
+def _detect(engine: Engine) -> str:
+    name = engine.dialect.name
+    with engine.connect() as conn:
+        if name == "sqlite":
+            found = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'log_entries_fts'")).first()
+            return "fts5" if found else "like"
+        if name == "postgresql":
+            found = conn.execute(text("SELECT to_regclass('log_entries_search')")).scalar()
+            return "tsvector" if found else "like"
+    return "like"
+
+
+def ensure_search_index(engine: Engine) -> str:
+    """Create the search table for this dialect if missing and backfill it. Returns the backend in use."""
+    name = engine.dialect.name
+    created = False
+    with engine.begin() as conn:
+        if name == "sqlite":
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'log_entries_fts'")).first()
+            if not exists:
+                try:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE log_entries_fts USING fts5(content, tokenize = 'unicode61 remove_diacritics 2')"
+                    ))
+                    created = True
+                except OperationalError:  # SQLite built without FTS5
+                    pass
+        elif name == "postgresql":
+            exists = conn.execute(text("SELECT to_regclass('log_entries_search')")).scalar()
+            if not exists:
+                conn.execute(text(
+                    "CREATE TABLE log_entries_search ("
+                    " entry_id INTEGER PRIMARY KEY REFERENCES log_entries(id) ON DELETE CASCADE,"
+                    " document tsvector NOT NULL)"
+                ))
+                conn.execute(text("CREATE INDEX ix_log_entries_search_document ON log_entries_search USING GIN (document)"))
+                created = True
+    if created:
+        _backfill(engine)
+    backend = _backends[engine] = _detect(engine)
+    return backend
+
+
+def _insert_sql(backend: str):
+    if backend == "fts5":
+        return text("INSERT INTO log_entries_fts (rowid, content) VALUES (:id, :content)")
+    return text("INSERT INTO log_entries_search (entry_id, document) VALUES (:id, to_tsvector('english', :content))")
+
+
+def _backfill(engine: Engine) -> None:
+    """Index entries that existed before the search table, in batches."""
+    backend = _detect(engine)
+    if backend == "like":
+        return
+    stmt = _insert_sql(backend)
+    last_id = 0
+    with engine.begin() as conn:
+        while True:
+            rows = conn.execute(
+                select(LogEntry.id, LogEntry.body, LogEntry.metadata_)
+                .where(LogEntry.id > last_id).order_by(LogEntry.id).limit(BACKFILL_BATCH)
+            ).all()
+            if not rows:
+                break
+            conn.execute(stmt, [{"id": i, "content": search_text(body, meta)} for i, body, meta in rows])
+            last_id = rows[-1].id
+
+
+def index_entry(db: Session, entry: LogEntry) -> None:
+    """Add one (flushed) entry to the search index. Caller commits."""
+    backend = _backend(db)
+    if backend == "like":
+        return
+    db.execute(_insert_sql(backend), {"id": entry.id, "content": search_text(entry.body, entry.metadata_)})
+
+
+def fts5_query(query: str) -> Optional[str]:
+    """
+    User text -> safe FTS5 MATCH expression. Each whitespace-separated term becomes a quoted phrase of
+    its word tokens ("WO-1234" -> "wo 1234"), terms are ANDed. None when there is nothing to search.
+    """
+    phrases = []
+    for term in query.split():
+        tokens = re.findall(r"\w+", term.lower())
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"')
+    return " ".join(phrases) or None
+
+
+def search_entries(
+    db: Session,
+    query: str,
+    *,
+    plant_id: Optional[str] = None,
+    entry_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[tuple[LogEntry, float, Optional[str]]]:
+    """
+    Ranked search, best match first: [(entry, score, snippet)]. Higher score = better match
+    (0 on the LIKE fallback, which orders newest first). plant_id None = all plants (admin).
+    """
+    backend = _backend(db)
+    filters, params = [], {"limit": limit, "offset": offset}
+    if plant_id is not None:
+        filters.append("e.plant_id = :plant_id")
+        params["plant_id"] = plant_id
+    if entry_type is not None:
+        filters.append("e.entry_type = :entry_type")
+        params["entry_type"] = entry_type
+    extra = "".join(f" AND {f}" for f in filters)
+
+    if backend == "fts5":
+        params["q"] = fts5_query(query)
+        if params["q"] is None:
+            return []
+        sql = (
+            "SELECT log_entries_fts.rowid AS id, -log_entries_fts.rank AS score,"
+            f" snippet(log_entries_fts, 0, '{SNIPPET_MARK}', '{SNIPPET_MARK}', '…', 16) AS snippet"
+            " FROM log_entries_fts JOIN log_entries e ON e.id = log_entries_fts.rowid"
+            f" WHERE log_entries_fts MATCH :q{extra}"
+            # ORDER BY rank (bm25) is consumed by FTS5 itself, so no separate sort step.
+            " ORDER BY log_entries_fts.rank LIMIT :limit OFFSET :offset"
+        )
+    elif backend == "tsvector":
+        params["q"] = query
+        sql = (
+            "SELECT s.entry_id AS id, ts_rank(s.document, q) AS score,"
+            f" ts_headline('english', e.body, q, 'StartSel={SNIPPET_MARK}, StopSel={SNIPPET_MARK}') AS snippet"
+            " FROM log_entries_search s JOIN log_entries e ON e.id = s.entry_id,"
+            " websearch_to_tsquery('english', :q) q"
+            f" WHERE s.document @@ q{extra}"
+            " ORDER BY score DESC, s.entry_id DESC LIMIT :limit OFFSET :offset"
+        )
+    else:
+        tokens = query.split()
+        if not tokens:
+            return []
+        q = select(LogEntry)
+        for tok in tokens:
+            tok = tok.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            q = q.where(LogEntry.body.ilike(f"%{tok}%", escape="\\"))
+        if plant_id is not None:
+            q = q.where(LogEntry.plant_id == plant_id)
+        if entry_type is not None:
+            q = q.where(LogEntry.entry_type == entry_type)
+        q = q.order_by(LogEntry.created_at.desc(), LogEntry.id.desc()).limit(limit).offset(offset)
+        return [(e, 0.0, None) for e in db.scalars(q)]
+
+    hits = db.execute(text(sql), params).all()
+    if not hits:
+        return []
+    entries = {e.id: e for e in db.scalars(select(LogEntry).where(LogEntry.id.in_([h.id for h in hits])))}
+    return [(entries[h.id], float(h.score), h.snippet) for h in hits if h.id in entries]
@@ -1,5 +1,5 @@
 """Ingestion layer: pull from connectors, normalize, store in readings table."""
 
-from .service import ingest_scada_latest
+from .service import bulk_store_readings, ingest_scada_latest, poll_scada
 
-__all__ = ["ingest_scada_latest"]
+__all__ = ["bulk_store_readings", "ingest_scada_latest", "poll_scada"]
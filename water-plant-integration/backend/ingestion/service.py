@@ -1,36 +1,226 @@
 """Ingestion: pull from SCADA (and later LIMS/WIMS), normalize tag names, store in DB."""
 
+import os
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from connectors.scada import scada_connector
-from models_platform import Reading
+from .tag_normalizer import get_normalizer
+from database import dialect_insert
+from live import live_broadcaster
+from models_platform import CurrentReading, Reading, ScadaReading
+from pipeline.rollups import update_rollups
+from recent_history import recent_history
+from response_cache import data_versions
+
+# Rows per executemany batch. Override with INGEST_CHUNK_SIZE for very large tag lists.
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _chunk_size() -> int:
+    """Configured bulk insert chunk size (INGEST_CHUNK_SIZE env, default 1000)."""
+    try:
+        size = int(os.environ.get("INGEST_CHUNK_SIZE", "").strip() or DEFAULT_CHUNK_SIZE)
+    except ValueError:
+        return DEFAULT_CHUNK_SIZE
+    return size if size > 0 else DEFAULT_CHUNK_SIZE
+
+
+def _insert_chunked(db: Session, table, rows: list[dict[str, Any]], chunk_size: int) -> None:
+    """Core insert (executemany) in chunks of chunk_size. Caller owns the transaction."""
+    stmt = insert(table)
+    for start in range(0, len(rows), chunk_size):
+        db.execute(stmt, rows[start:start + chunk_size])
+
+
+def upsert_current_readings(db: Session, rows: list[dict[str, Any]], chunk_size: int) -> None:
+    """
+    Upsert latest value per (plant_id, source, tag) into current_readings. Rows use the readings
+    column names. Last row per key in the batch wins. Caller owns the transaction.
+    """
+    latest: dict[tuple[str, str, str], dict[str, Any]] = {}
+    for r in rows:
+        key = (r["plant_id"] or "", r["source"], r["tag"])
+        latest[key] = {
+            "plant_id": key[0],
+            "source": r["source"],
+            "tag": r["tag"],
+            "value": r["value"],
+            "unit": r["unit"],
+            "raw_tag": r["raw_tag"],
+            "timestamp": r.get("timestamp"),
+            "updated_at": r["created_at"],
+        }
+    values = list(latest.values())
+    if not values:
+        return
+    table = CurrentReading.__table__
+    ins = dialect_insert(db, table)
+    if ins is not None:
+        stmt = ins.on_conflict_do_update(
+            index_elements=["plant_id", "source", "tag"],
+            set_={c: ins.excluded[c] for c in ("value", "unit", "raw_tag", "timestamp", "updated_at")},
+        )
+        for start in range(0, len(values), chunk_size):
+            db.execute(stmt, values[start:start + chunk_size])
+        return
+    # Other dialects: one select per (plant, source), then update or insert.
+    by_scope: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for v in values:
+        by_scope.setdefault((v["plant_id"], v["source"]), []).append(v)
+    for (plant_id, source), group in by_scope.items():
+        existing = {
+            c.tag: c
+            for c in db.scalars(
+                select(CurrentReading).where(
+                    CurrentReading.plant_id == plant_id,
+                    CurrentReading.source == source,
+                    CurrentReading.tag.in_([v["tag"] for v in group]),
+                )
+            )
+        }
+        for v in group:
+            cur = existing.get(v["tag"])
+            if cur is None:
+                db.add(CurrentReading(**v))
+            else:
+                for k in ("value", "unit", "raw_tag", "timestamp", "updated_at"):
+                    setattr(cur, k, v[k])
+    db.flush()
 
-# Map raw SCADA tags to normalized names (wastewater standard model).
-TAG_MAP = {
-    "FlowRate_Influent_001": "influent_flow",
-    "Chlorine_Effluent_001": "effluent_chlorine",
-    "pH_Effluent_001": "effluent_ph",
-    "Pump3_Vibration": "pump3_vibration",
-    "Pump3_Status": "pump3_status",
-}
+
+def bulk_store_readings(
+    db: Session,
+    plant_id: Optional[str],
+    rows: list[dict[str, Any]],
+    *,
+    source: str = "scada",
+    write_scada_readings: bool = True,
+    chunk_size: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Bulk write normalized rows (tag, raw_tag, value, unit, timestamp, quality, alarm_state)
+    into readings and, optionally, scada_readings (+ rollups); upserts current_readings. Batched Core inserts,
+    one transaction.
+    Returns {"readings_stored", "elapsed_ms", "rows_per_sec"}.
+    """
+    started = time.perf_counter()
+    size = chunk_size or _chunk_size()
+    now = datetime.utcnow()
+    reading_rows = []
+    current_rows = []
+    scada_rows = []
+    rollup_rows = []  # keyed by the normalized tag, like current_readings and alert rules
+    for n in rows:
+        ts = n.get("timestamp") or now
+        value = float(n.get("value", 0))
+        reading_rows.append({
+            "plant_id": plant_id,
+            "source": source,
+            "tag": n.get("tag", ""),
+            "value": value,
+            "unit": n.get("unit"),
+            "raw_tag": n.get("raw_tag"),
+            "created_at": now,
+        })
+        current_rows.append(dict(reading_rows[-1], timestamp=ts))
+        if write_scada_readings:
+            scada_rows.append({
+                "plant_id": plant_id,
+                "timestamp": ts,
+                "tag_name": n.get("raw_tag") or n.get("tag", ""),
+                "value": value,
+                "unit": n.get("unit"),
+                "quality": n.get("quality"),
+                "alarm_state": n.get("alarm_state"),
+                "created_at": now,
+            })
+            rollup_rows.append({"tag_name": n.get("tag", ""), "timestamp": ts, "value": value})
+    try:
+        if scada_rows:
+            _insert_chunked(db, ScadaReading.__table__, scada_rows, size)
+            update_rollups(db, plant_id, rollup_rows, size)
+        if reading_rows:
+            _insert_chunked(db, Reading.__table__, reading_rows, size)
+            upsert_current_readings(db, current_rows, size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if current_rows:
+        recent_history.append_many(plant_id, source, current_rows)
+        data_versions.bump(plant_id, "readings")
+    live_broadcaster.publish_readings(plant_id, current_rows)
+    elapsed = time.perf_counter() - started
+    count = len(reading_rows)
+    return {
+        "readings_stored": count,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "rows_per_sec": round(count / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def latest_readings(db: Session, plant_id: Optional[str], source: str = "scada") -> list[CurrentReading]:
+    """Latest value per tag from current_readings. plant_id None (admin): all plants, newest per tag wins."""
+    q = select(CurrentReading).where(CurrentReading.source == source)
+    if plant_id is not None:
+        return list(db.scalars(q.where(CurrentReading.plant_id == plant_id).order_by(CurrentReading.tag)))
+    by_tag: dict[str, CurrentReading] = {}
+    for c in db.scalars(q.order_by(CurrentReading.tag)):
+        prev = by_tag.get(c.tag)
+        if prev is None or c.updated_at > prev.updated_at:
+            by_tag[c.tag] = c
+    return list(by_tag.values())
+
+
+def normalize_tag(raw_tag: str) -> str:
+    """Map a raw SCADA tag to its normalized name (tag_normalizer rules, else lowercase with underscores)."""
+    return get_normalizer().normalize(raw_tag)
+
+
+def poll_scada(db: Session, plant_id: Optional[str] = None) -> dict[str, Any]:
+    """
+    Poll SCADA: fetch_data → normalize → bulk store ScadaReading + Reading cache. Returns bulk write stats.
+    readings.tag goes through the tag normalizer (as in ingest_scada_latest, so alert rules match);
+    scada_readings keeps the raw tag name.
+    """
+    raw = scada_connector.fetch_data(plant_id=plant_id)
+    normalized = scada_connector.normalize(raw)
+    raw_tags = [n.get("tag_name") or "" for n in normalized]
+    tags = get_normalizer().normalize_many(raw_tags)
+    rows = [
+        {
+            "tag": tag,
+            "raw_tag": raw_tag,
+            "value": n.get("value", 0),
+            "unit": n.get("unit"),
+            "timestamp": n.get("timestamp"),
+            "quality": n.get("quality"),
+            "alarm_state": n.get("alarm_state"),
+        }
+        for n, raw_tag, tag in zip(normalized, raw_tags, tags)
+    ]
+    return bulk_store_readings(db, plant_id, rows)
 
 
 def ingest_scada_latest(db: Session, plant_id: str | None = None) -> int:
     """Pull latest from SCADA, normalize, upsert into readings. Returns count of readings stored."""
-    raw = scada_connector.pull_latest(plant_id)
-    count = 0
-    for r in raw:
-        raw_tag = r.get("raw_tag") or ""
-        tag = TAG_MAP.get(raw_tag, raw_tag.replace(" ", "_").lower())
-        reading = Reading(
-            plant_id=plant_id,
-            source="scada",
-            tag=tag,
-            value=float(r["value"]),
-            unit=r.get("unit"),
-            raw_tag=raw_tag,
-        )
-        db.add(reading)
-        count += 1
-    db.commit()
-    return count
+    raw = scada_connector.fetch_data(plant_id=plant_id)
+    raw_tags = [r.get("raw_tag") or "" for r in raw]
+    tags = get_normalizer().normalize_many(raw_tags)
+    rows = [
+        {
+            "tag": tag,
+            "raw_tag": raw_tag,
+            "value": r["value"],
+            "unit": r.get("unit"),
+            "timestamp": r.get("timestamp"),
+        }
+        for r, raw_tag, tag in zip(raw, raw_tags, tags)
+    ]
+    stats = bulk_store_readings(db, plant_id, rows, write_scada_readings=False)
+    return stats["readings_stored"]
@@ -0,0 +1,175 @@
+"""
+Tag normalization engine: raw historian/SCADA tag -> normalized name.
+
+Rules (first hit wins): exact map, then longest matching prefix, then regex rules in order (all regexes
+compiled into one alternation, so a miss costs one match call), else the default (spaces -> "_",
+lowercase). Results are memoized in a bounded LRU, so a repeated 50k-tag poll is one dict hit per tag.
+
+Rules are read from TAG_RULES (JSON env) or config/tag_rules.json, merged over the built-in exact map:
+    {
+      "exact": {"Pump3_Vibration": "pump3_vibration"},
+      "prefix": {"PLT1.AI.": "plant1_"},             # prefix -> replacement; rest gets the default
+      "regex": [["^FIT_(\\d+)_PV$", "flow_\\1"]]      # [pattern, template], re.expand syntax; lowercased
+    }
+TAG_NORMALIZER_CACHE_SIZE sets the LRU size (default 100000). reload_tag_rules() swaps in a new engine.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+# Map raw SCADA tags to normalized names (wastewater standard model).
+DEFAULT_EXACT = {
+    "FlowRate_Influent_001": "influent_flow",
+    "Chlorine_Effluent_001": "effluent_chlorine",
+    "pH_Effluent_001": "effluent_ph",
+    "Pump3_Vibration": "pump3_vibration",
+    "Pump3_Status": "pump3_status",
+}
+
+DEFAULT_CACHE_SIZE = 100_000
+
+_BACKREF = re.compile(r"\\\d|\(\?P=")
+
+
+def default_normalize(raw_tag: str) -> str:
+    """Fallback when no rule matches: lowercase with underscores."""
+    return raw_tag.replace(" ", "_").lower()
+
+
+def _cache_size() -> int:
+    try:
+        size = int(os.environ.get("TAG_NORMALIZER_CACHE_SIZE", "").strip() or DEFAULT_CACHE_SIZE)
+    except ValueError:
+        return DEFAULT_CACHE_SIZE
+    return size if size > 0 else DEFAULT_CACHE_SIZE
+
+
+def _parse_config(raw: Any) -> dict[str, Any]:
+    """Keep only well-formed rules; invalid regexes are skipped."""
+    out: dict[str, Any] = {"exact": dict(DEFAULT_EXACT), "prefix": {}, "regex": []}
+    if not isinstance(raw, dict):
+        return out
+    exact = raw.get("exact")
+    if isinstance(exact, dict):
+        out["exact"].update({str(k): str(v) for k, v in exact.items() if isinstance(v, str)})
+    prefix = raw.get("prefix")
+    if isinstance(prefix, dict):
+        out["prefix"] = {str(k): str(v) for k, v in prefix.items() if k and isinstance(v, str)}
+    regex = raw.get("regex")
+    if isinstance(regex, list):
+        for item in regex:
+            if isinstance(item, (list, tuple)) and len(item) == 2 and all(isinstance(x, str) for x in item):
+                try:
+                    re.compile(item[0])
+                except re.error:
+                    continue
+                out["regex"].append((item[0], item[1]))
+    return out
+
+
+def load_tag_rules() -> dict[str, Any]:
+    """
+    Resolution order:
+    1. TAG_RULES env (JSON string)
+    2. config/tag_rules.json (if exists)
+    3. DEFAULT_EXACT only
+    """
+    env_val = os.environ.get("TAG_RULES", "").strip()
+    if env_val:
+        try:
+            return _parse_config(json.loads(env_val))
+        except (json.JSONDecodeError, TypeError):
+            pass
+    config_path = Path(__file__).resolve().parent.parent / "config" / "tag_rules.json"
+    if config_path.exists():
+        try:
+            with open(config_path, encoding="utf-8") as f:
+                return _parse_config(json.load(f))
+        except (json.JSONDecodeError, TypeError, OSError):
+            pass
+    return _parse_config(None)
+
+
+class TagNormalizer:
+    """One compiled rule set plus its LRU. Immutable after construction; reload builds a new one."""
+
+    def __init__(self, rules: dict[str, Any], cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.exact: dict[str, str] = rules["exact"]
+        self.prefixes: dict[str, str] = rules["prefix"]
+        # Distinct prefix lengths, longest first: a prefix lookup is one dict probe per length.
+        self._prefix_lengths = sorted({len(p) for p in self.prefixes}, reverse=True)
+        self._regexes = [(re.compile(p), t) for p, t in rules["regex"]]
+        self._combined = self._combine([p for p, _ in rules["regex"]])
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    @staticmethod
+    def _combine(patterns: list[str]) -> "re.Pattern[str] | None":
+        """(?P<_r0>p0)|(?P<_r1>p1)|...; None if there are no regexes or they cannot be combined."""
+        if not patterns or any(_BACKREF.search(p) for p in patterns):
+            return None  # numbered backreferences would point at the wrong group once combined
+        try:
+            return re.compile("|".join(f"(?P<_r{i}>{p})" for i, p in enumerate(patterns)))
+        except re.error:  # e.g. the same named group in two rules: fall back to one match per rule
+            return None
+
+    def _match_regex(self, raw_tag: str) -> "str | None":
+        if self._combined is not None:
+            m = self._combined.match(raw_tag)
+            if m is None:
+                return None
+            # The wrapper group closes last, so lastgroup is the rule that matched.
+            pattern, template = self._regexes[int(m.lastgroup[2:])]
+            return pattern.match(raw_tag).expand(template)
+        for pattern, template in self._regexes:
+            m = pattern.match(raw_tag)
+            if m is not None:
+                return m.expand(template)
+        return None
+
+    def _normalize(self, raw_tag: str) -> str:
+        hit = self.exact.get(raw_tag)
+        if hit is not None:
+            return hit
+        for n in self._prefix_lengths:
+            repl = self.prefixes.get(raw_tag[:n])
+            if repl is not None:
+                return repl + default_normalize(raw_tag[n:])
+        if self._regexes:
+            hit = self._match_regex(raw_tag)
+            if hit is not None:
+                return default_normalize(hit)
+        return default_normalize(raw_tag)
+
+    def normalize_many(self, raw_tags: Iterable[str]) -> list[str]:
+        norm = self.normalize
+        return [norm(t) for t in raw_tags]
+
+    def stats(self) -> dict[str, Any]:
+        info = self.normalize.cache_info()
+        return {
+            "exact_rules": len(self.exact),
+            "prefix_rules": len(self.prefixes),
+            "regex_rules": len(self._regexes),
+            "cache_size": info.currsize,
+            "cache_max": info.maxsize,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+        }
+
+
+_normalizer = TagNormalizer(load_tag_rules(), _cache_size())
+
+
+def get_normalizer() -> TagNormalizer:
+    return _normalizer
+
+
+def reload_tag_rules() -> TagNormalizer:
+    """Re-read TAG_RULES / config/tag_rules.json and swap in a fresh engine (empty cache)."""
+    global _normalizer
+    _normalizer = TagNormalizer(load_tag_rules(), _cache_size())
+    return _normalizer
@@ -0,0 +1,198 @@
+"""
+In-process broadcaster for live dashboard updates, served as Server-Sent Events on GET /api/stream.
+
+Ingestion (bulk_store_readings) and the alert pipeline publish after they commit. Each publish keeps only
+per-plant deltas: readings whose value/unit changed since the last publish for that plant and tag, and
+alerts that were created or changed. The event is serialized once and put on every matching subscriber's
+queue, so N open dashboards cost one publish per change instead of N polls.
+
+Subscribers see their own plant (admins see all plants). Each has a bounded queue; a consumer that falls
+behind is dropped: its queue is replaced by one "resync" event and the stream ends, so the client reloads
+the REST snapshot and reconnects instead of silently missing deltas.
+
+Config (env):
+- LIVE_QUEUE_SIZE: events buffered per client before it is dropped (default 256).
+- LIVE_KEEPALIVE_SECONDS: comment line sent when idle, keeps proxies from closing the stream (default 15).
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+@dataclass(eq=False)
+class Subscriber:
+    """One open stream. plant_id None = all plants (admin)."""
+
+    plant_id: Optional[str]
+    queue: asyncio.Queue
+    dropped: bool = False
+
+
+@dataclass
+class _Stats:
+    published: int = 0
+    delivered: int = 0
+    dropped_subscribers: int = 0
+    unchanged_readings_skipped: int = 0
+
+
+class LiveBroadcaster:
+    """Fan-out of per-plant events to SSE subscribers. publish_* are safe to call from any thread."""
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: set[Subscriber] = set()
+        self._last: dict[tuple[str, str], tuple[float, Optional[str]]] = {}  # (plant, tag) -> (value, unit)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stats = _Stats()
+
+    # ----- lifecycle (event loop thread) -----
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Called from the app lifespan: deliveries are scheduled on this loop."""
+        self._loop = loop
+
+    def unbind_loop(self) -> None:
+        self._loop = None
+        for sub in list(self._subscribers):
+            self._drop(sub)
+
+    def subscribe(self, plant_id: Optional[str]) -> Subscriber:
+        sub = Subscriber(plant_id=plant_id, queue=asyncio.Queue(maxsize=self.queue_size))
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subscribers.discard(sub)
+
+    def stats(self) -> dict[str, Any]:
+        s = self._stats
+        return {
+            "subscribers": len(self._subscribers),
+            "published": s.published,
+            "delivered": s.delivered,
+            "dropped_subscribers": s.dropped_subscribers,
+            "unchanged_readings_skipped": s.unchanged_readings_skipped,
+        }
+
+    # ----- publishing (any thread) -----
+    def publish_readings(self, plant_id: Optional[str], rows: list[dict[str, Any]]) -> None:
+        """Publish the rows whose value or unit changed for (plant, tag). Rows: tag, value, unit, timestamp."""
+        plant_key = plant_id or ""
+        changed = []
+        with self._lock:
+            for r in rows:
+                key = (plant_key, r["tag"])
+                current = (r["value"], r.get("unit"))
+                if self._last.get(key) == current:
+                    continue
+                self._last[key] = current
+                changed.append({"tag": r["tag"], "value": r["value"], "unit": r.get("unit"), "timestamp": r.get("timestamp")})
+            self._stats.unchanged_readings_skipped += len(rows) - len(changed)
+        if changed:
+            self._publish(plant_key, "readings", {"plant_id": plant_id, "readings": changed})
+
+    @property
+    def has_subscribers(self) -> bool:
+        return self._loop is not None and bool(self._subscribers)
+
+    def publish_alerts(self, plant_id: Optional[str], alerts: list[dict[str, Any]]) -> None:
+        """Publish created/changed alerts (alert_event dicts, taken before commit; publish after it)."""
+        if alerts:
+            self._publish(plant_id or "", "alerts", {"plant_id": plant_id, "alerts": alerts})
+
+    def _publish(self, plant_key: str, event: str, data: dict[str, Any]) -> None:
+        loop = self._loop
+        if not self.has_subscribers:
+            return
+        with self._lock:
+            event_id = next(self._ids)
+            self._stats.published += 1
+        message = f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+        try:
+            loop.call_soon_threadsafe(self._deliver, plant_key, message)
+        except RuntimeError:  # loop closed during shutdown
+            pass
+
+    # ----- delivery (event loop thread) -----
+    def _deliver(self, plant_key: str, message: str) -> None:
+        for sub in list(self._subscribers):
+            if sub.dropped or (sub.plant_id is not None and sub.plant_id != plant_key):
+                continue
+            try:
+                sub.queue.put_nowait(message)
+                self._stats.delivered += 1
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def _drop(self, sub: Subscriber) -> None:
+        """Slow consumer: discard its backlog, leave a single resync event, stop delivering to it."""
+        sub.dropped = True
+        self._subscribers.discard(sub)
+        self._stats.dropped_subscribers += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(RESYNC)
+
+
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+def alert_event(a: Any) -> dict[str, Any]:
+    """Alert fields sent to live streams. Build before commit (commit expires the ORM object)."""
+    return {
+        "id": a.id,
+        "asset_name": a.asset_name,
+        "issue_type": a.issue_type,
+        "severity": a.severity,
+        "message": a.message,
+        "status": a.status,
+        "occurrence_count": a.occurrence_count,
+        "last_seen_at": a.last_seen_at,
+        "cleared_at": a.cleared_at,
+        "created_at": a.created_at,
+    }
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def sse_stream(sub: Subscriber, is_disconnected, keepalive: float) -> AsyncIterator[str]:
+    """SSE body for one subscriber. Ends after a resync or when the client goes away."""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(sub.queue.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield message
+            if message is RESYNC:
+                return
+    finally:
+        live_broadcaster.unsubscribe(sub)
+
+
+live_broadcaster = LiveBroadcaster(queue_size=int(_env_number("LIVE_QUEUE_SIZE", 256)))
+keepalive_seconds = _env_number("LIVE_KEEPALIVE_SECONDS", 15)
@@ -1,22 +1,45 @@
 """Water Plant Integration API — E-Log and future connectors."""
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import init_db, get_session
+from database import SessionLocal, engine, init_db, get_session
+from connectors.health import connector_health
 from elog.routes import router as elog_router
+from live import live_broadcaster
+from metrics import MetricsMiddleware, instrument_engine, render as render_metrics
+from pipeline.alert_index import open_alert_index
 from routes_platform import router as platform_router
+from retention import retention_service
 from routes_spec import router as spec_router
+from scheduler import start_scheduler, stop_scheduler
+from work_order_outbox import outbox_dispatcher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    live_broadcaster.bind_loop(asyncio.get_running_loop())
     init_db()
+    db = SessionLocal()
+    try:
+        open_alert_index.rebuild(db)
+    finally:
+        db.close()
+    start_scheduler()
+    connector_health.start()
+    outbox_dispatcher.start()
+    retention_service.start()
     yield
-    # shutdown if needed
+    await retention_service.stop()
+    await outbox_dispatcher.stop()
+    await connector_health.stop()
+    await stop_scheduler()
+    live_broadcaster.unbind_loop()
 
 
 app = FastAPI(
@@ -36,6 +59,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last = outermost: request latency includes CORS and every other middleware.
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
 
 # Mount E-Log and platform (dashboard, morning review, alerts, WO, shift) under /api
 app.include_router(elog_router, prefix="/api")
@@ -46,3 +72,9 @@ app.include_router(spec_router)
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (text format 0.0.4). Like /health it needs no token: restrict it at the proxy."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,293 @@
+"""
+Prometheus metrics, served as text on GET /metrics.
+
+- MetricsMiddleware (raw ASGI): per-route latency histogram with method/route/status labels (route is the
+  template, e.g. /api/alerts/{alert_id}), in-flight requests, and per request the number of SQL statements,
+  time spent in the DB and time spent in connector calls. The rest of a request's time is routing, Python
+  and serialization.
+- instrument_engine(engine): every SQL statement's duration, by verb (SELECT, INSERT, ...).
+- BaseConnector subclasses: latency and errors per connector and method (see connectors/base.py).
+
+Recording does not take a lock. Each thread writes to its own shard (a dict of label tuple -> counts) and
+a scrape sums the shards, so concurrent requests never contend on a bucket. A histogram observation is a
+bisect and two list increments, about a microsecond.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Sequence
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+UNMATCHED_ROUTE = "unmatched"  # 404s etc.: one label, not one series per raw path
+
+
+class _Sharded:
+    """Per-thread dicts of label tuple -> value; only the owning thread writes its shard."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._shards_lock = threading.Lock()  # taken once per thread, when its shard is created
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshot(self) -> list[list[tuple[tuple, Any]]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [list(s.items()) for s in shards]
+
+
+class Counter(_Sharded):
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__()
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def collect(self) -> dict[tuple, float]:
+        total: dict[tuple, float] = {}
+        for items in self._snapshot():
+            for labels, value in items:
+                total[labels] = total.get(labels, 0.0) + value
+        return total
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}")
+        return lines
+
+
+class Histogram(_Sharded):
+    """Per label tuple, a shard holds [count per bucket..., count above last bucket, sum]."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__()
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def collect(self) -> dict[tuple, list]:
+        total: dict[tuple, list] = {}
+        for items in self._snapshot():
+            for labels, counts in items:
+                acc = total.get(labels)
+                if acc is None:
+                    total[labels] = list(counts)
+                else:
+                    for i, c in enumerate(counts):
+                        acc[i] += c
+        return total
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, counts in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le=_num(bound))} {cumulative}")
+            cumulative += counts[-2]
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le='+Inf')} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(counts[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Only changed from the event loop thread (middleware), so a plain dict is enough."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def add(self, amount: float, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, le: Optional[str] = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ----- metrics -----
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests being served.", ("method",))
+http_request_db_statements = Histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request.", ("route",), COUNT_BUCKETS)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request.", ("route",))
+http_request_connector_seconds = Histogram(
+    "http_request_connector_seconds", "Time spent in connector calls per HTTP request.", ("route",))
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds", "SQL statement duration (requests and background jobs).", ("verb",), DB_BUCKETS)
+connector_call_duration = Histogram(
+    "connector_call_duration_seconds", "Connector call latency.", ("connector", "method"))
+connector_call_errors = Counter(
+    "connector_call_errors_total", "Connector calls that raised or returned a failure.", ("connector", "method"))
+
+REGISTRY = (
+    http_request_duration, http_in_flight, http_request_db_statements, http_request_db_seconds,
+    http_request_connector_seconds, db_statement_duration, connector_call_duration, connector_call_errors,
+)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ----- per-request context -----
+@dataclass
+class RequestStats:
+    """Totals for the current HTTP request; shared by the DB and connector hooks through request_stats."""
+
+    method: str
+    path: str
+    scope: dict = field(default_factory=dict, repr=False)
+    db_statements: int = 0
+    db_seconds: float = 0.0
+    connector_seconds: float = 0.0
+    statement_shapes: dict[str, int] = field(default_factory=dict, repr=False)  # filled by query_log when enabled
+
+    @property
+    def route(self) -> str:
+        """Route template once routing has run (e.g. inside the handler), else the raw path."""
+        return getattr(self.scope.get("route"), "path", None) or self.path
+
+
+# Set by MetricsMiddleware for the duration of a request. Copied into the threadpool that runs sync
+# routes, so hooks on that thread update the same RequestStats. None outside requests (background jobs).
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+# Called with the finished request's RequestStats (e.g. query_log's per-request summary).
+request_end_hooks: list[Callable[[RequestStats], None]] = []
+
+
+def record_connector_call(connector: str, method: str, seconds: float, failed: bool) -> None:
+    connector_call_duration.observe(seconds, connector, method)
+    if failed:
+        connector_call_errors.inc(connector, method)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.connector_seconds += seconds
+
+
+# ----- SQLAlchemy -----
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.get("metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    db_statement_duration.observe(elapsed, _verb(statement))
+    stats = request_stats.get()
+    if stats is not None:
+        stats.db_statements += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(context) -> None:
+    """Failed statements never reach after_cursor_execute: drop their start time."""
+    conn = context.connection
+    if conn is not None:
+        started = conn.info.get("metrics_started")
+        if started:
+            started.pop()
+
+
+def _verb(statement: str) -> str:
+    head = statement.lstrip()[:16].split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on engine (idempotent)."""
+    from sqlalchemy import event
+
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ----- ASGI middleware -----
+class MetricsMiddleware:
+    """Raw ASGI (no BaseHTTPMiddleware), so streaming responses pass through untouched."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats(method=method, path=scope["path"], scope=scope)
+        token = request_stats.set(stats)
+        http_in_flight.add(1, method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.add(-1, method)
+            request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            http_request_duration.observe(elapsed, method, route, str(status))
+            http_request_db_statements.observe(stats.db_statements, route)
+            http_request_db_seconds.observe(stats.db_seconds, route)
+            http_request_connector_seconds.observe(stats.connector_seconds, route)
+            for hook in request_end_hooks:
+                hook(stats)
@@ -5,7 +5,7 @@ Spec: ScadaReading (timestamp, tag_name, value, unit, quality, alarm_state), Ala
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, String, Text, JSON, ForeignKey
+from sqlalchemy import BigInteger, DateTime, Float, String, Text, JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from elog.models import Base
@@ -16,6 +16,10 @@ class ScadaReading(Base):
     """Normalized SCADA reading: timestamp, tag_name, value, unit, quality, alarm_state (optional)."""
 
     __tablename__ = "scada_readings"
+    __table_args__ = (
+        Index("ix_scada_readings_plant_tag_timestamp", "plant_id", "tag_name", "timestamp"),
+        Index("ix_scada_readings_timestamp", "timestamp"),  # retention: oldest row, per-day range moves
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     plant_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
@@ -28,6 +32,33 @@ class ScadaReading(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
+# ----- ScadaRollup: per (plant, tag, resolution, bucket) aggregates, maintained on ingest -----
+class ScadaRollup(Base):
+    """
+    Aggregates of ScadaReading per time bucket (1m, 15m, 1h, 1d): count, sum, min, max, first, last.
+    tag_name is the normalized tag (readings.tag), the name dashboards and alert rules use.
+    """
+
+    __tablename__ = "scada_rollups"
+    __table_args__ = (
+        UniqueConstraint("plant_id", "tag_name", "resolution", "bucket_start", name="uq_scada_rollups_bucket"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    plant_id: Mapped[str] = mapped_column(String(64), nullable=False, default="")  # "" when no plant
+    tag_name: Mapped[str] = mapped_column(String(128), nullable=False)
+    resolution: Mapped[str] = mapped_column(String(8), nullable=False)  # 1m, 15m, 1h, 1d
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    count: Mapped[int] = mapped_column(nullable=False, default=0)
+    sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    min: Mapped[float] = mapped_column(Float, nullable=False)
+    max: Mapped[float] = mapped_column(Float, nullable=False)
+    first_value: Mapped[float] = mapped_column(Float, nullable=False)
+    first_ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_value: Mapped[float] = mapped_column(Float, nullable=False)
+    last_ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
 # ----- AlarmEvent: from SCADA tags or historian events -----
 class AlarmEvent(Base):
     """Alarm event from SCADA (tag or historian)."""
@@ -46,9 +77,15 @@ class AlarmEvent(Base):
 
 # ----- Backwards compatibility: Reading (ingestion cache) -----
 class Reading(Base):
-    """Latest/cached readings from SCADA (and later LIMS/WIMS). Ingestion layer writes here."""
+    """Reading history from SCADA (and later LIMS/WIMS). Ingestion layer writes here; latest per tag is in CurrentReading."""
 
     __tablename__ = "readings"
+    __table_args__ = (
+        Index("ix_readings_plant_source_created", "plant_id", "source", "created_at"),
+        Index("ix_readings_plant_source_tag_created", "plant_id", "source", "tag", "created_at"),
+        Index("ix_readings_source_created", "source", "created_at"),  # admin export across plants
+        Index("ix_readings_created", "created_at"),  # retention: oldest row, per-day range moves
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     plant_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
@@ -60,6 +97,28 @@ class Reading(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
+# ----- CurrentReading: latest value per (plant, source, tag), upserted on ingest -----
+class CurrentReading(Base):
+    """Latest value per tag. One row per (plant_id, source, tag); dashboard and exports read this, not history."""
+
+    __tablename__ = "current_readings"
+    __table_args__ = (
+        UniqueConstraint("plant_id", "source", "tag", name="uq_current_readings_plant_source_tag"),
+        Index("ix_current_readings_source_tag", "source", "tag"),  # admin view across plants
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # "" when ingested without a plant (NULLs never conflict in a unique key).
+    plant_id: Mapped[str] = mapped_column(String(64), nullable=False, default="")
+    source: Mapped[str] = mapped_column(String(32), nullable=False)
+    tag: Mapped[str] = mapped_column(String(128), nullable=False)
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+    unit: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    raw_tag: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    timestamp: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # source time
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
 # ----- Audit log: every submitted value (compliance + approvals) -----
 class AuditLog(Base):
     """Audit log for compliance and approvals. All actions logged."""
@@ -79,6 +138,12 @@ class Alert(Base):
     """Alerts generated from pipeline (e.g. SCADA threshold exceeded)."""
 
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_plant_created", "plant_id", "created_at"),
+        Index("ix_alerts_plant_status_created", "plant_id", "status", "created_at"),
+        Index("ix_alerts_status_created", "status", "created_at"),
+        Index("ix_alerts_created", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     plant_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
@@ -88,6 +153,10 @@ class Alert(Base):
     message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     scada_snapshot: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="open")  # open, wo_created, logged_only, dismissed
+    tag: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)  # rule tag that raised it (dedupe key)
+    occurrence_count: Mapped[int] = mapped_column(nullable=False, default=1, server_default="1")  # breaches folded in
+    last_seen_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    cleared_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # value back in band
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
@@ -96,6 +165,10 @@ class WorkOrderRecord(Base):
     """Audit record when we create a work order in CMMS (e.g. Fiix)."""
 
     __tablename__ = "work_order_records"
+    __table_args__ = (
+        Index("ix_work_order_records_plant_created", "plant_id", "created_at"),
+        Index("ix_work_order_records_created", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     alert_id: Mapped[Optional[int]] = mapped_column(ForeignKey("alerts.id"), nullable=True, index=True)
@@ -103,3 +176,85 @@ class WorkOrderRecord(Base):
     external_wo_id: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)  # Fiix WO number
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     payload_sent: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
+
+class WorkOrderOutbox(Base):
+    """Pending CMMS work order. The API enqueues here; a background dispatcher sends it with retries."""
+
+    __tablename__ = "work_order_outbox"
+    __table_args__ = (
+        Index("ix_work_order_outbox_status_next", "status", "next_attempt_at"),
+        Index("uq_work_order_outbox_plant_key", "plant_id", "idempotency_key", unique=True),  # keys are per plant
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    idempotency_key: Mapped[str] = mapped_column(String(128), nullable=False)  # also passed to the CMMS connector
+    alert_id: Mapped[Optional[int]] = mapped_column(ForeignKey("alerts.id"), nullable=True, index=True)
+    plant_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="pending")  # pending, in_flight, sent, failed
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    external_wo_id: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    work_order_record_id: Mapped[Optional[int]] = mapped_column(ForeignKey("work_order_records.id"), nullable=True)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # WO fields + requesting operator
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+# ----- ShiftCounter: per (plant, shift) handoff counts, incremented on write -----
+class ShiftCounter(Base):
+    """Shift summary counts for one plant and shift window. Bumped in the same transaction as the event."""
+
+    __tablename__ = "shift_counters"
+    __table_args__ = (
+        UniqueConstraint("plant_id", "shift_start", name="uq_shift_counters_plant_shift"),
+        Index("ix_shift_counters_shift_start", "shift_start"),  # admin: all plants for one shift
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    plant_id: Mapped[str] = mapped_column(String(64), nullable=False, default="")  # "" = no plant
+    shift_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    syncs: Mapped[int] = mapped_column(nullable=False, default=0)
+    alerts_handled: Mapped[int] = mapped_column(nullable=False, default=0)
+    work_orders_created: Mapped[int] = mapped_column(nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+# ----- Backfill: historian CSV imports, resumable per chunk -----
+class BackfillJob(Base):
+    """One historian file import. Chunks are planned by byte offset; progress lives in backfill_chunks."""
+
+    __tablename__ = "backfill_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    plant_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    path: Mapped[str] = mapped_column(Text, nullable=False)
+    file_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    chunk_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)  # kept so a resume plans the same chunks
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="pending")  # pending, running, completed, failed
+    chunks_total: Mapped[int] = mapped_column(nullable=False, default=0)
+    chunks_done: Mapped[int] = mapped_column(nullable=False, default=0)
+    rows_loaded: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    rows_skipped: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    rows_per_sec: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # last run
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class BackfillChunk(Base):
+    """Checkpoint: written in the same transaction as the chunk's rows, so a chunk is loaded exactly once."""
+
+    __tablename__ = "backfill_chunks"
+    __table_args__ = (UniqueConstraint("job_id", "chunk_no", name="uq_backfill_chunks_job_chunk"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey("backfill_jobs.id"), nullable=False)
+    chunk_no: Mapped[int] = mapped_column(nullable=False)
+    start_offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    end_offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    rows_loaded: Mapped[int] = mapped_column(nullable=False, default=0)
+    rows_skipped: Mapped[int] = mapped_column(nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -0,0 +1,68 @@
+"""
+In-memory index of open alerts: (plant_id, tag, issue_type) -> alert id. Lets evaluate_alerts fold a
+repeated breach into the alert already open for it (one PK lookup) instead of inserting a new row.
+
+Rebuilt from the DB at startup (main.lifespan), and lazily on first use otherwise. Entries can go stale
+when an operator dismisses or raises a WO for an alert; callers verify the row via PK on a hit.
+"""
+
+import threading
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models_platform import Alert
+
+AlertKey = tuple[str, str, str]
+
+
+class OpenAlertIndex:
+    """Thread-safe (plant, tag, issue_type) -> open alert id map."""
+
+    def __init__(self) -> None:
+        self._ids: dict[AlertKey, int] = {}
+        self._lock = threading.Lock()
+        self._built = False
+
+    def rebuild(self, db: Session) -> int:
+        """Reload from alerts that are still open and not cleared. Returns number indexed."""
+        rows = db.execute(
+            select(Alert.id, Alert.plant_id, Alert.tag, Alert.issue_type)
+            .where(Alert.status == "open", Alert.cleared_at.is_(None), Alert.tag.is_not(None))
+            .order_by(Alert.created_at)
+        ).all()
+        # Oldest first, so if duplicates predate the index the newest wins.
+        ids = {(plant_id or "", tag, issue_type): alert_id for alert_id, plant_id, tag, issue_type in rows}
+        with self._lock:
+            self._ids = ids
+            self._built = True
+        return len(ids)
+
+    def ensure_built(self, db: Session) -> None:
+        if not self._built:
+            self.rebuild(db)
+
+    def get(self, key: AlertKey) -> Optional[int]:
+        with self._lock:
+            return self._ids.get(key)
+
+    def put(self, key: AlertKey, alert_id: int) -> None:
+        with self._lock:
+            self._ids[key] = alert_id
+
+    def discard(self, key: AlertKey) -> None:
+        with self._lock:
+            self._ids.pop(key, None)
+
+    def keys_for(self, plant_id: str) -> list[tuple[str, str]]:
+        """(tag, issue_type) of the indexed alerts for one plant."""
+        with self._lock:
+            return [(tag, issue) for plant, tag, issue in self._ids if plant == plant_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+
+open_alert_index = OpenAlertIndex()
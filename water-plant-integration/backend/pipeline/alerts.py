@@ -1,56 +1,181 @@
-"""Simple alert rules: e.g. vibration > threshold. Runs after ingestion."""
+"""Threshold alerts: e.g. vibration > threshold. Runs after ingestion."""
 
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from models_platform import Reading, Alert
+from models_platform import CurrentReading, Alert
+from live import alert_event, live_broadcaster
+from response_cache import data_versions
+from .alert_index import open_alert_index
+from .rules import rule_engine
+
+# Above this many rule tags, read all changed current readings and let the engine drop unknown tags
+# instead of sending a huge IN list.
+IN_FILTER_MAX_TAGS = 500
+
+
+def _overlap() -> timedelta:
+    """ALERT_WATERMARK_OVERLAP_SECONDS (default 60): how far below the watermark each evaluation re-reads."""
+    try:
+        seconds = float(os.environ.get("ALERT_WATERMARK_OVERLAP_SECONDS", "").strip() or 60)
+    except ValueError:
+        seconds = 60
+    return timedelta(seconds=max(seconds, 0))
+
 
-# Thresholds (MVP: hardcoded; later from config per plant).
-THRESHOLDS = {
-    "pump3_vibration": {"max": 0.8, "unit": "in/s", "issue_type": "vibration", "severity": "warning"},
-    "effluent_chlorine": {"min": 0.5, "max": 4.0, "unit": "ppm", "issue_type": "chlorine", "severity": "warning"},
-}
+@dataclass
+class _Cursor:
+    """
+    Per-plant read position in current_readings. updated_at is stamped before the ingest commits, so a
+    slow ingest can commit rows older than the watermark: each read starts `overlap` below it, and
+    `seen` (tag -> updated_at already evaluated) drops rows read before, so occurrence counts stay right.
+    """
+
+    generation: int
+    watermark: datetime | None = None
+    seen: dict[str, datetime] = field(default_factory=dict)
+
+
+_cursors: dict[str, _Cursor] = {}
+_cursors_lock = threading.Lock()
 
 
 def evaluate_alerts(db: Session, plant_id: str | None = None) -> list[int]:
-    """Evaluate latest readings and create alerts if thresholds exceeded. Returns list of new alert IDs."""
-    q = db.query(Reading).filter(Reading.source == "scada")
-    if plant_id:
-        q = q.filter(Reading.plant_id == plant_id)
-    rows = q.order_by(Reading.created_at.desc()).all()
-    by_tag = {}
-    for r in rows:
-        if r.tag not in by_tag:
-            by_tag[r.tag] = r
+    """
+    Evaluate latest readings and create alerts if thresholds exceeded. Returns list of new alert IDs.
+    plant_id None evaluates every plant with SCADA readings, each with its own cursor and commit.
+    """
+    if plant_id is not None:
+        return _evaluate_plant(db, plant_id)
+    plant_keys = db.scalars(
+        select(CurrentReading.plant_id).where(CurrentReading.source == "scada").distinct().order_by(CurrentReading.plant_id)
+    ).all()
+    # "" is how current_readings stores a missing plant id; its alerts keep plant_id None.
+    return [alert_id for key in plant_keys for alert_id in _evaluate_plant(db, key or None)]
+
+
+def _evaluate_plant(db: Session, plant_id: str | None) -> list[int]:
+    """
+    One plant (None: readings stored without a plant id), with that plant's rules and cursor.
+    Thresholds come from the rule engine (pipeline.rules, per plant) and are checked for the whole batch
+    in one vectorized pass. A breach with an alert already open for (plant, tag, issue_type) updates that
+    alert's snapshot and occurrence_count instead of adding a row; a rule's hysteresis band clears it.
+    Only tags whose current value changed since the plant's last evaluation are read
+    (current_readings, one row per tag), so cost tracks new readings, not history size. After a rules
+    reload every current value is evaluated again.
+    """
+    plant_key = plant_id or ""
+    generation = rule_engine.generation
+    rules = rule_engine.for_plant(plant_id)
+    if not len(rules):
+        return []
+    overlap = _overlap()
+    with _cursors_lock:
+        cursor = _cursors.get(plant_key)
+        if cursor is None or cursor.generation != generation:
+            cursor = _cursors[plant_key] = _Cursor(generation)
+        watermark = cursor.watermark
+    q = select(CurrentReading.tag, CurrentReading.value, CurrentReading.unit, CurrentReading.updated_at).where(
+        CurrentReading.plant_id == plant_key,
+        CurrentReading.source == "scada",
+    )
+    if len(rules) <= IN_FILTER_MAX_TAGS:
+        q = q.where(CurrentReading.tag.in_(rules.tags))
+    if watermark is not None:
+        q = q.where(CurrentReading.updated_at >= watermark - overlap)
+    rows = db.execute(q).all()
+    with _cursors_lock:
+        batch = [r for r in rows if cursor.seen.get(r.tag) != r.updated_at]
+        for r in batch:
+            cursor.seen[r.tag] = r.updated_at
+        if rows:
+            newest = max(r.updated_at for r in rows)
+            if cursor.watermark is None or newest > cursor.watermark:
+                cursor.watermark = newest
+                floor = newest - overlap
+                cursor.seen = {t: u for t, u in cursor.seen.items() if u >= floor}
+    if not batch:
+        return []
+    tags = [r.tag for r in batch]
+    result = rules.evaluate(tags, [r.value for r in batch])
+    open_alert_index.ensure_built(db)
+    now = datetime.utcnow()
+
+    changed: list[Alert] = []  # created, updated or cleared: published to live streams after commit
+    # Clears: only tags that have an open alert, so this loop is bounded by open alerts, not batch size.
+    for tag, issue_type in open_alert_index.keys_for(plant_key):
+        i = rules.tag_ids.get(tag)
+        if i is None or rules.rule(i).get("issue_type", "threshold") != issue_type:
+            continue
+        pos = np.flatnonzero(result.rule_idx == i)
+        if pos.size and result.cleared[pos[-1]]:
+            cleared = _clear(db, (plant_key, tag, issue_type), now)
+            if cleared is not None:
+                changed.append(cleared)
+
     new_ids = []
-    for tag, cfg in THRESHOLDS.items():
-        r = by_tag.get(tag)
-        if not r:
+    for pos in np.flatnonzero(result.high | result.low):
+        i = int(result.rule_idx[pos])
+        r, cfg = batch[pos], rules.rule(i)
+        key = (plant_key, r.tag, cfg.get("issue_type", "threshold"))
+        asset_name, message = rules.breach_text(i, r.value, bool(result.high[pos]))
+        snapshot = {"tag": r.tag, "value": r.value, "unit": r.unit}
+        alert = _open_alert(db, key)
+        if alert is not None:
+            alert.occurrence_count += 1
+            alert.last_seen_at = now
+            alert.message = message
+            alert.scada_snapshot = snapshot
+            changed.append(alert)
             continue
-        if "max" in cfg and r.value > cfg["max"]:
-            alert = Alert(
-                plant_id=plant_id,
-                asset_name=tag.split("_")[0].capitalize() + " " + tag.split("_")[1] if "_" in tag else tag,
-                issue_type=cfg["issue_type"],
-                severity=cfg.get("severity", "warning"),
-                message=f"{tag} = {r.value} {cfg.get('unit', '')} (max {cfg['max']})",
-                scada_snapshot={"tag": tag, "value": r.value, "unit": r.unit},
-                status="open",
-            )
-            db.add(alert)
-            db.flush()
-            new_ids.append(alert.id)
-        elif "min" in cfg and r.value < cfg["min"]:
-            alert = Alert(
-                plant_id=plant_id,
-                asset_name="Effluent",
-                issue_type=cfg["issue_type"],
-                severity=cfg.get("severity", "warning"),
-                message=f"{tag} = {r.value} (min {cfg['min']})",
-                scada_snapshot={"tag": tag, "value": r.value, "unit": r.unit},
-                status="open",
-            )
-            db.add(alert)
-            db.flush()
-            new_ids.append(alert.id)
+        alert = Alert(
+            plant_id=plant_id,
+            asset_name=asset_name,
+            issue_type=key[2],
+            severity=cfg.get("severity", "warning"),
+            message=message,
+            scada_snapshot=snapshot,
+            status="open",
+            tag=r.tag,
+            occurrence_count=1,
+            last_seen_at=now,
+        )
+        db.add(alert)
+        db.flush()
+        open_alert_index.put(key, alert.id)
+        new_ids.append(alert.id)
+        changed.append(alert)
+    db.flush()
+    events = [alert_event(a) for a in changed] if live_broadcaster.has_subscribers else []
     db.commit()
+    if changed:
+        data_versions.bump(plant_id, "alerts")
+    live_broadcaster.publish_alerts(plant_id, events)
     return new_ids
+
+
+def _open_alert(db: Session, key: tuple[str, str, str]) -> Alert | None:
+    """Indexed alert for key if it is still open and not cleared (verified by PK); drops stale entries."""
+    alert_id = open_alert_index.get(key)
+    if alert_id is None:
+        return None
+    alert = db.get(Alert, alert_id)
+    if alert is None or alert.status != "open" or alert.cleared_at is not None:
+        open_alert_index.discard(key)
+        return None
+    return alert
+
+
+def _clear(db: Session, key: tuple[str, str, str], now: datetime) -> Alert | None:
+    """Value back in band: stamp cleared_at; the next breach opens a new alert. Returns the cleared alert."""
+    alert = _open_alert(db, key)
+    if alert is not None:
+        alert.cleared_at = now
+        open_alert_index.discard(key)
+    return alert
@@ -0,0 +1,176 @@
+"""
+SCADA rollups: min/max/avg/count/first/last per (plant, tag, bucket) at 1m, 15m, 1h and 1d.
+Maintained incrementally from each ingested batch; trend queries read the coarsest resolution
+that still fits the requested range into the point budget, instead of aggregating raw rows.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models_platform import ScadaRollup
+
+# Resolution name -> bucket width in seconds, finest first.
+RESOLUTIONS: dict[str, int] = {
+    "1m": 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+DEFAULT_MAX_POINTS = 500
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def naive_utc(ts: datetime) -> datetime:
+    """Readings are stored as naive UTC; convert aware timestamps so buckets line up."""
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def bucket_start(ts: datetime, seconds: int) -> datetime:
+    """Start of the bucket of width `seconds` containing ts (aligned to the UTC epoch)."""
+    ts = naive_utc(ts)
+    offset = int((ts - _EPOCH).total_seconds()) // seconds * seconds
+    return _EPOCH + timedelta(seconds=offset)
+
+
+def _aggregate(plant_id: str, rows: list[dict[str, Any]]) -> dict[tuple, dict[str, Any]]:
+    """Fold a batch of rows (tag_name, timestamp, value) into one partial aggregate per bucket."""
+    out: dict[tuple, dict[str, Any]] = {}
+    for r in rows:
+        ts = naive_utc(r["timestamp"])
+        value = float(r["value"])
+        for resolution, seconds in RESOLUTIONS.items():
+            start = bucket_start(ts, seconds)
+            key = (plant_id, r["tag_name"], resolution, start)
+            agg = out.get(key)
+            if agg is None:
+                out[key] = {
+                    "plant_id": plant_id,
+                    "tag_name": r["tag_name"],
+                    "resolution": resolution,
+                    "bucket_start": start,
+                    "count": 1,
+                    "sum": value,
+                    "min": value,
+                    "max": value,
+                    "first_value": value,
+                    "first_ts": ts,
+                    "last_value": value,
+                    "last_ts": ts,
+                }
+                continue
+            agg["count"] += 1
+            agg["sum"] += value
+            agg["min"] = min(agg["min"], value)
+            agg["max"] = max(agg["max"], value)
+            if ts < agg["first_ts"]:
+                agg["first_value"], agg["first_ts"] = value, ts
+            if ts >= agg["last_ts"]:
+                agg["last_value"], agg["last_ts"] = value, ts
+    return out
+
+
+def _merge_into(existing: ScadaRollup, agg: dict[str, Any]) -> None:
+    """Merge a partial aggregate into an existing rollup row (fallback path)."""
+    existing.count += agg["count"]
+    existing.sum += agg["sum"]
+    existing.min = min(existing.min, agg["min"])
+    existing.max = max(existing.max, agg["max"])
+    if agg["first_ts"] < existing.first_ts:
+        existing.first_value, existing.first_ts = agg["first_value"], agg["first_ts"]
+    if agg["last_ts"] >= existing.last_ts:
+        existing.last_value, existing.last_ts = agg["last_value"], agg["last_ts"]
+
+
+def update_rollups(db: Session, plant_id: Optional[str], rows: list[dict[str, Any]], chunk_size: int = 1000) -> int:
+    """
+    Merge a batch of rows (tag_name = normalized tag, timestamp, value) into every rollup resolution.
+    Caller owns the transaction. Returns number of bucket rows touched.
+    """
+    by_key = _aggregate(plant_id or "", [r for r in rows if r.get("timestamp") is not None])
+    # Key order, so concurrent writers (backfill workers) take bucket row locks in the same order.
+    aggs = [by_key[k] for k in sorted(by_key)]
+    if not aggs:
+        return 0
+    table = ScadaRollup.__table__
+    ins = dialect_insert(db, table)
+    if ins is not None:
+        ex, cur = ins.excluded, table.c
+        stmt = ins.on_conflict_do_update(
+            index_elements=["plant_id", "tag_name", "resolution", "bucket_start"],
+            set_={
+                "count": cur.count + ex.count,
+                "sum": cur.sum + ex.sum,
+                "min": case((ex.min < cur.min, ex.min), else_=cur.min),
+                "max": case((ex.max > cur.max, ex.max), else_=cur.max),
+                "first_value": case((ex.first_ts < cur.first_ts, ex.first_value), else_=cur.first_value),
+                "first_ts": case((ex.first_ts < cur.first_ts, ex.first_ts), else_=cur.first_ts),
+                "last_value": case((ex.last_ts >= cur.last_ts, ex.last_value), else_=cur.last_value),
+                "last_ts": case((ex.last_ts >= cur.last_ts, ex.last_ts), else_=cur.last_ts),
+            },
+        )
+        for start in range(0, len(aggs), chunk_size):
+            db.execute(stmt, aggs[start:start + chunk_size])
+        return len(aggs)
+    # Other dialects: read-merge-write per bucket.
+    for agg in aggs:
+        existing = db.scalars(
+            select(ScadaRollup).where(
+                ScadaRollup.plant_id == agg["plant_id"],
+                ScadaRollup.tag_name == agg["tag_name"],
+                ScadaRollup.resolution == agg["resolution"],
+                ScadaRollup.bucket_start == agg["bucket_start"],
+            )
+        ).first()
+        if existing is None:
+            db.add(ScadaRollup(**agg))
+        else:
+            _merge_into(existing, agg)
+    db.flush()
+    return len(aggs)
+
+
+def pick_resolution(start: datetime, end: datetime, max_points: int = DEFAULT_MAX_POINTS) -> str:
+    """Finest resolution whose bucket count over [start, end] fits max_points; else the coarsest (1d)."""
+    span = max((naive_utc(end) - naive_utc(start)).total_seconds(), 0)
+    for resolution, seconds in RESOLUTIONS.items():
+        if math.ceil(span / seconds) + 1 <= max_points:
+            return resolution
+    return next(reversed(RESOLUTIONS))
+
+
+def query_rollups(
+    db: Session,
+    plant_id: Optional[str],
+    tag_name: str,
+    start: datetime,
+    end: datetime,
+    max_points: int = DEFAULT_MAX_POINTS,
+    resolution: Optional[str] = None,
+) -> tuple[str, list[ScadaRollup]]:
+    """Rollup buckets for one tag over [start, end]. Resolution auto-picked from max_points unless given."""
+    if resolution is None:
+        resolution = pick_resolution(start, end, max_points)
+    elif resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}; expected one of {', '.join(RESOLUTIONS)}")
+    first_bucket = bucket_start(start, RESOLUTIONS[resolution])
+    q = (
+        select(ScadaRollup)
+        .where(
+            ScadaRollup.plant_id == (plant_id or ""),
+            ScadaRollup.tag_name == tag_name,
+            ScadaRollup.resolution == resolution,
+            ScadaRollup.bucket_start >= first_bucket,
+            ScadaRollup.bucket_start <= naive_utc(end),
+        )
+        .order_by(ScadaRollup.bucket_start)
+    )
+    return resolution, list(db.scalars(q))
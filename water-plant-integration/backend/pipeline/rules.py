@@ -0,0 +1,181 @@
+"""
+Threshold rule engine. Per-plant rules are compiled into NumPy arrays (min, max, hysteresis) aligned to
+tag ids, so a whole poll batch is checked in one vectorized pass; Python only touches breached tags.
+
+Rules are read from ALERT_THRESHOLDS (JSON env) or config/alert_thresholds.json, else DEFAULT_THRESHOLDS.
+Format: {"*": {tag: rule}, "<plant_id>": {tag: rule}}; plant rules override "*" per tag. A flat
+{tag: rule} object is taken as "*". A rule has optional "min" / "max" (missing = no limit), plus
+"hysteresis" (clear band, default 0), "issue_type" (default "threshold"), "severity", "unit", "asset_name".
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_THRESHOLDS: dict[str, dict[str, dict[str, Any]]] = {
+    "*": {
+        "pump3_vibration": {"max": 0.8, "hysteresis": 0.05, "unit": "in/s", "issue_type": "vibration", "severity": "warning"},
+        "effluent_chlorine": {
+            "min": 0.5, "max": 4.0, "hysteresis": 0.1, "unit": "ppm", "issue_type": "chlorine", "severity": "warning",
+            "asset_name": "Effluent",
+        },
+    },
+}
+
+
+def _number(value: Any) -> float:
+    """Rule limit as float; missing or invalid -> NaN (no limit)."""
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _parse_config(raw: Any) -> dict[str, dict[str, dict[str, Any]]]:
+    """Normalize to {plant or "*": {tag: rule}}; rules without any limit are dropped."""
+    if not isinstance(raw, dict) or not raw:
+        return DEFAULT_THRESHOLDS
+    if all(isinstance(v, dict) and ("min" in v or "max" in v) for v in raw.values()):
+        raw = {"*": raw}  # flat {tag: rule}
+    out: dict[str, dict[str, dict[str, Any]]] = {}
+    for plant, rules in raw.items():
+        if not isinstance(rules, dict):
+            continue
+        out[str(plant)] = {
+            str(tag): rule for tag, rule in rules.items()
+            if isinstance(rule, dict) and ("min" in rule or "max" in rule)
+        }
+    return out or DEFAULT_THRESHOLDS
+
+
+def load_thresholds() -> dict[str, dict[str, dict[str, Any]]]:
+    """
+    Resolution order:
+    1. ALERT_THRESHOLDS env (JSON string)
+    2. config/alert_thresholds.json (if exists)
+    3. DEFAULT_THRESHOLDS
+    """
+    env_val = os.environ.get("ALERT_THRESHOLDS", "").strip()
+    if env_val:
+        try:
+            return _parse_config(json.loads(env_val))
+        except (json.JSONDecodeError, TypeError):
+            pass
+    config_path = Path(__file__).resolve().parent.parent / "config" / "alert_thresholds.json"
+    if config_path.exists():
+        try:
+            with open(config_path, encoding="utf-8") as f:
+                return _parse_config(json.load(f))
+        except (json.JSONDecodeError, TypeError, OSError):
+            pass
+    return DEFAULT_THRESHOLDS
+
+
+def _asset_name(tag: str) -> str:
+    return tag.split("_")[0].capitalize() + " " + tag.split("_")[1] if "_" in tag else tag
+
+
+@dataclass
+class RuleResult:
+    """Per-reading outcome of one evaluate() pass; arrays are aligned to the input batch."""
+
+    rule_idx: np.ndarray  # rule index per reading, -1 = no rule for that tag
+    high: np.ndarray  # value > max
+    low: np.ndarray  # value < min
+    cleared: np.ndarray  # inside the limits by at least the hysteresis band
+
+
+class CompiledRules:
+    """One plant's rules as arrays. Tag i has limits mins[i] / maxs[i] (NaN = none) and band bands[i]."""
+
+    def __init__(self, rules: dict[str, dict[str, Any]]) -> None:
+        self.tags = list(rules)
+        self.tag_ids = {tag: i for i, tag in enumerate(self.tags)}
+        self.rules = [rules[t] for t in self.tags]
+        self.mins = np.array([_number(r.get("min")) for r in self.rules], dtype=np.float64)
+        self.maxs = np.array([_number(r.get("max")) for r in self.rules], dtype=np.float64)
+        self.bands = np.nan_to_num(np.array([_number(r.get("hysteresis")) for r in self.rules], dtype=np.float64))
+        self._last_tags: Optional[list[str]] = None
+        self._last_idx: Optional[np.ndarray] = None
+        self._align_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def align(self, tags: Sequence[str]) -> np.ndarray:
+        """Rule index per tag (-1 = no rule). Polls repeat the same tag list, so the last mapping is reused."""
+        tags = list(tags)
+        with self._align_lock:
+            if self._last_tags == tags:
+                return self._last_idx
+        get = self.tag_ids.get
+        idx = np.fromiter((get(t, -1) for t in tags), dtype=np.int64, count=len(tags))
+        with self._align_lock:
+            self._last_tags, self._last_idx = tags, idx
+        return idx
+
+    def evaluate(self, tags: Sequence[str], values: Sequence[Optional[float]]) -> RuleResult:
+        """Check a batch of (tag, value) in one pass. NaN / None values neither breach nor clear."""
+        idx = self.align(tags)
+        vals = np.asarray(values, dtype=np.float64)  # None -> NaN
+        known = idx >= 0
+        safe = np.where(known, idx, 0)
+        mins, maxs, bands = self.mins[safe], self.maxs[safe], self.bands[safe]
+        # Comparisons with NaN are False: a missing limit never breaches, a NaN value never breaches.
+        with np.errstate(invalid="ignore"):
+            high = known & (vals > maxs)
+            low = known & ~high & (vals < mins)
+            cleared = (
+                known & ~np.isnan(vals)
+                & (np.isnan(maxs) | (vals <= maxs - bands))
+                & (np.isnan(mins) | (vals >= mins + bands))
+            )
+        return RuleResult(rule_idx=idx, high=high, low=low, cleared=cleared)
+
+    def rule(self, i: int) -> dict[str, Any]:
+        return self.rules[i]
+
+    def breach_text(self, i: int, value: float, high: bool) -> tuple[str, str]:
+        """(asset_name, message) for a breach of rule i."""
+        tag, rule = self.tags[i], self.rules[i]
+        asset_name = rule.get("asset_name") or _asset_name(tag)
+        if high:
+            return asset_name, f"{tag} = {value} {rule.get('unit', '')} (max {rule['max']})"
+        return asset_name, f"{tag} = {value} (min {rule['min']})"
+
+
+class RuleEngine:
+    """Per-plant CompiledRules, built on first use from the loaded config ("*" merged under plant rules)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._config = load_thresholds()
+        self._compiled: dict[str, CompiledRules] = {}
+        self.generation = 0  # bumped by reload(); evaluate_alerts re-reads every current value when it changes
+
+    def reload(self) -> None:
+        """Re-read the config and drop compiled rules."""
+        config = load_thresholds()
+        with self._lock:
+            self._config = config
+            self._compiled = {}
+            self.generation += 1
+
+    def for_plant(self, plant_id: Optional[str]) -> CompiledRules:
+        key = plant_id or ""
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                rules = dict(self._config.get("*", {}))
+                if key:
+                    rules.update(self._config.get(key, {}))
+                compiled = self._compiled[key] = CompiledRules(rules)
+            return compiled
+
+
+rule_engine = RuleEngine()
@@ -0,0 +1,130 @@
+"""
+Opt-in SQL diagnostics on the SQLAlchemy engine: slow-query log and N+1 detector.
+
+Off unless configured. database.py calls install(engine), which hooks before/after_cursor_execute only
+when one of these is set:
+- SQL_SLOW_QUERY_MS: log statements that take at least this long (WARNING, logger "query_log"), with the
+  route that ran them ("-" for background jobs) and the statement shape. Parameters are never logged.
+- SQL_N_PLUS_ONE_THRESHOLD: warn once per request and shape when the same statement shape runs more than
+  this many times in one request (an ORM lazy load or a per-row query in a loop).
+- SQL_LOG_REQUEST_QUERIES: log the statement count of every request that ran at least this many (INFO).
+
+Requests are identified through metrics.request_stats, the contextvar MetricsMiddleware sets, so counts
+here line up with http_request_db_statements on /metrics.
+"""
+
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Optional
+
+from metrics import RequestStats, request_end_hooks, request_stats
+
+logger = logging.getLogger("query_log")
+
+SHAPE_MAX_CHARS = 300
+
+
+def _env_number(name: str) -> Optional[float]:
+    """Positive number from env, or None (unset, invalid or <= 0 = off)."""
+    try:
+        value = float(os.environ.get(name, "").strip() or 0)
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+_WS = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+@lru_cache(maxsize=4096)
+def statement_shape(statement: str) -> str:
+    """Statement with whitespace collapsed, literals replaced by ? and IN lists of any length as (?...)."""
+    shape = _WS.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("(?...)", shape)
+    shape = _LITERAL.sub("?", shape)
+    return shape[:SHAPE_MAX_CHARS]
+
+
+class QueryLog:
+    def __init__(self, slow_ms: Optional[float], n_plus_one: Optional[float], request_queries: Optional[float]) -> None:
+        self.slow_seconds = slow_ms / 1000 if slow_ms else None
+        self.n_plus_one = int(n_plus_one) if n_plus_one else None
+        self.request_queries = int(request_queries) if request_queries else None
+
+    @property
+    def enabled(self) -> bool:
+        return any(v is not None for v in (self.slow_seconds, self.n_plus_one, self.request_queries))
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("query_log_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        stats = request_stats.get()
+        if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+            logger.warning(
+                "slow query %.1f ms route=%s: %s",
+                elapsed * 1000, _route(stats), statement_shape(statement),
+            )
+        if self.n_plus_one is not None and stats is not None:
+            shape = statement_shape(statement)
+            count = stats.statement_shapes.get(shape, 0) + 1
+            stats.statement_shapes[shape] = count
+            if count == self.n_plus_one + 1:
+                logger.warning(
+                    "possible N+1: same statement ran more than %d times in one request, route=%s: %s",
+                    self.n_plus_one, _route(stats), shape,
+                )
+
+    def handle_error(self, context) -> None:
+        conn = context.connection
+        if conn is not None:
+            started = conn.info.get("query_log_started")
+            if started:
+                started.pop()
+
+    def request_end(self, stats: RequestStats) -> None:
+        if self.request_queries is not None and stats.db_statements >= self.request_queries:
+            repeated = sum(1 for n in stats.statement_shapes.values() if n > 1)
+            logger.info(
+                "%d queries (%.1f ms) route=%s %s%s",
+                stats.db_statements, stats.db_seconds * 1000, stats.method, stats.route,
+                f", {repeated} shapes repeated" if repeated else "",
+            )
+
+
+def _route(stats: Optional[RequestStats]) -> str:
+    return f"{stats.method} {stats.route}" if stats is not None else "-"
+
+
+def install(engine) -> Optional[QueryLog]:
+    """Hook engine if any SQL_* diagnostics setting is on. Returns the installed QueryLog, else None."""
+    from sqlalchemy import event
+
+    query_log = QueryLog(
+        slow_ms=_env_number("SQL_SLOW_QUERY_MS"),
+        n_plus_one=_env_number("SQL_N_PLUS_ONE_THRESHOLD"),
+        request_queries=_env_number("SQL_LOG_REQUEST_QUERIES"),
+    )
+    if not query_log.enabled:
+        return None
+    event.listen(engine, "before_cursor_execute", query_log.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", query_log.after_cursor_execute)
+    event.listen(engine, "handle_error", query_log.handle_error)
+    if query_log.request_queries is not None:
+        request_end_hooks.append(query_log.request_end)
+    # Make the warnings visible without extra logging config (uvicorn only configures its own loggers).
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    return query_log
@@ -1,19 +1,81 @@
 """
-Simple in-memory rate limiter per IP. Max 60 requests per minute per key.
-Use as Depends(check_rate_limit) on sensitive POST endpoints.
+In-memory token-bucket rate limiter per client IP. Default 60 requests per minute per IP, shared by
+every endpoint that uses it. Use as Depends(check_rate_limit) on sensitive POST endpoints, declared before
+the auth dependency: dependencies resolve in order, so requests that then fail auth (401) are still charged.
+
+Each bucket holds two numbers (tokens, last refill), so a check is O(1). Buckets are kept in LRU order
+and idle ones (refilled to capacity = same as a new bucket) are evicted, so memory stays bounded.
+
+Limits are requests per minute, configured with the RATE_LIMITS env (JSON). The "*" entry sets the per-IP
+limit per role, e.g. {"*": {"admin": 120}}; lookup is role, then "*", then MAX_PER_WINDOW. Requests without
+a valid token count under "*". Any other
+entry names a route (path as declared), e.g. {"/api/compliance/export": {"*": 10}}. A request to that
+route must also pass a separate per-(IP, route) bucket: route limits only tighten, they never raise the
+per-IP limit. No route limits are set by default.
 """
 
+import json
+import os
+import threading
 import time
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
-from fastapi import Request, HTTPException
+from fastapi import Depends, Request, HTTPException
 
-# key -> list of timestamps in the current window
-_storage: Dict[str, List[float]] = {}
+from auth import get_optional_user, CurrentUser
 
 WINDOW_SECONDS = 60.0
 MAX_PER_WINDOW = 60
 
+# route path (as declared, e.g. "/api/scada/poll") or "*" (per IP, all routes) -> role or "*" -> requests per WINDOW_SECONDS
+ROUTE_LIMITS: Dict[str, Dict[str, int]] = {}
+GLOBAL = "*"
+
+EVICT_INTERVAL_SECONDS = 30.0
+MAX_KEYS = 100_000
+
+# (ip, route or GLOBAL) -> [tokens, last_refill]; oldest-touched first
+_buckets: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+_lock = threading.Lock()
+_last_evict = 0.0
+
+
+def _load_limits() -> Dict[str, Dict[str, int]]:
+    """ROUTE_LIMITS merged with RATE_LIMITS env (JSON). Invalid env is ignored."""
+    limits = {route: dict(roles) for route, roles in ROUTE_LIMITS.items()}
+    raw = os.environ.get("RATE_LIMITS", "").strip()
+    if raw:
+        try:
+            parsed = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            parsed = None
+        if isinstance(parsed, dict):
+            for route, roles in parsed.items():
+                if isinstance(roles, dict):
+                    limits.setdefault(str(route), {}).update(
+                        {str(k): int(v) for k, v in roles.items() if isinstance(v, (int, float)) and v > 0}
+                    )
+    return limits
+
+
+_limits = _load_limits()
+
+
+def reload_limits() -> None:
+    """Re-read RATE_LIMITS (e.g. after changing env in tests)."""
+    global _limits
+    _limits = _load_limits()
+
+
+def limit_for(route: str, role: str) -> Optional[int]:
+    """Requests per WINDOW_SECONDS for this route (GLOBAL = per IP) and role; None if the route has no limit."""
+    roles = _limits.get(route, {})
+    value = roles.get(role) or roles.get("*")
+    if route == GLOBAL:
+        return value or MAX_PER_WINDOW
+    return value
+
 
 def _get_key(request: Request) -> str:
     """Rate limit key: client IP."""
@@ -22,19 +84,61 @@ def _get_key(request: Request) -> str:
     return "unknown"
 
 
-def check_rate_limit(request: Request) -> None:
+def _route_path(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or request.url.path
+
+
+def _evict(now: float) -> None:
+    """Drop keys idle long enough to have refilled completely, and the oldest keys beyond MAX_KEYS. Lock held."""
+    while _buckets:
+        key, bucket = next(iter(_buckets.items()))
+        if now - bucket[1] < WINDOW_SECONDS and len(_buckets) <= MAX_KEYS:
+            break
+        del _buckets[key]
+
+
+def _refill(key: Tuple[str, str], capacity: float, now: float) -> list:
+    """The bucket for key, topped up for the time since its last refill. Lock held."""
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = _buckets[key] = [capacity, now]
+    else:
+        _buckets.move_to_end(key)
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * capacity / WINDOW_SECONDS)
+        bucket[1] = now
+    return bucket
+
+
+def check_rate_limit(request: Request, current_user: Optional[CurrentUser] = Depends(get_optional_user)) -> None:
     """
-    Dependency: enforce max 60 requests per minute per IP.
-    Drops timestamps older than WINDOW_SECONDS, then allows request if count < MAX_PER_WINDOW else 429.
+    Dependency: token bucket per IP (all routes), plus one per (IP, route) if the route has its own limit.
+    Capacity = limit for the caller's role, refilled continuously at capacity / WINDOW_SECONDS. A request
+    takes a token from each of its buckets; 429 if any is empty. Runs before auth: no valid token = role "*".
     """
-    key = _get_key(request)
-    now = time.time()
-    cutoff = now - WINDOW_SECONDS
-    if key not in _storage:
-        _storage[key] = []
-    times = _storage[key]
-    # drop timestamps outside window
-    times[:] = [t for t in times if t > cutoff]
-    if len(times) >= MAX_PER_WINDOW:
-        raise HTTPException(status_code=429, detail="Too many requests. Try again later.")
-    times.append(now)
+    global _last_evict
+    ip = _get_key(request)
+    route = _route_path(request)
+    role = current_user.role if current_user is not None else "*"
+    limits = [(GLOBAL, float(limit_for(GLOBAL, role)))]
+    route_limit = limit_for(route, role)
+    if route_limit:
+        limits.append((route, float(route_limit)))
+    now = time.monotonic()
+    with _lock:
+        if now - _last_evict >= EVICT_INTERVAL_SECONDS or len(_buckets) > MAX_KEYS:
+            _evict(now)
+            _last_evict = now
+        buckets = [(_refill((ip, name), capacity, now), capacity) for name, capacity in limits]
+        empty = [(bucket, capacity) for bucket, capacity in buckets if bucket[0] < 1.0]
+        if empty:
+            retry_after = max(
+                max(1, int((1.0 - bucket[0]) * WINDOW_SECONDS / capacity) + 1) for bucket, capacity in empty
+            )
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Try again later.",
+                headers={"Retry-After": str(retry_after)},
+            )
+        for bucket, _ in buckets:
+            bucket[0] -= 1.0
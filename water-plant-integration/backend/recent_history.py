@@ -0,0 +1,143 @@
+"""
+In-process recent history per (plant, source, tag), for sparklines and "last hour" views without DB reads.
+
+Each series is a fixed-size ring: a float64 NumPy array of values and an int64 array of timestamps
+(epoch ms), RECENT_HISTORY_POINTS long. bulk_store_readings appends every stored reading after commit.
+Reads copy the newest points out under the lock; GET /api/dashboard/readings/recent serves from here.
+
+Memory is capped: RECENT_HISTORY_MAX_BYTES / (16 bytes x points) series at most. Past that, the series
+written least recently is evicted (a tag that stopped reporting goes first). History starts empty at
+startup and fills as readings arrive; older data comes from /api/trends/rollups.
+
+Config (env):
+- RECENT_HISTORY_POINTS: points kept per tag (default 360, one hour at a 10 s poll).
+- RECENT_HISTORY_MAX_BYTES: total buffer budget (default 64 MB).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+BYTES_PER_POINT = 16  # float64 value + int64 timestamp
+_EPOCH = datetime(1970, 1, 1)
+_MS = timedelta(milliseconds=1)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def epoch_ms(ts: datetime) -> int:
+    """Naive datetimes are UTC, as everywhere in this app."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - _EPOCH) // _MS
+
+
+class _Ring:
+    __slots__ = ("values", "times", "head", "size")
+
+    def __init__(self, capacity: int) -> None:
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.head = 0  # next write position
+        self.size = 0
+
+    def append(self, t: int, value: float) -> None:
+        self.values[self.head] = value
+        self.times[self.head] = t
+        self.head = (self.head + 1) % len(self.values)
+        if self.size < len(self.values):
+            self.size += 1
+
+    def last(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Newest n points, oldest first (copies)."""
+        n = min(n, self.size)
+        start = self.head - n
+        if start >= 0:
+            return self.times[start:self.head].copy(), self.values[start:self.head].copy()
+        idx = np.arange(start, self.head) % len(self.values)
+        return self.times[idx], self.values[idx]
+
+
+class RecentHistory:
+    def __init__(self, points: int, max_bytes: int) -> None:
+        self.points = points
+        self.max_series = max(1, max_bytes // (points * BYTES_PER_POINT))
+        self._series: "OrderedDict[tuple[str, str, str], _Ring]" = OrderedDict()  # least recently written first
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def append_many(self, plant_id: Optional[str], source: str, rows: Iterable[dict[str, Any]]) -> None:
+        """Rows: tag, value, timestamp (datetime). Called after the rows are committed."""
+        plant_key = plant_id or ""
+        prepared = [(r["tag"], epoch_ms(r["timestamp"]), float(r["value"])) for r in rows]
+        with self._lock:
+            for tag, t, value in prepared:
+                key = (plant_key, source, tag)
+                ring = self._series.get(key)
+                if ring is None:
+                    ring = self._series[key] = _Ring(self.points)
+                    while len(self._series) > self.max_series:
+                        self._series.popitem(last=False)
+                        self.evicted += 1
+                else:
+                    self._series.move_to_end(key)
+                ring.append(t, value)
+
+    def recent(
+        self,
+        plant_id: Optional[str],
+        tags: Optional[list[str]],
+        *,
+        source: str = "scada",
+        points: Optional[int] = None,
+        since_ms: Optional[int] = None,
+    ) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """tag -> (epoch ms, values), oldest first, newest `points` (at most) at or after since_ms. tags None = all."""
+        plant_key = plant_id or ""
+        n = min(points or self.points, self.points)
+        out = {}
+        with self._lock:
+            if tags is None:
+                keys = [k for k in self._series if k[0] == plant_key and k[1] == source]
+            else:
+                keys = [(plant_key, source, tag) for tag in tags]
+            for key in keys:
+                ring = self._series.get(key)
+                if ring is not None and ring.size:
+                    out[key[2]] = ring.last(n)
+        if since_ms is not None:
+            for tag, (times, values) in out.items():
+                keep = times >= since_ms
+                out[tag] = (times[keep], values[keep])
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            series = len(self._series)
+        return {
+            "series": series,
+            "max_series": self.max_series,
+            "points_per_series": self.points,
+            "bytes": series * self.points * BYTES_PER_POINT,
+            "evicted": self.evicted,
+        }
+
+
+recent_history = RecentHistory(
+    points=_env_int("RECENT_HISTORY_POINTS", 360),
+    max_bytes=_env_int("RECENT_HISTORY_MAX_BYTES", 64 * 1024 * 1024),
+)
@@ -0,0 +1,199 @@
+"""
+Conditional GET for polled read endpoints (dashboard readings, alerts, work orders, entry types).
+
+Writers bump a per-plant data version after they commit (data_versions.bump). A GET's ETag is derived
+from that version plus the caller's plant scope, the path and the query string, so it is known before
+any query runs. If-None-Match that matches -> 304 without opening a DB session. Otherwise the route
+builds the payload once, and the serialized body is kept for a few seconds under the same ETag, so
+other clients polling the same view get the bytes without recomputing them.
+
+Use as a dependency declared before get_session:
+    cache: ConditionalGet = Depends(conditional_get("alerts"))
+    ...
+    if (hit := cache.cached()) is not None:
+        return hit
+    return cache.respond(payload)
+
+Versions live in this process: ETags also carry a per-process epoch, so a restart never produces a
+stale 304. If other processes write the same database, set HTTP_CACHE=0.
+
+Config (env):
+- HTTP_CACHE: 0 turns ETags and the body cache off (default 1).
+- RESPONSE_CACHE_TTL_SECONDS: how long a serialized body is reused (default 5; 0 = ETags only).
+- RESPONSE_CACHE_MAX_ENTRIES: bodies kept at most, oldest evicted first (default 1024).
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from auth import get_current_user, CurrentUser
+
+# Kinds of data a cached view depends on. "static" never changes while the process runs.
+KINDS = ("readings", "alerts", "work_orders", "static")
+CACHE_CONTROL = "private, no-cache"  # browsers may store it but must revalidate (cheap: 304)
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw not in ("0", "false", "no", "off")
+
+
+class DataVersions:
+    """Monotonic counter per (plant, kind), plus a per-kind total for all-plant (admin) views."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: dict[tuple[str, str], int] = {}
+        self._totals: dict[str, int] = {}
+
+    def bump(self, plant_id: Optional[str], *kinds: str) -> None:
+        """Call after commit: views of these kinds for this plant (and all-plant views) get a new ETag."""
+        plant_key = plant_id or ""
+        with self._lock:
+            for kind in kinds:
+                self._versions[(plant_key, kind)] = self._versions.get((plant_key, kind), 0) + 1
+                self._totals[kind] = self._totals.get(kind, 0) + 1
+
+    def get(self, plant_id: Optional[str], kind: str) -> int:
+        """plant_id None = all plants."""
+        with self._lock:
+            if plant_id is None:
+                return self._totals.get(kind, 0)
+            return self._versions.get((plant_id, kind), 0)
+
+
+class ResponseCache:
+    """Serialized bodies by ETag, with a TTL and a size bound (LRU by insertion)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()  # etag -> (expires, body)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str) -> Optional[bytes]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[etag]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, etag: str, body: bytes) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[etag] = (time.monotonic() + self.ttl_seconds, body)
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ConditionalGet:
+    """Per-request handle returned by the conditional_get dependency. etag None = caching off."""
+
+    def __init__(self, etag: Optional[str]) -> None:
+        self.etag = etag
+
+    def cached(self) -> Optional[Response]:
+        """The cached body for this ETag, if another request built it within the TTL."""
+        if self.etag is None:
+            return None
+        body = response_cache.get(self.etag)
+        if body is None:
+            return None
+        return Response(content=body, media_type="application/json", headers=self._headers())
+
+    def respond(self, payload: Any) -> Any:
+        """Serialize payload once, keep it for other pollers, and return it with the ETag."""
+        if self.etag is None:
+            return payload
+        response = JSONResponse(content=jsonable_encoder(payload), headers=self._headers())
+        response_cache.put(self.etag, response.body)
+        return response
+
+    def _headers(self) -> dict[str, str]:
+        return {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+
+
+UNCACHED = ConditionalGet(None)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison (RFC 9110): W/ prefixes are ignored; "*" matches anything."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def make_etag(kind: str, plant_id: Optional[str], request: Request) -> str:
+    """W/"<epoch>-<version>-<view hash>". The view hash covers kind, plant scope, path and query."""
+    version = data_versions.get(plant_id, kind)
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    view = f"{kind}|{'*' if plant_id is None else plant_id}|{request.url.path}|{query}"
+    digest = hashlib.blake2b(view.encode(), digest_size=8).hexdigest()
+    return f'W/"{_epoch}-{version}-{digest}"'
+
+
+def conditional_get(kind: str, admin_all_plants: bool = True) -> Callable[..., ConditionalGet]:
+    """
+    Dependency for a GET whose body depends on `kind` data of the caller's plant (admin: all plants).
+    admin_all_plants=False for routes that serve admins their own plant only: the ETag and cache key then
+    use the admin's plant too, so admins of different plants never share a cached body.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown data kind: {kind}")
+
+    def dependency(request: Request, current_user: CurrentUser = Depends(get_current_user)) -> ConditionalGet:
+        if not enabled:
+            return UNCACHED
+        if current_user.role == "admin" and admin_all_plants:
+            plant_id = None
+        else:
+            plant_id = current_user.plant_id or ""
+        etag = make_etag(kind, plant_id, request)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+        return ConditionalGet(etag)
+
+    return dependency
+
+
+enabled = _env_flag("HTTP_CACHE", True)
+_epoch = uuid.uuid4().hex[:8]
+data_versions = DataVersions()
+response_cache = ResponseCache(
+    ttl_seconds=_env_number("RESPONSE_CACHE_TTL_SECONDS", 5),
+    max_entries=int(_env_number("RESPONSE_CACHE_MAX_ENTRIES", 1024)),
+)
@@ -0,0 +1,425 @@
+"""
+Retention and columnar archival for reading history (scada_readings, readings).
+
+Partitions are calendar months of the table's time column. A month becomes eligible once it is entirely
+older than RETENTION_DAYS; the retention job then moves it, one hour per transaction, out of the DB into
+compressed columnar archive files, one per plant-hour (NumPy .npz: one array per column, strings
+dictionary-encoded):
+
+    ARCHIVE_DIR/<table>/<plant>/<YYYY-MM>/<YYYY-MM-DD>T<HH>.npz
+
+Rows of an hour are streamed from the DB (yield_per) and built into columns chunk by chunk; each hour file
+is written once, atomically, before its rows are deleted. Rows are keyed by id, so a rerun after a crash
+merges into the existing hour file instead of duplicating. Only the ids that were archived are deleted: a
+row written into the range meanwhile (e.g. a backfill) stays in the DB for the next run. query_history()
+is the read facade: archived hours plus live rows for a tag and time range, merged in time order, so
+audits do not care where a range lives.
+
+Config (env):
+- RETENTION_DAYS: keep this many days in the DB. Unset or 0 = retention off.
+- ARCHIVE_DIR: archive root (default ./archive).
+- RETENTION_INTERVAL_SECONDS: background job interval (default 3600).
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from urllib.parse import quote
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models_platform import Reading, ScadaReading
+
+EPOCH = datetime(1970, 1, 1)
+NONE_PLANT_DIR = "@none"  # quote(..., safe="") escapes "@", so no real plant id maps here
+DEFAULT_HISTORY_LIMIT = 10_000
+ARCHIVE_BATCH = timedelta(hours=1)  # rows archived per transaction (one file per plant-hour)
+ARCHIVE_YIELD_PER = 10_000  # rows fetched from the DB per chunk
+DELETE_CHUNK = 500  # ids per DELETE ... IN (...)
+
+
+@dataclass(frozen=True)
+class ArchiveSpec:
+    """How one history table is partitioned and stored column by column."""
+
+    table: str
+    model: Any
+    time_col: str
+    tag_col: str
+    str_cols: tuple[str, ...]
+    float_cols: tuple[str, ...]
+
+    def column(self, name: str):
+        return getattr(self.model, name)
+
+
+ARCHIVES: dict[str, ArchiveSpec] = {
+    "scada_readings": ArchiveSpec(
+        "scada_readings", ScadaReading, "timestamp", "tag_name", ("tag_name", "unit", "quality", "alarm_state"), ("value",),
+    ),
+    "readings": ArchiveSpec("readings", Reading, "created_at", "tag", ("source", "tag", "unit", "raw_tag"), ("value",)),
+}
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def retention_days() -> int:
+    return int(_env_number("RETENTION_DAYS", 0))
+
+
+def archive_dir() -> Path:
+    return Path(os.environ.get("ARCHIVE_DIR", "").strip() or "./archive")
+
+
+def _naive_utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _to_micros(dt: datetime) -> int:
+    return (_naive_utc(dt) - EPOCH) // timedelta(microseconds=1)
+
+
+def _plant_dir(plant_id: Optional[str]) -> str:
+    return NONE_PLANT_DIR if plant_id is None else quote(plant_id, safe="")
+
+
+def _day_dir(spec: ArchiveSpec, plant_id: Optional[str], day: date) -> Path:
+    return archive_dir() / spec.table / _plant_dir(plant_id) / day.strftime("%Y-%m")
+
+
+def _hour_path(spec: ArchiveSpec, plant_id: Optional[str], hour: datetime) -> Path:
+    return _day_dir(spec, plant_id, hour.date()) / f"{hour.date().isoformat()}T{hour.hour:02d}.npz"
+
+
+def _file_span(path: Path) -> tuple[datetime, datetime]:
+    """[start, stop) an archive file can hold: <day>T<HH> is one hour, a whole-day <day> file the day."""
+    if "T" in path.stem:
+        hour = datetime.fromisoformat(path.stem + ":00")
+        return hour, hour + ARCHIVE_BATCH
+    day = datetime.fromisoformat(path.stem)
+    return day, day + timedelta(days=1)
+
+
+def _overlaps(path: Path, start: Optional[datetime], end: Optional[datetime]) -> bool:
+    first, stop = _file_span(path)
+    return (start is None or stop > start) and (end is None or first <= end)
+
+
+def _day_files(spec: ArchiveSpec, plant_id: Optional[str], day: date, start: datetime, end: datetime) -> list[Path]:
+    """Archive files of one day that can hold rows in [start, end]: hour files, plus a whole-day file if any."""
+    return [p for p in sorted(_day_dir(spec, plant_id, day).glob(f"{day.isoformat()}*.npz")) if _overlaps(p, start, end)]
+
+
+def _encode(values: list[Optional[str]]) -> tuple[np.ndarray, np.ndarray]:
+    """Dictionary-encode a string column: (codes int32, -1 = NULL; distinct values)."""
+    distinct = sorted({v for v in values if v is not None})
+    lookup = {v: i for i, v in enumerate(distinct)}
+    codes = np.fromiter((lookup[v] if v is not None else -1 for v in values), dtype=np.int32, count=len(values))
+    return codes, np.array(distinct, dtype=str)
+
+
+def _decode(codes: np.ndarray, distinct: np.ndarray) -> list[Optional[str]]:
+    values = distinct.tolist()
+    return [values[c] if c >= 0 else None for c in codes.tolist()]
+
+
+def _load(path: Path) -> dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as f:
+        return {k: f[k] for k in f.files}
+
+
+class _ColumnBuilder:
+    """One archive file's columns, built a chunk of rows at a time; strings dictionary-encoded as they come."""
+
+    def __init__(self, spec: ArchiveSpec) -> None:
+        self.spec = spec
+        self.parts: dict[str, list[np.ndarray]] = {
+            k: [] for k in ("id", "t", *spec.float_cols, *(f"{n}__codes" for n in spec.str_cols))
+        }
+        self.lookups: dict[str, dict[str, int]] = {n: {} for n in spec.str_cols}
+
+    def add(self, rows: list[Any]) -> None:
+        spec, n = self.spec, len(rows)
+        self.parts["id"].append(np.fromiter((r.id for r in rows), dtype=np.int64, count=n))
+        self.parts["t"].append(np.fromiter((_to_micros(getattr(r, spec.time_col)) for r in rows), dtype=np.int64, count=n))
+        for name in spec.float_cols:
+            self.parts[name].append(np.fromiter((getattr(r, name) for r in rows), dtype=np.float64, count=n))
+        for name in spec.str_cols:
+            lookup = self.lookups[name]
+            values = (getattr(r, name) for r in rows)
+            self.parts[f"{name}__codes"].append(np.fromiter(
+                (-1 if v is None else lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32, count=n,
+            ))
+
+    def columns(self) -> dict[str, np.ndarray]:
+        cols = {k: np.concatenate(v) for k, v in self.parts.items()}
+        for name, lookup in self.lookups.items():
+            cols[f"{name}__values"] = np.array(list(lookup), dtype=str)
+        return cols
+
+
+def _merge(spec: ArchiveSpec, old: dict[str, np.ndarray], new: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Union of two day files, deduplicated by id (a rerun after a crash), sorted by time."""
+    ids = np.concatenate([old["id"], new["id"]])
+    _, keep = np.unique(ids, return_index=True)
+    out = {"id": ids[keep], "t": np.concatenate([old["t"], new["t"]])[keep]}
+    for name in spec.float_cols:
+        out[name] = np.concatenate([old[name], new[name]])[keep]
+    for name in spec.str_cols:
+        values = _decode(old[f"{name}__codes"], old[f"{name}__values"]) + _decode(new[f"{name}__codes"], new[f"{name}__values"])
+        out[f"{name}__codes"], out[f"{name}__values"] = _encode([values[i] for i in keep.tolist()])
+    order = np.argsort(out["t"], kind="stable")
+    for k in ("id", "t", *spec.float_cols, *(f"{n}__codes" for n in spec.str_cols)):
+        out[k] = out[k][order]
+    return out
+
+
+def _write_hour(spec: ArchiveSpec, plant_id: Optional[str], hour: datetime, cols: dict[str, np.ndarray]) -> Path:
+    """Write one plant-hour file (merged by id if a crashed run left one); tmp file + rename so readers never see half a file."""
+    path = _hour_path(spec, plant_id, hour)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        cols = _merge(spec, _load(path), cols)
+    else:
+        order = np.argsort(cols["t"], kind="stable")
+        for k in ("id", "t", *spec.float_cols, *(f"{n}__codes" for n in spec.str_cols)):
+            cols[k] = cols[k][order]
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **cols)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return path
+
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def archive_table(db: Session, spec: ArchiveSpec, before: datetime) -> dict[str, int]:
+    """Move every row with time < before (a month boundary) into archive files, one hour per transaction."""
+    id_col, time_col = spec.column("id"), spec.column(spec.time_col)
+    cols = [id_col, spec.column("plant_id"), time_col]
+    cols += [spec.column(n) for n in (*spec.str_cols, *spec.float_cols)]
+    rows_moved, days, files = 0, set(), set()
+    oldest = db.scalar(select(func.min(time_col)).where(time_col < before))
+    while oldest is not None:
+        start = _naive_utc(oldest).replace(minute=0, second=0, microsecond=0)
+        end = min(start + ARCHIVE_BATCH, before)
+        builders: dict[Optional[str], _ColumnBuilder] = {}
+        result = db.execute(
+            select(*cols).where(time_col >= start, time_col < end).execution_options(yield_per=ARCHIVE_YIELD_PER)
+        )
+        for chunk in result.partitions():
+            by_plant: dict[Optional[str], list[Any]] = {}
+            for r in chunk:
+                by_plant.setdefault(r.plant_id, []).append(r)
+            for plant_id, plant_rows in by_plant.items():
+                builders.setdefault(plant_id, _ColumnBuilder(spec)).add(plant_rows)
+        for plant_id, builder in builders.items():
+            plant_cols = builder.columns()
+            files.add(_write_hour(spec, plant_id, start, plant_cols))
+            ids = plant_cols["id"].tolist()
+            for i in range(0, len(ids), DELETE_CHUNK):
+                db.execute(delete(spec.model).where(id_col.in_(ids[i:i + DELETE_CHUNK])))
+            rows_moved += len(ids)
+        db.commit()
+        days.add(start.date())
+        oldest = db.scalar(select(func.min(time_col)).where(time_col >= end, time_col < before))
+    return {"rows": rows_moved, "days": len(days), "files": len(files)}
+
+
+def run_retention(db: Session, now: Optional[datetime] = None, days: Optional[int] = None) -> dict[str, Any]:
+    """Archive whole months older than `days` (default RETENTION_DAYS) for every history table."""
+    days = retention_days() if days is None else days
+    if days <= 0:
+        return {"enabled": False}
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    before = _month_start(cutoff)
+    return {
+        "enabled": True,
+        "archived_before": before,
+        "tables": {name: archive_table(db, spec, before) for name, spec in ARCHIVES.items()},
+    }
+
+
+def _rows(spec: ArchiveSpec, cols: dict[str, np.ndarray], idx: np.ndarray) -> list[dict[str, Any]]:
+    """Decode the rows at idx of one archive file into dicts shaped like the live table's rows."""
+    decoded = {n: _decode(cols[f"{n}__codes"][idx], cols[f"{n}__values"]) for n in spec.str_cols}
+    out = []
+    for j, i in enumerate(idx.tolist()):
+        row = {
+            "id": int(cols["id"][i]),
+            spec.time_col: EPOCH + timedelta(microseconds=int(cols["t"][i])),
+            "archived": True,
+        }
+        row.update({n: float(cols[n][i]) for n in spec.float_cols})
+        row.update({n: decoded[n][j] for n in spec.str_cols})
+        out.append(row)
+    return out
+
+
+def _read_archive(
+    spec: ArchiveSpec, plant_id: Optional[str], tag: str, start: datetime, end: datetime, source: Optional[str],
+) -> list[dict[str, Any]]:
+    """Archived rows for one tag in [start, end]: small per-hour files, filtered column-wise."""
+    start, end = _naive_utc(start), _naive_utc(end)
+    t0, t1 = _to_micros(start), _to_micros(end)
+    out: list[dict[str, Any]] = []
+    day, last = start.date(), end.date()
+    paths: list[Path] = []
+    while day <= last:
+        paths += _day_files(spec, plant_id, day, start, end)
+        day += timedelta(days=1)
+    for path in paths:
+        cols = _load(path)
+        tags = cols[f"{spec.tag_col}__values"].tolist()
+        if tag not in tags:
+            continue
+        mask = (cols[f"{spec.tag_col}__codes"] == tags.index(tag)) & (cols["t"] >= t0) & (cols["t"] <= t1)
+        if source is not None:
+            sources = cols["source__values"].tolist()
+            if source not in sources:
+                continue
+            mask &= cols["source__codes"] == sources.index(source)
+        idx = np.flatnonzero(mask)
+        if not idx.size:
+            continue
+        out += _rows(spec, cols, idx)
+    return out
+
+
+def iter_archived(
+    table: str,
+    plant_ids: Optional[list[Optional[str]]],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    *,
+    source: Optional[str] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Every archived row in [start, end] (open-ended where a bound is None) for plant_ids (None = every plant),
+    oldest first. Reads one archive hour (across plants) at a time, so memory stays bounded. Raises KeyError
+    on an unknown table.
+    """
+    spec = ARCHIVES[table]
+    root = archive_dir() / spec.table
+    if plant_ids is None:
+        plant_dirs = [p for p in root.glob("*") if p.is_dir()]
+    else:
+        plant_dirs = [root / _plant_dir(plant_id) for plant_id in plant_ids]
+    start = _naive_utc(start) if start is not None else None
+    end = _naive_utc(end) if end is not None else None
+    by_stem: dict[str, list[Path]] = {}
+    for plant_dir in plant_dirs:
+        for path in plant_dir.glob("*/*.npz"):
+            if _overlaps(path, start, end):
+                by_stem.setdefault(path.stem, []).append(path)
+    for stem in sorted(by_stem):
+        rows: list[dict[str, Any]] = []
+        for path in by_stem[stem]:
+            cols = _load(path)
+            mask = np.ones(len(cols["t"]), dtype=bool)
+            if start is not None:
+                mask &= cols["t"] >= _to_micros(start)
+            if end is not None:
+                mask &= cols["t"] <= _to_micros(end)
+            if source is not None:
+                sources = cols["source__values"].tolist()
+                if source not in sources:
+                    continue
+                mask &= cols["source__codes"] == sources.index(source)
+            rows += _rows(spec, cols, np.flatnonzero(mask))
+        rows.sort(key=lambda r: r[spec.time_col])
+        yield from rows
+
+
+def query_history(
+    db: Session,
+    table: str,
+    plant_id: Optional[str],
+    tag: str,
+    start: datetime,
+    end: datetime,
+    *,
+    source: Optional[str] = None,
+    limit: int = DEFAULT_HISTORY_LIMIT,
+) -> list[dict[str, Any]]:
+    """
+    History for one tag in [start, end] from archive files and the live table, oldest first.
+    For readings pass source (e.g. "scada"). Raises KeyError on an unknown table.
+    """
+    spec = ARCHIVES[table]
+    time_col = spec.column(spec.time_col)
+    q = select(*[spec.column(n) for n in ("id", spec.time_col, *spec.str_cols, *spec.float_cols)]).where(
+        spec.column("plant_id") == plant_id if plant_id is not None else spec.column("plant_id").is_(None),
+        spec.column(spec.tag_col) == tag,
+        time_col >= start,
+        time_col <= end,
+    )
+    if source is not None:
+        q = q.where(spec.column("source") == source)
+    live = [{**r._asdict(), "archived": False} for r in db.execute(q.order_by(time_col).limit(limit))]
+    # Skip the archive when the live table already covers the start of the range.
+    oldest_live = live[0][spec.time_col] if live else None
+    archived: list[dict[str, Any]] = []
+    if oldest_live is None or _naive_utc(oldest_live) > _naive_utc(start):
+        archived = _read_archive(spec, plant_id, tag, start, min(end, oldest_live or end), source)
+    live_ids = {r["id"] for r in live}
+    merged = [r for r in archived if r["id"] not in live_ids] + live
+    merged.sort(key=lambda r: _naive_utc(r[spec.time_col]))
+    return merged[:limit]
+
+
+class RetentionService:
+    """Background loop: run_retention every interval in a worker thread (only when RETENTION_DAYS > 0)."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.last_result: Optional[dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _tick(self) -> None:
+        db = SessionLocal()
+        try:
+            self.last_result = run_retention(db)
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # disk or DB hiccup: rows stay in the DB, try again next interval
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if retention_days() <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="retention")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+retention_service = RetentionService(interval=_env_number("RETENTION_INTERVAL_SECONDS", 3600) or 3600)
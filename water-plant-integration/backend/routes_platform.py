@@ -3,49 +3,65 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from database import get_session
 from auth import get_current_user, CurrentUser
 from rate_limit import check_rate_limit
-from connectors import scada_connector, lims_connector, wims_connector, cmms_connector
+from connectors.health import connector_health
 from connectors.wims import wims_connector as wims
-from ingestion.service import ingest_scada_latest
+from ingestion.service import ingest_scada_latest, latest_readings
 from pipeline.alerts import evaluate_alerts
-from models_platform import Reading, Alert, WorkOrderRecord
+from pipeline.rollups import DEFAULT_MAX_POINTS, naive_utc, query_rollups
+from models_platform import Alert, BackfillJob, WorkOrderOutbox, WorkOrderRecord
+from retention import DEFAULT_HISTORY_LIMIT, query_history, run_retention
+from backfill import claim_job, create_job, resolve_backfill_path, run_job
 from schemas_shared import (
     SystemStatus,
     ReadingOut,
+    RecentReadingsOut,
+    RecentSeriesOut,
+    RollupPointOut,
+    RollupSeriesOut,
+    ScadaHistoryPointOut,
+    ScadaHistoryOut,
     MorningReviewApprove,
     AlertOut,
     AlertListResponse,
     WorkOrderCreate,
     WorkOrderCreated,
+    WorkOrderOutboxOut,
     WorkOrderOut,
     WorkOrderListResponse,
     ShiftSummary,
     ShiftSignOff,
+    BackfillStart,
+    BackfillJobOut,
 )
-from elog.connector import log_readings_approved, log_wo_created, log_alert_only
-from connectors.cmms import cmms_connector as cmms
+from elog.connector import log_readings_approved, log_alert_only
+from work_order_outbox import IdempotencyKeyConflict, enqueue_work_order
+from live import alert_event, keepalive_seconds, live_broadcaster, sse_stream
+from response_cache import ConditionalGet, conditional_get, data_versions
+from recent_history import epoch_ms, recent_history
+from pagination import after_cursor, decode_cursor, next_cursor, want_total
+from shift_counters import bump as bump_shift_counter, read_counts, shift_id, shift_start
 
 router = APIRouter(prefix="/api", tags=["Platform"])
 
 
+def _decode_cursor(cursor: str):
+    """Opaque cursor -> (created_at, id), 400 if malformed."""
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 def _systems_status() -> list[SystemStatus]:
-    """All systems connected? Used by dashboard."""
-    now = datetime.utcnow()
-    out = []
-    for name, conn in [
-        ("SCADA", scada_connector),
-        ("LIMS", lims_connector),
-        ("WIMS", wims_connector),
-        ("CMMS", cmms_connector),
-    ]:
-        ok, err = conn.test_connection()
-        out.append(SystemStatus(name=name, connected=ok, last_checked=now, error=err))
-    return out
+    """All systems connected? Used by dashboard. Served from the background health monitor's cache."""
+    return [SystemStatus(**s) for s in connector_health.snapshot()]
 
 
 @router.get("/dashboard/systems", response_model=list[SystemStatus])
@@ -54,37 +70,200 @@ def get_systems_status(current_user: CurrentUser = Depends(get_current_user)):
     return _systems_status()
 
 
-def _scope_readings_by_plant(q, current_user: CurrentUser):
-    """Restrict to current user's plant unless admin."""
+@router.get("/dashboard/readings/latest", response_model=list[ReadingOut])
+def get_latest_readings(
+    cache: ConditionalGet = Depends(conditional_get("readings")),
+    db: Session = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Dashboard: latest readings (after normalization). One indexed lookup on current_readings; run ingest first if empty.
+    ETag changes with each ingest for the plant; If-None-Match -> 304.
+    """
+    if (hit := cache.cached()) is not None:
+        return hit
+    plant_id = None if current_user.role == "admin" else current_user.plant_id
+    return cache.respond([
+        ReadingOut(tag=r.tag, value=r.value, unit=r.unit, source=r.source, last_updated=r.updated_at)
+        for r in latest_readings(db, plant_id)
+    ])
+
+
+RECENT_MAX_TAGS = 500
+
+
+@router.get("/dashboard/readings/recent", response_model=RecentReadingsOut)
+def get_recent_readings(
+    tags: Optional[str] = Query(None, max_length=20_000, description="Comma-separated tags; default all tags seen"),
+    points: int = Query(60, ge=1, le=10_000),
+    since: Optional[datetime] = Query(None),
+    source: str = Query("scada", max_length=32),
+    cache: ConditionalGet = Depends(conditional_get("readings", admin_all_plants=False)),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    Sparklines: last `points` values per tag (optionally only at or after `since`), from the in-memory
+    recent history fed by ingestion. No DB queries. Tags with no recent readings are left out.
+    Per plant for every role (admins get their own plant), and so is the ETag.
+    """
+    tag_list = None
+    if tags:
+        tag_list = list(dict.fromkeys(t.strip() for t in tags.split(",") if t.strip()))
+        if len(tag_list) > RECENT_MAX_TAGS:
+            raise HTTPException(status_code=400, detail=f"At most {RECENT_MAX_TAGS} tags per request")
+    if (hit := cache.cached()) is not None:
+        return hit
+    found = recent_history.recent(
+        current_user.plant_id, tag_list, source=source, points=points,
+        since_ms=epoch_ms(since) if since is not None else None,
+    )
+    series = []
+    for tag in sorted(found):
+        times, values = found[tag]
+        series.append(RecentSeriesOut(
+            tag=tag,
+            timestamps_ms=times.tolist(),
+            values=[None if v != v else v for v in values.tolist()],  # NaN -> null
+        ))
+    return cache.respond(RecentReadingsOut(source=source, series=series))
+
+
+@router.get("/stream")
+async def stream_live(request: Request, current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Server-Sent Events: "readings" (changed values only) and "alerts" (created/changed) for the caller's
+    plant (admin: all plants). Load the REST snapshot first, then apply events. On "resync", reload and reconnect.
+    """
+    plant_id = None if current_user.role == "admin" else (current_user.plant_id or "")
+    sub = live_broadcaster.subscribe(plant_id)
+    return StreamingResponse(
+        sse_stream(sub, request.is_disconnected, keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/trends/rollups", response_model=RollupSeriesOut)
+def get_trend_rollups(
+    tag: str = Query(..., min_length=1, max_length=128),
+    from_time: datetime = Query(...),
+    to_time: Optional[datetime] = Query(None),
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=10, le=5000),
+    resolution: Optional[str] = Query(None),
+    db: Session = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Trend for one SCADA tag from rollups. Picks the finest of 1m/15m/1h/1d that fits max_points unless resolution is given."""
+    from_time = naive_utc(from_time)
+    to_time = naive_utc(to_time) if to_time is not None else datetime.utcnow()
+    if to_time < from_time:
+        raise HTTPException(status_code=400, detail="to_time must be after from_time")
+    try:
+        res, rows = query_rollups(db, current_user.plant_id, tag, from_time, to_time, max_points, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RollupSeriesOut(
+        tag=tag,
+        resolution=res,
+        points=[
+            RollupPointOut(
+                bucket_start=r.bucket_start,
+                count=r.count,
+                min=r.min,
+                max=r.max,
+                avg=r.sum / r.count if r.count else 0.0,
+                first=r.first_value,
+                last=r.last_value,
+            )
+            for r in rows
+        ],
+    )
+
+
+@router.get("/history/scada", response_model=ScadaHistoryOut)
+def get_scada_history(
+    tag: str = Query(..., min_length=1, max_length=128),
+    from_time: datetime = Query(...),
+    to_time: Optional[datetime] = Query(None),
+    limit: int = Query(DEFAULT_HISTORY_LIMIT, ge=1, le=100_000),
+    db: Session = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Raw SCADA history for one tag (Supervisor or Admin, for audits). Reads archived months and the live table."""
+    if current_user.role not in ("supervisor", "admin"):
+        raise HTTPException(status_code=403, detail="Only Supervisor or Admin can read raw history")
+    from_time = naive_utc(from_time)
+    to_time = naive_utc(to_time) if to_time is not None else datetime.utcnow()
+    if to_time < from_time:
+        raise HTTPException(status_code=400, detail="to_time must be after from_time")
+    rows = query_history(db, "scada_readings", current_user.plant_id, tag, from_time, to_time, limit=limit)
+    return ScadaHistoryOut(tag=tag, points=[ScadaHistoryPointOut(**r) for r in rows])
+
+
+@router.post("/retention/run")
+def run_retention_now(
+    days: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Admin only: archive months older than days (default RETENTION_DAYS) now, instead of waiting for the job."""
     if current_user.role != "admin":
-        q = q.filter(Reading.plant_id == current_user.plant_id)
-    return q
+        raise HTTPException(status_code=403, detail="Admin only")
+    return run_retention(db, days=days)
 
 
-@router.get("/dashboard/readings/latest", response_model=list[ReadingOut])
-def get_latest_readings(
+@router.post("/backfill", response_model=BackfillJobOut, status_code=202)
+def start_backfill(
+    body: BackfillStart,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
 ):
-    """Dashboard: latest readings (after normalization). Pulls from DB; run ingest first if empty."""
-    q = db.query(Reading).filter(Reading.source == "scada")
-    q = _scope_readings_by_plant(q, current_user)
-    rows = q.order_by(Reading.created_at.desc()).limit(50).all()
-    by_tag = {}
-    for r in rows:
-        if r.tag not in by_tag:
-            by_tag[r.tag] = r
-    return [
-        ReadingOut(tag=r.tag, value=r.value, unit=r.unit, source=r.source, last_updated=r.created_at)
-        for r in by_tag.values()
-    ]
+    """Admin only: load a historian CSV from BACKFILL_DIR in the background, or resume an unfinished job."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    if body.resume_job_id is not None:
+        job = db.get(BackfillJob, body.resume_job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Backfill job not found")
+        if job.status == "completed":
+            raise HTTPException(status_code=409, detail="Backfill job already completed")
+    elif body.path:
+        try:
+            path = resolve_backfill_path(body.path)
+            job = create_job(db, str(path), body.plant_id or current_user.plant_id)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        raise HTTPException(status_code=400, detail="path or resume_job_id required")
+    if not claim_job(job.id):
+        raise HTTPException(status_code=409, detail="Backfill job already running")
+    background_tasks.add_task(run_job, job.id)
+    return job
+
+
+@router.get("/backfill/{job_id}", response_model=BackfillJobOut)
+def get_backfill(
+    job_id: int,
+    db: Session = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Admin only: backfill progress (chunks, rows loaded/skipped, throughput of the last run)."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    job = db.get(BackfillJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backfill job not found")
+    return job
 
 
 @router.post("/ingest")
 def run_ingest(
+    _rate_limit=Depends(check_rate_limit),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
-    _rate_limit=Depends(check_rate_limit),
 ):
     """Trigger ingestion: pull SCADA (and optionally others), normalize, store. Then evaluate alerts."""
     count = ingest_scada_latest(db, current_user.plant_id)
@@ -96,9 +275,9 @@ def run_ingest(
 @router.post("/morning-review/approve")
 def morning_review_approve(
     payload: MorningReviewApprove,
+    _rate_limit=Depends(check_rate_limit),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
-    _rate_limit=Depends(check_rate_limit),
 ):
     """Operator approved morning data. Sync to WIMS (stub) and E-Log. Only Supervisor or Admin."""
     if current_user.role not in ("supervisor", "admin"):
@@ -124,21 +303,35 @@ def list_alerts(
     status: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, max_length=256),
+    include_total: Optional[bool] = Query(None),
+    cache: ConditionalGet = Depends(conditional_get("alerts")),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
 ):
-    """List alerts (open first, then by created_at desc)."""
+    """
+    List alerts by created_at desc. Pass next_cursor back as cursor for the next page (keyset, no OFFSET).
+    total is counted on the first page only unless include_total is set. ETag per plant alert version.
+    """
+    if (hit := cache.cached()) is not None:
+        return hit
     q = db.query(Alert)
     if current_user.role != "admin":
         q = q.filter(Alert.plant_id == current_user.plant_id)
     if status:
         q = q.filter(Alert.status == status)
-    total = q.count()
-    rows = q.order_by(Alert.created_at.desc()).offset(offset).limit(limit).all()
-    return AlertListResponse(
-        alerts=[AlertOut.model_validate(r) for r in rows],
+    total = q.count() if want_total(include_total, cursor) else None
+    q = q.order_by(Alert.created_at.desc(), Alert.id.desc())
+    if cursor:
+        q = q.filter(after_cursor(Alert.created_at, Alert.id, _decode_cursor(cursor)))
+    elif offset:
+        q = q.offset(offset)
+    rows = q.limit(limit + 1).all()
+    return cache.respond(AlertListResponse(
+        alerts=[AlertOut.model_validate(r) for r in rows[:limit]],
         total=total,
-    )
+        next_cursor=next_cursor(rows, limit),
+    ))
 
 
 @router.get("/alerts/{alert_id}", response_model=AlertOut)
@@ -162,9 +355,16 @@ def dismiss_alert(alert_id: int, reason: Optional[str] = Query(None), db: Sessio
     a = q.first()
     if not a:
         raise HTTPException(status_code=404, detail="Alert not found")
+    if a.status == "open":
+        bump_shift_counter(db, a.plant_id, alerts_handled=1)
     a.status = "dismissed"
     a.resolved_at = datetime.utcnow()
+    plant_id = a.plant_id
+    event = alert_event(a) if live_broadcaster.has_subscribers else None
     db.commit()
+    data_versions.bump(plant_id, "alerts")
+    if event is not None:
+        live_broadcaster.publish_alerts(plant_id, [event])
     return {"success": True}
 
 
@@ -189,9 +389,16 @@ def alert_log_only(
         asset_name=a.asset_name,
         alert_summary=a.message or a.issue_type,
     )
+    if a.status == "open":
+        bump_shift_counter(db, a.plant_id, alerts_handled=1)
     a.status = "logged_only"
     a.resolved_at = datetime.utcnow()
+    plant_id = a.plant_id
+    event = alert_event(a) if live_broadcaster.has_subscribers else None
     db.commit()
+    data_versions.bump(plant_id, "alerts")
+    if event is not None:
+        live_broadcaster.publish_alerts(plant_id, [event])
     return {"success": True, "message": "Logged successfully."}
 
 
@@ -200,64 +407,94 @@ def alert_log_only(
 def list_work_orders(
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, max_length=256),
+    include_total: Optional[bool] = Query(None),
+    cache: ConditionalGet = Depends(conditional_get("work_orders")),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
 ):
-    """List work orders (created from alerts) for the current plant."""
+    """List work orders (created from alerts) for the current plant. Keyset pagination and ETag, like /alerts."""
+    if (hit := cache.cached()) is not None:
+        return hit
     q = db.query(WorkOrderRecord)
     if current_user.role != "admin":
         q = q.filter(WorkOrderRecord.plant_id == current_user.plant_id)
-    total = q.count()
-    rows = q.order_by(WorkOrderRecord.created_at.desc()).offset(offset).limit(limit).all()
-    return WorkOrderListResponse(work_orders=[WorkOrderOut.model_validate(r) for r in rows], total=total)
+    total = q.count() if want_total(include_total, cursor) else None
+    q = q.order_by(WorkOrderRecord.created_at.desc(), WorkOrderRecord.id.desc())
+    if cursor:
+        q = q.filter(after_cursor(WorkOrderRecord.created_at, WorkOrderRecord.id, _decode_cursor(cursor)))
+    elif offset:
+        q = q.offset(offset)
+    rows = q.limit(limit + 1).all()
+    return cache.respond(WorkOrderListResponse(
+        work_orders=[WorkOrderOut.model_validate(r) for r in rows[:limit]],
+        total=total,
+        next_cursor=next_cursor(rows, limit),
+    ))
 
 
 # ----- Work order from alert -----
 @router.post("/work-orders/create", response_model=WorkOrderCreated)
 def create_work_order(
     payload: WorkOrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=128),
+    _rate_limit=Depends(check_rate_limit),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
-    _rate_limit=Depends(check_rate_limit),
 ):
-    """Auto-create work order from alert: pre-fill from SCADA + AI, push to CMMS, E-Log, notify."""
+    """
+    Auto-create work order from alert: queue it in the CMMS outbox and return immediately. The dispatcher
+    pushes it to CMMS (retries with backoff), then records the WO, writes the E-Log entry and marks the alert.
+    Same Idempotency-Key (default: one per alert) returns the existing queued/sent WO instead of a new one;
+    the same key for a different alert is 409.
+    """
     q = db.query(Alert).filter(Alert.id == payload.alert_id)
     if current_user.role != "admin":
         q = q.filter(Alert.plant_id == current_user.plant_id)
     a = q.first()
     if not a:
         raise HTTPException(status_code=404, detail="Alert not found")
-    ok, wo_id, err = cmms.create_work_order(
-        asset_name=a.asset_name,
-        description=a.message or a.issue_type,
-        priority=payload.priority or "high",
-        assignee_id=payload.assignee_id,
-        scada_snapshot=a.scada_snapshot,
-        plant_id=current_user.plant_id or a.plant_id,
-        db=db,
+    try:
+        row, created = enqueue_work_order(
+            db,
+            a,
+            current_user,
+            priority=payload.priority or "high",
+            assignee_id=payload.assignee_id,
+            notes=payload.notes,
+            idempotency_key=idempotency_key,
+        )
+    except IdempotencyKeyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if row.status == "sent":
+        message = f"Work order {row.external_wo_id} already created."
+    elif created:
+        message = "Work order queued for CMMS. 10 min saved."
+    else:
+        message = "Work order already queued for CMMS."
+    return WorkOrderCreated(
+        success=True,
+        work_order_id=row.external_wo_id,
+        outbox_id=row.id,
+        status=row.status,
+        message=message,
     )
-    if not ok:
-        return WorkOrderCreated(success=False, message=err)
-    rec = WorkOrderRecord(
-        alert_id=a.id,
-        plant_id=current_user.plant_id or a.plant_id,
-        external_wo_id=wo_id,
-        payload_sent={"asset": a.asset_name, "description": a.message},
-    )
-    db.add(rec)
-    log_wo_created(
-        db,
-        operator_id=current_user.operator_id,
-        operator_name=current_user.operator_name,
-        plant_id=current_user.plant_id,
-        asset_name=a.asset_name,
-        wo_number=wo_id,
-        description=a.message,
-    )
-    a.status = "wo_created"
-    a.resolved_at = datetime.utcnow()
-    db.commit()
-    return WorkOrderCreated(success=True, work_order_id=wo_id, message="Work order created. 10 min saved.")
+
+
+@router.get("/work-orders/outbox/{outbox_id}", response_model=WorkOrderOutboxOut)
+def get_work_order_outbox(
+    outbox_id: int,
+    db: Session = Depends(get_session),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Status of a queued work order (pending, in_flight, sent, failed), attempts and last CMMS error."""
+    q = db.query(WorkOrderOutbox).filter(WorkOrderOutbox.id == outbox_id)
+    if current_user.role != "admin":
+        q = q.filter(WorkOrderOutbox.plant_id == current_user.plant_id)
+    row = q.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Outbox entry not found")
+    return WorkOrderOutboxOut.model_validate(row)
 
 
 # ----- Shift handoff -----
@@ -266,24 +503,21 @@ def get_shift_summary(
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
 ):
-    """AI-generated shift summary: syncs, alerts, WOs, time saved. Stub: counts from DB."""
-    from elog.repository import list_entries
-    elog_plant = None if current_user.role == "admin" else current_user.plant_id
-    _, syncs_total = list_entries(db, plant_id=elog_plant, entry_type="readings_approved", limit=1000)
-    syncs_count = syncs_total
-    aq = db.query(Alert).filter(Alert.status != "open")
-    if current_user.role != "admin":
-        aq = aq.filter(Alert.plant_id == current_user.plant_id)
-    alerts_handled = aq.count()
-    wq = db.query(WorkOrderRecord)
-    if current_user.role != "admin":
-        wq = wq.filter(WorkOrderRecord.plant_id == current_user.plant_id)
-    wo_count = wq.count()
+    """
+    AI-generated shift summary: syncs, alerts, WOs, time saved, for the current shift window.
+    Stub: counts from shift_counters (maintained on write), so this is one keyed read.
+    """
+    start = shift_start()
+    plant_id = None if current_user.role == "admin" else (current_user.plant_id or "")
+    counts = read_counts(db, plant_id, start)
+    syncs_count = counts["syncs"]
+    wo_count = counts["work_orders_created"]
     return ShiftSummary(
+        shift_id=shift_id(start),
         operator_id=current_user.operator_id,
         operator_name=current_user.operator_name,
         syncs_count=syncs_count,
-        alerts_handled=alerts_handled,
+        alerts_handled=counts["alerts_handled"],
         work_orders_created=wo_count,
         time_saved_minutes=(syncs_count * 15) + (wo_count * 10),
     )
@@ -2,6 +2,7 @@
 Spec API endpoints:
 POST /scada/test
 POST /scada/poll
+POST /scada/tag-rules/reload
 POST /alerts/process
 POST /work-orders/create (already in routes_platform)
 POST /compliance/export
@@ -11,24 +12,29 @@ Security: roles Operator, Supervisor, Admin. Only supervisors approve (stub: hea
 """
 
 import csv
+import heapq
 import io
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from database import get_session
+from database import SessionLocal, get_session
 from auth import get_current_user, CurrentUser
 from compliance_config import get_compliance_csv_columns
 from rate_limit import check_rate_limit
+from retention import iter_archived
 from connectors import scada_connector, cmms_connector
 from connectors.scada import scada_connector as scada
-from models_platform import Reading, ScadaReading, Alert, WorkOrderRecord, AuditLog
-from ingestion.service import ingest_scada_latest
+from models_platform import Reading, Alert, WorkOrderRecord, AuditLog
+from ingestion.service import ingest_scada_latest, latest_readings, poll_scada
+from ingestion.tag_normalizer import reload_tag_rules
 from pipeline.alerts import evaluate_alerts
+from pipeline.rollups import naive_utc
 from elog.connector import create_log_entry
 from elog.repository import create_entry
 from elog.schemas import LogEntryCreate
@@ -54,40 +60,32 @@ def scada_test(current_user: CurrentUser = Depends(get_current_user)):
 # ----- POST /scada/poll -----
 @router.post("/scada/poll")
 def scada_poll(
+    _rate_limit=Depends(check_rate_limit),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(get_current_user),
-    _rate_limit=Depends(check_rate_limit),
 ):
-    """Poll SCADA: fetch_data → normalize → store ScadaReading + Reading cache. Returns count."""
-    plant_id = current_user.plant_id
-    raw = scada_connector.fetch_data(plant_id=plant_id)
-    normalized = scada_connector.normalize(raw)
-    count = 0
-    for n in normalized:
-        ts = n.get("timestamp") or datetime.utcnow()
-        sr = ScadaReading(
-            plant_id=plant_id,
-            timestamp=ts,
-            tag_name=n.get("tag_name", ""),
-            value=float(n.get("value", 0)),
-            unit=n.get("unit"),
-            quality=n.get("quality"),
-            alarm_state=n.get("alarm_state"),
-        )
-        db.add(sr)
-        # Also write to legacy Reading cache for dashboard
-        r = Reading(
-            plant_id=plant_id,
-            source="scada",
-            tag=n.get("tag_name", ""),
-            value=float(n.get("value", 0)),
-            unit=n.get("unit"),
-            raw_tag=n.get("tag_name"),
-        )
-        db.add(r)
-        count += 1
-    db.commit()
-    return {"readings_stored": count}
+    """Poll SCADA: fetch_data → normalize → bulk store ScadaReading + Reading cache. Returns count and rows/sec."""
+    return poll_scada(db, current_user.plant_id)
+
+
+# ----- GET /scada/scheduler -----
+@router.get("/scada/scheduler")
+def scada_scheduler_status(current_user: CurrentUser = Depends(require_supervisor)):
+    """Background poll scheduler: per-plant cycle duration, lag, missed cycles, errors."""
+    import scheduler
+
+    if scheduler.scada_poll_scheduler is None:
+        return {"running": False, "plants": {}}
+    return scheduler.scada_poll_scheduler.status()
+
+
+# ----- POST /scada/tag-rules/reload -----
+@router.post("/scada/tag-rules/reload")
+def scada_tag_rules_reload(current_user: CurrentUser = Depends(get_current_user)):
+    """Admin only: re-read tag normalization rules (TAG_RULES / config/tag_rules.json) without a restart."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    return reload_tag_rules().stats()
 
 
 # ----- POST /alerts/process -----
@@ -103,61 +101,129 @@ def alerts_process(
 
 
 # ----- POST /compliance/export -----
+# Rows fetched per round-trip from the server-side cursor, and bytes buffered before each CSV chunk is sent.
+EXPORT_YIELD_PER = 2000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
 class ComplianceExportBody(BaseModel):
-    """Optional overrides; identity from current_user."""
+    """Optional date range; identity from current_user. No range: latest value per tag."""
+
+    from_time: Optional[datetime] = None
+    to_time: Optional[datetime] = None
+
+    @field_validator("from_time", "to_time")
+    @classmethod
+    def utc_naive(cls, v: Optional[datetime]) -> Optional[datetime]:
+        """Readings are stored as naive UTC; offset-aware bounds are converted so comparisons work."""
+        return naive_utc(v) if v is not None else None
 
-    pass
+    @model_validator(mode="after")
+    def range_ordered(self) -> "ComplianceExportBody":
+        if self.from_time and self.to_time and self.to_time < self.from_time:
+            raise ValueError("to_time must be after from_time")
+        return self
+
+
+def _export_rows(db: Session, plant_id: Optional[str], body: ComplianceExportBody) -> Iterator[dict[str, Any]]:
+    """
+    Reading dicts (tag, value, unit, timestamp). Date range: live history via server-side cursor merged in
+    time order with months the retention job archived; else current values.
+    """
+    if body.from_time is None and body.to_time is None:
+        for r in latest_readings(db, plant_id):
+            yield {"tag": r.tag, "value": r.value, "unit": r.unit or "", "timestamp": r.updated_at.isoformat()}
+        return
+    q = select(Reading.tag, Reading.value, Reading.unit, Reading.created_at).where(Reading.source == "scada")
+    if plant_id is not None:
+        q = q.where(Reading.plant_id == plant_id)
+    if body.from_time is not None:
+        q = q.where(Reading.created_at >= body.from_time)
+    if body.to_time is not None:
+        q = q.where(Reading.created_at <= body.to_time)
+    q = q.order_by(Reading.created_at, Reading.id).execution_options(yield_per=EXPORT_YIELD_PER)
+    live = (r._asdict() for r in db.execute(q))
+    archived = iter_archived(
+        "readings", None if plant_id is None else [plant_id], body.from_time, body.to_time, source="scada",
+    )
+    for r in heapq.merge(archived, live, key=lambda r: r["created_at"]):
+        yield {"tag": r["tag"], "value": r["value"], "unit": r["unit"] or "", "timestamp": r["created_at"].isoformat()}
+
+
+def _stream_compliance_csv(
+    plant_id: Optional[str],
+    body: ComplianceExportBody,
+    audit_id: int,
+) -> Iterator[str]:
+    """
+    CSV in ~EXPORT_CHUNK_BYTES chunks; memory stays bounded regardless of row count.
+    Owns its session (request session is closed before the body streams). The route writes the audit
+    row first; row count and status are filled in here when the stream ends or the client aborts.
+    """
+    columns = get_compliance_csv_columns()
+    db = SessionLocal()
+    count = 0
+    completed = False
+    try:
+        out = io.StringIO()
+        w = csv.writer(out)
+        w.writerow([header for header, _ in columns])
+        for r in _export_rows(db, plant_id, body):
+            w.writerow([r.get(our_key, "") for _, our_key in columns])
+            count += 1
+            if out.tell() >= EXPORT_CHUNK_BYTES:
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+        yield out.getvalue()
+        completed = True
+    finally:
+        db.rollback()
+        audit = db.get(AuditLog, audit_id)
+        if audit is not None:
+            audit.payload = {
+                **(audit.payload or {}),
+                "row_count": count,
+                "completed": completed,
+                "status": "completed" if completed else "aborted",
+            }
+            db.commit()
+        db.close()
 
 
 @router.post("/compliance/export")
 def compliance_export(
     body: ComplianceExportBody,
+    _rate_limit=Depends(check_rate_limit),
     db: Session = Depends(get_session),
     current_user: CurrentUser = Depends(require_supervisor),
-    _rate_limit=Depends(check_rate_limit),
 ):
-    """Generate CSV for WIMS upload. Only Supervisor or Admin can export. Audit log for every submitted value."""
-    # Build readings data (tag, value, unit, timestamp)
-    q = db.query(Reading).filter(Reading.source == "scada")
-    if current_user.role != "admin":
-        q = q.filter(Reading.plant_id == current_user.plant_id)
-    rows = q.order_by(Reading.created_at.desc()).limit(100).all()
-    by_tag = {}
-    for r in rows:
-        if r.tag not in by_tag:
-            by_tag[r.tag] = r
-    readings = [{"tag": r.tag, "value": r.value, "unit": r.unit or "", "timestamp": r.created_at.isoformat()} for r in by_tag.values()]
-
-    # Config: column mapping and order (env COMPLIANCE_CSV_COLUMNS or config/compliance_columns.json)
-    columns = get_compliance_csv_columns()
-    fieldnames = [header for header, _ in columns]
-
-    # Build CSV rows from config: row[csv_header] = reading[our_key]
-    data = []
-    for r in readings:
-        row = {}
-        for header, our_key in columns:
-            row[header] = r.get(our_key, "")
-        data.append(row)
-
-    # Audit log (identity from auth only)
+    """
+    Stream CSV for WIMS upload. Only Supervisor or Admin can export. Audit log for every export.
+    from_time/to_time: every reading in range (monthly exports); omitted: latest value per tag.
+    Columns and order from env COMPLIANCE_CSV_COLUMNS or config/compliance_columns.json.
+    """
+    plant_id = None if current_user.role == "admin" else current_user.plant_id
+    # Audit log (identity from auth only), committed before the body streams: an export that never
+    # starts streaming is still on record, with status "started".
     audit = AuditLog(
         plant_id=current_user.plant_id,
         action="compliance_export",
         actor_id=current_user.operator_id,
         actor_role=current_user.role,
-        payload={"row_count": len(data), "operator_name": current_user.operator_name},
+        payload={
+            "row_count": 0,
+            "completed": False,
+            "status": "started",
+            "from_time": body.from_time.isoformat() if body.from_time else None,
+            "to_time": body.to_time.isoformat() if body.to_time else None,
+            "operator_name": current_user.operator_name,
+        },
     )
     db.add(audit)
     db.commit()
-
-    # CSV with header and column order from config
-    out = io.StringIO()
-    w = csv.DictWriter(out, fieldnames=fieldnames)
-    w.writeheader()
-    w.writerows(data)
     return StreamingResponse(
-        iter([out.getvalue()]),
+        _stream_compliance_csv(plant_id, body, audit.id),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=compliance_export.csv"},
     )
@@ -0,0 +1,159 @@
+"""
+Background SCADA poll scheduler. One asyncio task per plant, started from main.lifespan.
+Each cycle runs fetch_data → normalize (tag normalizer) → bulk store (ingestion.poll_scada) →
+evaluate_alerts in a worker thread, like POST /api/ingest, so neither ingestion nor alerting depends on
+someone hitting an endpoint.
+
+Config (env):
+- SCADA_POLL_PLANTS: comma-separated plant ids. Empty = scheduler off.
+- SCADA_POLL_INTERVAL_SECONDS: cycle interval (default 10).
+- SCADA_POLL_JITTER_SECONDS: random 0..N delay added to each cycle start (default 1).
+
+Runs never overlap: a plant's next cycle starts only after the current one finishes; cycles whose
+slot passed while a run was still going are counted as missed, not queued.
+"""
+
+import asyncio
+import os
+import random
+from datetime import datetime
+from typing import Any, Optional
+
+from database import SessionLocal
+from ingestion.service import poll_scada
+from pipeline.alerts import evaluate_alerts
+
+DEFAULT_INTERVAL_SECONDS = 10.0
+DEFAULT_JITTER_SECONDS = 1.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def configured_plants() -> list[str]:
+    """Plant ids from SCADA_POLL_PLANTS."""
+    raw = os.environ.get("SCADA_POLL_PLANTS", "")
+    return [p.strip() for p in raw.split(",") if p.strip()]
+
+
+def _poll_once(plant_id: str) -> dict[str, Any]:
+    """One poll cycle in its own session (runs in a worker thread): store, then evaluate alerts."""
+    db = SessionLocal()
+    try:
+        result = poll_scada(db, plant_id)
+        result["new_alerts"] = len(evaluate_alerts(db, plant_id))
+        return result
+    finally:
+        db.close()
+
+
+class ScadaPollScheduler:
+    """Per-plant polling loops plus cycle stats (duration, lag, missed cycles, errors)."""
+
+    def __init__(self, plants: list[str], interval: float, jitter: float) -> None:
+        self.plants = plants
+        self.interval = max(interval, 0.1)
+        self.jitter = jitter
+        self._tasks: list[asyncio.Task] = []
+        self._stats: dict[str, dict[str, Any]] = {
+            p: {
+                "cycles": 0,
+                "missed_cycles": 0,
+                "errors": 0,
+                "last_started_at": None,
+                "last_duration_ms": None,
+                "last_lag_ms": None,
+                "max_lag_ms": 0.0,
+                "last_readings_stored": None,
+                "last_rows_per_sec": None,
+                "last_new_alerts": None,
+                "last_error": None,
+            }
+            for p in plants
+        }
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._tasks = [asyncio.create_task(self._run_plant(p), name=f"scada-poll-{p}") for p in self.plants]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "jitter_seconds": self.jitter,
+            "plants": {p: dict(s) for p, s in self._stats.items()},
+        }
+
+    async def _run_plant(self, plant_id: str) -> None:
+        loop = asyncio.get_running_loop()
+        stats = self._stats[plant_id]
+        scheduled = loop.time()
+        while True:
+            target = scheduled + random.uniform(0, self.jitter)
+            delay = target - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            started = loop.time()
+            lag_ms = max(started - target, 0.0) * 1000
+            stats["last_started_at"] = datetime.utcnow()
+            stats["last_lag_ms"] = round(lag_ms, 2)
+            stats["max_lag_ms"] = round(max(stats["max_lag_ms"], lag_ms), 2)
+            try:
+                result = await asyncio.to_thread(_poll_once, plant_id)
+                stats["last_readings_stored"] = result["readings_stored"]
+                stats["last_rows_per_sec"] = result["rows_per_sec"]
+                stats["last_new_alerts"] = result["new_alerts"]
+                stats["last_error"] = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # keep polling; surface the error in status()
+                stats["errors"] += 1
+                stats["last_error"] = str(e)
+            stats["cycles"] += 1
+            stats["last_duration_ms"] = round((loop.time() - started) * 1000, 2)
+            # Next slot on the fixed grid; slots that passed during this run are skipped, not queued.
+            scheduled += self.interval
+            now = loop.time()
+            if scheduled < now:
+                missed = int((now - scheduled) // self.interval) + 1
+                stats["missed_cycles"] += missed
+                scheduled += missed * self.interval
+
+
+scada_poll_scheduler: Optional[ScadaPollScheduler] = None
+
+
+def start_scheduler() -> Optional[ScadaPollScheduler]:
+    """Start polling for SCADA_POLL_PLANTS (no-op if unset). Call from the app lifespan."""
+    global scada_poll_scheduler
+    plants = configured_plants()
+    if not plants:
+        return None
+    scada_poll_scheduler = ScadaPollScheduler(
+        plants,
+        interval=_env_float("SCADA_POLL_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS),
+        jitter=_env_float("SCADA_POLL_JITTER_SECONDS", DEFAULT_JITTER_SECONDS),
+    )
+    scada_poll_scheduler.start()
+    return scada_poll_scheduler
+
+
+async def stop_scheduler() -> None:
+    if scada_poll_scheduler is not None:
+        await scada_poll_scheduler.stop()
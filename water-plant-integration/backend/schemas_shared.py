@@ -25,6 +25,8 @@ class SystemStatus(BaseModel):
     name: str
     connected: bool
     last_checked: Optional[datetime] = None
+    last_success: Optional[datetime] = None
+    latency_ms: Optional[float] = None  # duration of the last probe
     error: Optional[str] = None
 
 
@@ -37,6 +39,49 @@ class ReadingOut(BaseModel):
     last_updated: Optional[datetime] = None
 
 
+class RecentSeriesOut(BaseModel):
+    tag: str
+    timestamps_ms: list[int]  # epoch milliseconds (UTC), oldest first
+    values: list[Optional[float]]  # None where the reading was NaN
+
+
+class RecentReadingsOut(BaseModel):
+    source: str
+    series: list[RecentSeriesOut]
+
+
+# ----- Trends (rollups of SCADA readings) -----
+class RollupPointOut(BaseModel):
+    bucket_start: datetime
+    count: int
+    min: float
+    max: float
+    avg: float
+    first: float
+    last: float
+
+
+class RollupSeriesOut(BaseModel):
+    tag: str
+    resolution: str  # 1m, 15m, 1h, 1d
+    points: list[RollupPointOut]
+
+
+# ----- History (live + archived scada_readings, for audits) -----
+class ScadaHistoryPointOut(BaseModel):
+    timestamp: datetime
+    value: float
+    unit: Optional[str] = None
+    quality: Optional[str] = None
+    alarm_state: Optional[str] = None
+    archived: bool = False
+
+
+class ScadaHistoryOut(BaseModel):
+    tag: str
+    points: list[ScadaHistoryPointOut]
+
+
 # ----- Morning review: approve & sync (operator_id/plant_id from auth) -----
 class MorningReviewApprove(BaseModel):
     overrides: Optional[dict[str, float]] = None  # tag -> value if operator corrects (keys max 256, no control chars)
@@ -64,13 +109,17 @@ class AlertOut(BaseModel):
     status: str
     created_at: datetime
     scada_snapshot: Optional[dict[str, Any]] = None
+    occurrence_count: int = 1
+    last_seen_at: Optional[datetime] = None
+    cleared_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
 
 class AlertListResponse(BaseModel):
     alerts: list[AlertOut]
-    total: int
+    total: Optional[int] = None  # omitted on cursor pages unless include_total=true
+    next_cursor: Optional[str] = None
 
 
 # ----- Work order (create from alert; operator_id/plant_id from auth) -----
@@ -88,10 +137,27 @@ class WorkOrderCreate(BaseModel):
 
 class WorkOrderCreated(BaseModel):
     success: bool
-    work_order_id: Optional[str] = None  # external ID (e.g. Fiix)
+    work_order_id: Optional[str] = None  # external ID (e.g. Fiix); set once the outbox has sent it
+    outbox_id: Optional[int] = None
+    status: Optional[str] = None  # outbox status: pending, in_flight, sent, failed
     message: Optional[str] = None
 
 
+class WorkOrderOutboxOut(BaseModel):
+    id: int
+    idempotency_key: str
+    alert_id: Optional[int] = None
+    status: str
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    external_wo_id: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
 class WorkOrderOut(BaseModel):
     id: int
     external_wo_id: Optional[str] = None
@@ -105,7 +171,8 @@ class WorkOrderOut(BaseModel):
 
 class WorkOrderListResponse(BaseModel):
     work_orders: list[WorkOrderOut]
-    total: int
+    total: Optional[int] = None  # omitted on cursor pages unless include_total=true
+    next_cursor: Optional[str] = None
 
 
 # ----- Shift handoff -----
@@ -127,3 +194,29 @@ class ShiftSignOff(BaseModel):
     @classmethod
     def no_control_chars(cls, v: Optional[str]) -> Optional[str]:
         return _no_control_chars(v)
+
+
+# ----- Historian backfill (Admin) -----
+class BackfillStart(BaseModel):
+    path: Optional[str] = Field(None, max_length=512)  # CSV relative to BACKFILL_DIR; not needed to resume
+    plant_id: Optional[str] = Field(None, max_length=64)  # default: the admin's plant
+    resume_job_id: Optional[int] = None
+
+
+class BackfillJobOut(BaseModel):
+    id: int
+    plant_id: Optional[str] = None
+    path: str
+    file_size: int
+    status: str  # pending, running, completed, failed
+    chunks_total: int
+    chunks_done: int
+    rows_loaded: int
+    rows_skipped: int
+    rows_per_sec: Optional[float] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
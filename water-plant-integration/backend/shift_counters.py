@@ -0,0 +1,90 @@
+"""
+Shift handoff counters. One shift_counters row per (plant, shift window), incremented in the same
+transaction as the event it counts, so GET /api/shift/summary is one keyed read instead of counting history.
+
+Counted events: approved morning readings (E-Log readings_approved), alerts leaving "open"
+(dismissed, logged_only, wo_created) and CMMS work orders recorded.
+
+Config (env):
+- SHIFT_LENGTH_HOURS: shift length (default 12; should divide 24).
+- SHIFT_ANCHOR_HOUR: UTC hour a shift starts each day (default 6, i.e. 06:00-18:00 and 18:00-06:00).
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models_platform import ShiftCounter
+
+COUNTERS = ("syncs", "alerts_handled", "work_orders_created")
+
+
+def _env_int(name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if low <= value <= high else default
+
+
+def shift_start(at: Optional[datetime] = None) -> datetime:
+    """Start of the shift window containing `at` (default now, UTC)."""
+    at = at or datetime.utcnow()
+    length = timedelta(hours=_env_int("SHIFT_LENGTH_HOURS", 12, 1, 24))
+    anchor = at.replace(hour=_env_int("SHIFT_ANCHOR_HOUR", 6, 0, 23), minute=0, second=0, microsecond=0)
+    if anchor > at:
+        anchor -= timedelta(days=1)
+    return anchor + ((at - anchor) // length) * length
+
+
+def shift_id(start: datetime) -> str:
+    return start.strftime("%Y-%m-%dT%H:%M")
+
+
+def bump(db: Session, plant_id: Optional[str], *, at: Optional[datetime] = None, **increments: int) -> None:
+    """
+    Add increments (e.g. syncs=1) to the plant's counter row for the shift containing `at`.
+    Caller commits, so the count lands in the same transaction as the event.
+    """
+    values = {k: v for k, v in increments.items() if k in COUNTERS and v}
+    if not values:
+        return
+    key = {"plant_id": plant_id or "", "shift_start": shift_start(at)}
+    now = datetime.utcnow()
+    table = ShiftCounter.__table__
+    ins = dialect_insert(db, table)
+    if ins is not None:
+        stmt = ins.values(**key, **{c: values.get(c, 0) for c in COUNTERS}, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["plant_id", "shift_start"],
+            set_={**{c: table.c[c] + stmt.excluded[c] for c in values}, "updated_at": stmt.excluded.updated_at},
+        )
+        db.execute(stmt)
+        return
+    row = db.scalars(
+        select(ShiftCounter).where(ShiftCounter.plant_id == key["plant_id"], ShiftCounter.shift_start == key["shift_start"])
+    ).first()
+    if row is None:
+        row = ShiftCounter(**key, **{c: 0 for c in COUNTERS})
+        db.add(row)
+    for c, v in values.items():
+        setattr(row, c, getattr(row, c) + v)
+    row.updated_at = now
+
+
+def read_counts(db: Session, plant_id: Optional[str], start: datetime) -> dict[str, int]:
+    """Counts for one shift: one plant's row, or (plant_id=None, admin) the sum over all plants."""
+    if plant_id is not None:
+        row = db.scalars(
+            select(ShiftCounter).where(ShiftCounter.plant_id == plant_id, ShiftCounter.shift_start == start)
+        ).first()
+        return {c: getattr(row, c) if row else 0 for c in COUNTERS}
+    sums = db.execute(
+        select(*[func.coalesce(func.sum(getattr(ShiftCounter, c)), 0) for c in COUNTERS])
+        .where(ShiftCounter.shift_start == start)
+    ).one()
+    return dict(zip(COUNTERS, (int(v) for v in sums)))
@@ -0,0 +1,330 @@
+"""
+CMMS work-order outbox. POST /api/work-orders/create only enqueues a WorkOrderOutbox row and returns;
+a background dispatcher (started from main.lifespan) sends due rows to the CMMS one attempt at a time,
+with exponential backoff between attempts, off the request path.
+
+No duplicate requests: each row has an idempotency key, unique per plant (client Idempotency-Key header,
+default one per alert). Enqueueing the same key for the same alert returns the existing row; reusing a key
+for a different alert is an IdempotencyKeyConflict (409). A row is claimed (pending -> in_flight) with a
+conditional UPDATE before sending, so two dispatchers never send it at once.
+
+Delivery to the CMMS is at least once. The key is passed to the connector, but the stub ignores it; a
+real CMMS API has to dedupe on it for a resend to be a no-op. A row stays in_flight only while it is
+being sent: rows left in_flight longer than WO_OUTBOX_LEASE_SECONDS (a crash, or a failure while
+recording the result) go back to pending, as do all in_flight rows at startup.
+
+Config (env):
+- WO_OUTBOX_POLL_SECONDS: dispatcher interval (default 2).
+- WO_OUTBOX_MAX_ATTEMPTS: attempts before a row is marked failed (default 5).
+- WO_OUTBOX_BACKOFF_SECONDS: first retry delay, doubled per attempt, capped at 15 min (default 5).
+- WO_OUTBOX_LEASE_SECONDS: how long a claimed row may stay in_flight before it is re-queued (default 300).
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from auth import CurrentUser
+from connectors.cmms import cmms_connector
+from database import SessionLocal
+from elog.connector import log_wo_created
+from live import alert_event, live_broadcaster
+from models_platform import Alert, AuditLog, WorkOrderOutbox, WorkOrderRecord
+from response_cache import data_versions
+from shift_counters import bump as bump_shift_counter
+
+MAX_BACKOFF_SECONDS = 15 * 60
+DISPATCH_BATCH = 20
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+def max_attempts() -> int:
+    return int(_env_number("WO_OUTBOX_MAX_ATTEMPTS", 5))
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before the next attempt after `attempts` failures: base * 2^(attempts-1), capped."""
+    base = _env_number("WO_OUTBOX_BACKOFF_SECONDS", 5)
+    return min(base * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS)
+
+
+class IdempotencyKeyConflict(ValueError):
+    """The Idempotency-Key was already used for a different alert in this plant."""
+
+
+def lease_seconds() -> float:
+    return _env_number("WO_OUTBOX_LEASE_SECONDS", 300)
+
+
+def _find_by_key(db: Session, plant_id: Optional[str], key: str) -> Optional[WorkOrderOutbox]:
+    return db.scalars(
+        select(WorkOrderOutbox).where(WorkOrderOutbox.plant_id == plant_id, WorkOrderOutbox.idempotency_key == key)
+    ).first()
+
+
+def _same_alert(row: Optional[WorkOrderOutbox], alert: Alert) -> WorkOrderOutbox:
+    if row is None or row.alert_id != alert.id:
+        raise IdempotencyKeyConflict("Idempotency-Key already used for a different alert")
+    return row
+
+
+def enqueue_work_order(
+    db: Session,
+    alert: Alert,
+    current_user: CurrentUser,
+    *,
+    priority: str = "high",
+    assignee_id: Optional[str] = None,
+    notes: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> tuple[WorkOrderOutbox, bool]:
+    """
+    Queue a WO for alert. Returns (row, created). An existing key (per plant) for the same alert returns its
+    row unchanged, except a failed row, which is re-armed (it never reached the CMMS, so resending is safe).
+    Raises IdempotencyKeyConflict if the key belongs to another alert.
+    """
+    key = idempotency_key or f"alert-{alert.id}"
+    plant_id = current_user.plant_id or alert.plant_id
+    existing = _find_by_key(db, plant_id, key)
+    if existing is not None:
+        _same_alert(existing, alert)
+        if existing.status == "failed":
+            existing.status = "pending"
+            existing.attempts = 0
+            existing.next_attempt_at = datetime.utcnow()
+            existing.updated_at = datetime.utcnow()
+            db.commit()
+        return existing, False
+    row = WorkOrderOutbox(
+        idempotency_key=key,
+        alert_id=alert.id,
+        plant_id=plant_id,
+        status="pending",
+        payload={
+            "asset_name": alert.asset_name,
+            "description": alert.message or alert.issue_type,
+            "priority": priority,
+            "assignee_id": assignee_id,
+            "notes": notes,
+            "scada_snapshot": alert.scada_snapshot,
+            "operator_id": current_user.operator_id,
+            "operator_name": current_user.operator_name,
+        },
+    )
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:  # same key enqueued concurrently
+        db.rollback()
+        return _same_alert(_find_by_key(db, plant_id, key), alert), False
+    db.refresh(row)
+    return row, True
+
+
+def _claim(db: Session, row_id: int) -> bool:
+    """pending -> in_flight, only if nobody else claimed it first."""
+    res = db.execute(
+        update(WorkOrderOutbox)
+        .where(WorkOrderOutbox.id == row_id, WorkOrderOutbox.status == "pending")
+        .values(status="in_flight", updated_at=datetime.utcnow())
+    )
+    db.commit()
+    return res.rowcount == 1
+
+
+def _complete(db: Session, row: WorkOrderOutbox, wo_id: Optional[str]) -> None:
+    """CMMS accepted: WorkOrderRecord, alert -> wo_created, E-Log entry (commits)."""
+    p = row.payload or {}
+    plant_id = row.plant_id
+    rec = WorkOrderRecord(
+        alert_id=row.alert_id,
+        plant_id=row.plant_id,
+        external_wo_id=wo_id,
+        payload_sent={"asset": p.get("asset_name"), "description": p.get("description")},
+    )
+    db.add(rec)
+    db.flush()
+    row.status = "sent"
+    row.external_wo_id = wo_id
+    row.work_order_record_id = rec.id
+    row.last_error = None
+    row.updated_at = datetime.utcnow()
+    alert = db.get(Alert, row.alert_id) if row.alert_id else None
+    handled = alert is not None and alert.status == "open"
+    bump_shift_counter(db, row.plant_id, work_orders_created=1, alerts_handled=int(handled))
+    event = alert_plant = None
+    if alert is not None:
+        alert_plant = alert.plant_id
+        alert.status = "wo_created"
+        alert.resolved_at = datetime.utcnow()
+        if live_broadcaster.has_subscribers:
+            event = alert_event(alert)
+    log_wo_created(
+        db,
+        operator_id=p.get("operator_id") or "system",
+        operator_name=p.get("operator_name"),
+        plant_id=row.plant_id,
+        asset_name=p.get("asset_name") or "",
+        wo_number=wo_id,
+        description=p.get("description"),
+    )
+    data_versions.bump(plant_id, "work_orders")
+    if alert is not None:
+        data_versions.bump(alert_plant, "alerts")
+    if event is not None:
+        live_broadcaster.publish_alerts(alert_plant, [event])
+
+
+def _fail_attempt(db: Session, row: WorkOrderOutbox, error: Optional[str]) -> None:
+    """Schedule the next attempt with backoff, or mark failed and audit after the last one."""
+    now = datetime.utcnow()
+    row.attempts += 1
+    row.last_error = error
+    row.updated_at = now
+    if row.attempts >= max_attempts():
+        row.status = "failed"
+        db.add(AuditLog(
+            plant_id=row.plant_id,
+            action="cmms_create_failed",
+            actor_id=None,
+            actor_role=None,
+            payload={"payload": row.payload, "error": error, "attempts": row.attempts, "outbox_id": row.id},
+        ))
+    else:
+        row.status = "pending"
+        row.next_attempt_at = now + timedelta(seconds=backoff_seconds(row.attempts))
+    db.commit()
+
+
+def send_one(db: Session, row_id: int) -> Optional[str]:
+    """Claim and send one outbox row. Returns its new status, or None if another worker had it."""
+    if not _claim(db, row_id):
+        return None
+    row = db.get(WorkOrderOutbox, row_id)
+    p = row.payload or {}
+    try:
+        ok, wo_id, err = cmms_connector.create_work_order_once(
+            asset_name=p.get("asset_name") or "",
+            description=p.get("description") or "",
+            priority=p.get("priority") or "high",
+            assignee_id=p.get("assignee_id"),
+            source_alarm_id=row.alert_id,
+            scada_snapshot=p.get("scada_snapshot"),
+            plant_id=row.plant_id,
+            idempotency_key=row.idempotency_key,
+        )
+    except Exception as e:  # connector bug or network error: same path as a CMMS error
+        ok, wo_id, err = False, None, str(e)
+    if not ok:
+        _fail_attempt(db, row, err)
+        return row.status
+    try:
+        _complete(db, row, wo_id)
+    except Exception:  # CMMS accepted but recording failed: row stays in_flight until its lease expires
+        db.rollback()
+        return "in_flight"
+    return row.status
+
+
+def reclaim_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """in_flight rows claimed more than WO_OUTBOX_LEASE_SECONDS ago go back to pending (due now)."""
+    now = now or datetime.utcnow()
+    res = db.execute(
+        update(WorkOrderOutbox)
+        .where(
+            WorkOrderOutbox.status == "in_flight",
+            WorkOrderOutbox.updated_at < now - timedelta(seconds=lease_seconds()),
+        )
+        .values(status="pending", next_attempt_at=now, updated_at=now)
+    )
+    db.commit()
+    return res.rowcount
+
+
+def dispatch_due(db: Session, now: Optional[datetime] = None, limit: int = DISPATCH_BATCH) -> int:
+    """Re-queue expired in_flight rows, then send up to `limit` due pending rows. Returns number attempted."""
+    now = now or datetime.utcnow()
+    reclaim_expired(db, now)
+    ids = list(db.scalars(
+        select(WorkOrderOutbox.id)
+        .where(WorkOrderOutbox.status == "pending", WorkOrderOutbox.next_attempt_at <= now)
+        .order_by(WorkOrderOutbox.next_attempt_at)
+        .limit(limit)
+    ))
+    db.rollback()
+    attempted = 0
+    for row_id in ids:
+        if send_one(db, row_id) is not None:
+            attempted += 1
+    return attempted
+
+
+def recover_in_flight(db: Session) -> int:
+    """At startup: rows left in_flight by a crash go back to pending (resent: delivery is at least once)."""
+    res = db.execute(
+        update(WorkOrderOutbox)
+        .where(WorkOrderOutbox.status == "in_flight")
+        .values(status="pending", updated_at=datetime.utcnow())
+    )
+    db.commit()
+    return res.rowcount
+
+
+class OutboxDispatcher:
+    """Background loop: every interval, send due outbox rows in a worker thread."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _tick() -> int:
+        db = SessionLocal()
+        try:
+            return dispatch_due(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _recover() -> int:
+        db = SessionLocal()
+        try:
+            return recover_in_flight(db)
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        await asyncio.to_thread(self._recover)
+        while True:
+            try:
+                await asyncio.to_thread(self._tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # DB hiccup: try again next tick
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="wo-outbox")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+outbox_dispatcher = OutboxDispatcher(interval=_env_number("WO_OUTBOX_POLL_SECONDS", 2))